@@ -0,0 +1,55 @@
+# Microbenchmark for mm_bot.book.L2Book update throughput.
+#   PYTHONPATH=src python benchmarks/book_bench.py [--n 200000] [--levels 20]
+import argparse, json, random, time
+
+from mm_bot.book import L2Book
+
+def _snapshot(mid: float, tick: float, levels: int):
+    bids = [{"px": f"{mid - (i + 1) * tick:.6f}", "sz": "100", "n": 1} for i in range(levels)]
+    asks = [{"px": f"{mid + (i + 1) * tick:.6f}", "sz": "100", "n": 1} for i in range(levels)]
+    return [bids, asks]
+
+def bench_updates(n: int, levels: int, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    mid, tick = 0.126985, 0.000001
+    book = L2Book("@223")
+    book.apply_snapshot(_snapshot(mid, tick, levels))
+    ops = []
+    for _ in range(n):
+        is_bid = rnd.random() < 0.5
+        off = rnd.randint(1, levels + 5) * tick
+        px = round(mid - off if is_bid else mid + off, 6)
+        sz = 0.0 if rnd.random() < 0.3 else float(rnd.randint(1, 1000))
+        ops.append((is_bid, px, sz))
+
+    t0 = time.perf_counter()
+    for is_bid, px, sz in ops:
+        book.apply_update(is_bid, px, sz)
+    dt = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    for _ in range(n):
+        book.best_bid(); book.best_ask(); book.microprice()
+    dt_read = time.perf_counter() - t1
+    return {"updates": n, "levels": levels, "updates_per_sec": n / dt, "ns_per_update": dt / n * 1e9,
+            "ns_per_top_read": dt_read / n * 1e9}
+
+def bench_snapshots(n: int, levels: int) -> dict:
+    snap = _snapshot(0.126985, 0.000001, levels)
+    book = L2Book("@223")
+    t0 = time.perf_counter()
+    for _ in range(n):
+        book.apply_snapshot(snap)
+    dt = time.perf_counter() - t0
+    return {"snapshots": n, "levels": levels, "snapshots_per_sec": n / dt, "us_per_snapshot": dt / n * 1e6}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--levels", type=int, default=20)
+    a = ap.parse_args()
+    print(json.dumps({"update": bench_updates(a.n, a.levels),
+                      "snapshot": bench_snapshots(max(1, a.n // 20), a.levels)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Sync MakerBot vs asyncio AsyncMakerBot under simulated exchange delay.
+#   PYTHONPATH=src:benchmarks python benchmarks/engine_bench.py --delay-ms 400 --jitter-ms 100 --seconds 20
+import argparse, contextlib, io, json, threading, time
+
+from mm_bot import engine, exchange, info, strategy
+from mm_bot.engine import AsyncMakerBot
+from mm_bot.strategy import MakerBot
+from stub_exchange import StubExchange, bench_settings, percentiles
+
+def _timed(fn, sink):
+    def wrapper(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            return fn(*a, **kw)
+        finally:
+            sink.append((time.perf_counter() - t0) * 1000)
+    return wrapper
+
+def _atimed(fn, sink):
+    async def wrapper(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            return await fn(*a, **kw)
+        finally:
+            sink.append((time.perf_counter() - t0) * 1000)
+    return wrapper
+
+def run_one(kind: str, stub: StubExchange, seconds: float, opm: int, max_inflight: int) -> dict:
+    cfg = bench_settings(stub.base_url, ORDERS_PER_MINUTE=opm, BUY_PER_MIN=opm // 2,
+                         SELL_PER_MIN=opm - opm // 2, MAX_INFLIGHT=max_inflight, MD_INTERVAL_SEC=0.25)
+    info.init_info(cfg)
+    exchange.init_exchange(cfg)
+    asset = info.resolve_asset_fields(cfg)
+
+    lat = []
+    orig_sync, orig_async = strategy.smart_submit, engine.asmart_submit
+    strategy.smart_submit = _timed(orig_sync, lat)
+    engine.asmart_submit = _atimed(orig_async, lat)
+    bot = AsyncMakerBot(cfg, asset) if kind == "async" else MakerBot(cfg, asset)
+    stub.reset()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            th = threading.Thread(target=bot.run, daemon=True)
+            th.start()
+            time.sleep(seconds)
+            bot.stop()
+            th.join(10)
+    finally:
+        strategy.smart_submit, engine.asmart_submit = orig_sync, orig_async
+    return {
+        "engine": kind,
+        "target_orders_per_min": opm,
+        "orders_acked": stub.orders,
+        "orders_per_min": stub.orders * 60.0 / seconds,
+        "submit_latency_ms": percentiles(lat),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delay-ms", type=float, default=400)
+    ap.add_argument("--jitter-ms", type=float, default=100)
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--opm", type=int, default=240, help="ORDERS_PER_MINUTE target")
+    ap.add_argument("--max-inflight", type=int, default=4)
+    a = ap.parse_args()
+    stub = StubExchange(a.delay_ms, a.jitter_ms)
+    out = {"delay_ms": a.delay_ms, "jitter_ms": a.jitter_ms, "seconds": a.seconds,
+           "results": [run_one(k, stub, a.seconds, a.opm, a.max_inflight) for k in ("sync", "async")]}
+    print(json.dumps(out, indent=2))
+
+if __name__ == "__main__":
+    main()
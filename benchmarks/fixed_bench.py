@@ -0,0 +1,40 @@
+# Per-order price/size formatting: Decimal helpers (snap_to_step + fmt_decimal_str) vs mm_bot.fixed.
+#   PYTHONPATH=src python benchmarks/fixed_bench.py [--n 200000]
+import argparse, json, random, time
+from decimal import Decimal
+
+import mm_bot.config  # noqa: F401  (sets the process-wide Decimal precision like the bot)
+from mm_bot.fixed import fixed_step
+from mm_bot.utils import decimals_of, fmt_decimal_str, snap_to_step
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    a = ap.parse_args()
+    tick, lot = Decimal("0.000001"), Decimal("1")
+    rnd = random.Random(3)
+    mids = [Decimal("0.126985") + Decimal(rnd.randint(-500, 500)) * tick for _ in range(1000)]
+    size = Decimal(100)
+
+    t0 = time.perf_counter()
+    for i in range(a.n):
+        px = mids[i % 1000] + tick * Decimal(-3)
+        fmt_decimal_str(snap_to_step(px, tick, "down"), decimals_of(tick))
+        fmt_decimal_str(snap_to_step(size, lot, "down"), decimals_of(lot))
+    legacy = time.perf_counter() - t0
+
+    ft, fl = fixed_step(tick), fixed_step(lot)
+    t0 = time.perf_counter()
+    for i in range(a.n):
+        u = ft.units(mids[i % 1000]) + ft.steps(-3)
+        ft.wire(ft.snap_down(u))
+        fl.snap_wire(size)
+    fixed = time.perf_counter() - t0
+
+    print(json.dumps({"orders": a.n,
+                      "decimal_ns_per_order": legacy / a.n * 1e9,
+                      "fixed_ns_per_order": fixed / a.n * 1e9,
+                      "speedup": legacy / fixed}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Microbenchmark for mm_bot.orders TTL expiry: heap pops vs a full scan of the live orders.
+#   PYTHONPATH=src python benchmarks/orders_bench.py [--live 2000] [--passes 20000]
+import argparse, json, time
+from decimal import Decimal
+
+from mm_bot.clock import VirtualClock
+from mm_bot.info import AssetInfo
+from mm_bot.orders import OrderManager
+from mm_bot.stats import Stats
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+def _resting(oid: int) -> dict:
+    return {"status": "ok", "response": {"type": "order", "data": {"statuses": [{"resting": {"oid": oid}}]}}}
+
+def bench_expiry(live: int, passes: int, ttl: float = 20.0) -> dict:
+    """`live` orders spread over one TTL: cost of a pass with nothing due, then per expired order."""
+    clock = VirtualClock(0.0)
+    om = OrderManager(Stats(), ASSET, clock, ttl=ttl)
+    step = ttl / live
+    for i in range(live):
+        om.on_submit(f"0x{i:032x}", i % 2 == 0, Decimal("0.1"), Decimal(100), _resting(i))
+        clock.now += step
+    clock.now = ttl - step  # nothing due yet
+
+    # The old registry: cloid -> placed_at, scanned in full on every pass.
+    scan = {c: o.placed_at for c, o in om.open.items()}
+    t0 = time.perf_counter()
+    for _ in range(passes):
+        cutoff = clock.now - ttl
+        [c for c, ts in list(scan.items()) if ts < cutoff]
+    dt_scan = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    for _ in range(passes):
+        om.take_expired()
+    dt_heap = time.perf_counter() - t1
+
+    # Drain: every order comes due once, a few per pass.
+    taken, n, t2 = 0, 0, time.perf_counter()
+    while om.next_deadline() is not None:
+        clock.now += step * 4
+        taken += len(om.take_expired())
+        n += 1
+    dt_drain = time.perf_counter() - t2
+    return {"live": live, "passes": passes,
+            "us_per_pass_scan": dt_scan / passes * 1e6, "us_per_pass_heap_idle": dt_heap / passes * 1e6,
+            "us_per_expired_heap": dt_drain / max(1, taken) * 1e6, "drain_passes": n}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--live", type=int, default=2000)
+    ap.add_argument("--passes", type=int, default=20000)
+    a = ap.parse_args()
+    print(json.dumps(bench_expiry(a.live, a.passes), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Signing throughput/latency: inline (current build_and_send path) vs signer.SigningService pools.
+#   PYTHONPATH=src python benchmarks/sign_bench.py --n 400 --workers 4
+import argparse, json, os, time
+from concurrent.futures import wait
+
+from pybotters.helpers import hyperliquid as hlh
+
+from mm_bot.signer import SigningService, sign_payload
+
+def _action(i: int) -> dict:
+    return {"type": "order", "grouping": "na", "orders": [{
+        "a": 10223, "b": bool(i & 1), "p": f"0.12{6000 + i % 1000:04d}", "s": "100", "r": False,
+        "t": {"limit": {"tif": "Alo"}}, "c": "0x" + f"{i:032x}"}]}
+
+def _pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] if s else None
+
+def bench_inline(key: str, n: int) -> dict:
+    lat = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        sign_payload(key, True, _action(i), hlh.get_timestamp_ms())
+        lat.append((time.perf_counter() - t) * 1000)
+    dt = time.perf_counter() - t0
+    return {"mode": "inline", "sigs_per_sec": n / dt, "p50_ms": _pct(lat, 50), "p99_ms": _pct(lat, 99)}
+
+def bench_pool(key: str, n: int, workers: int, kind: str) -> dict:
+    svc = SigningService(key, True, workers=workers, kind=kind)
+    svc.warm_up()
+    lat = []
+    t0 = time.perf_counter()
+    futs = []
+    for i in range(n):
+        sent = time.perf_counter()
+        f = svc.submit(_action(i), hlh.get_timestamp_ms())
+        f.add_done_callback(lambda _f, sent=sent: lat.append((time.perf_counter() - sent) * 1000))
+        futs.append(f)
+    wait(futs)
+    dt = time.perf_counter() - t0
+    svc.shutdown()
+    # latency here is submit->result with all n actions queued at once (burst)
+    return {"mode": f"{kind}x{workers}", "sigs_per_sec": n / dt, "p50_ms": _pct(lat, 50), "p99_ms": _pct(lat, 99)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=400)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    a = ap.parse_args()
+    key = "0x" + os.urandom(32).hex()
+    res = [bench_inline(key, a.n),
+           bench_pool(key, a.n, a.workers, "thread"),
+           bench_pool(key, a.n, a.workers, "process")]
+    print(json.dumps({"n": a.n, "results": res}, indent=2))
+
+if __name__ == "__main__":
+    main()
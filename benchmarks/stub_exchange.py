@@ -0,0 +1,103 @@
+# Local stand-in for the Hyperliquid /info and /exchange endpoints used by the benchmarks.
+# Every /exchange action is acknowledged after delay_ms ± jitter_ms; orders always rest.
+import asyncio, json, os, random, threading, time
+from collections import Counter
+from decimal import Decimal
+
+from aiohttp import web
+
+from mm_bot.config import Settings
+
+class StubExchange:
+    def __init__(self, delay_ms: float = 0.0, jitter_ms: float = 0.0, mid: str = "0.126985",
+                 spot_index: int = 223, seed: int = 7):
+        self.delay_ms = float(delay_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.mid = mid
+        self.spot_index = spot_index
+        self.actions = Counter()   # action type -> count
+        self.orders = 0            # individual order entries acknowledged
+        self._rnd = random.Random(seed)
+        self._oid = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True, name="stub-exchange").start()
+        ready.wait(5)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset(self):
+        self.actions.clear()
+        self.orders = 0
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_post("/info", self._info)
+        app.router.add_post("/exchange", self._exchange)
+        app.router.add_route("HEAD", "/", self._head)
+        runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _head(self, request):
+        return web.Response(status=404)
+
+    async def _info(self, request):
+        body = json.loads(await request.read())
+        t = body.get("type")
+        if t == "allMids":
+            return web.json_response({f"@{self.spot_index}": self.mid})
+        if t == "spotMeta":
+            uni = [{"name": f"@{i}", "index": i, "szDecimals": 0, "pxDecimals": 6} for i in range(self.spot_index + 1)]
+            return web.json_response({"universe": uni, "tokens": []})
+        if t == "spotUserBalances":
+            return web.json_response([])
+        return web.json_response({"error": f"unsupported info type {t}"}, status=400)
+
+    async def _exchange(self, request):
+        body = json.loads(await request.read())
+        action = body.get("action") or {}
+        t = action.get("type")
+        d = self.delay_ms + (self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if d > 0:
+            await asyncio.sleep(d / 1000.0)
+        self.actions[t] += 1
+        if t == "order":
+            sts = []
+            for _ in action.get("orders", []):
+                self._oid += 1
+                sts.append({"resting": {"oid": self._oid}})
+            self.orders += len(sts)
+            return web.json_response({"status": "ok", "response": {"type": "order", "data": {"statuses": sts}}})
+        if t in ("cancel", "cancelByCloid"):
+            sts = ["success"] * len(action.get("cancels", []))
+            return web.json_response({"status": "ok", "response": {"type": "cancel", "data": {"statuses": sts}}})
+        return web.json_response({"status": "ok", "response": {"type": "default"}})
+
+def bench_settings(base_url: str, **overrides) -> Settings:
+    """Settings for local runs: throwaway key, no builder, no auth, no WebSocket, mids from allMids (no l2Book here)."""
+    kw = dict(
+        PRIVATE_KEY="0x" + os.urandom(32).hex(), IS_MAINNET=False, BASE_URL=base_url,
+        SYMBOL="@223", SIZE=Decimal(100), PRICE=None, TIF="Gtc", POST_ONLY=True, RETRIES=5,
+        INCLUDE_BUILDER=False, BUILDER_ADDR="0x0", BUILDER_FEE_TENTH_BPS=0,
+        PX_DEC=6, SZ_DEC=0, TICK_FALLBACK=Decimal("0.000001"), LOTSZ_FALLBACK=Decimal(1),
+        CLIENT_ID=None, ORDERS_PER_MINUTE=240, BUY_PER_MIN=120, SELL_PER_MIN=120, ORDER_TTL_SEC=20,
+        RANGE_LOWER=None, RANGE_UPPER=None, RANGE_PCT=Decimal("0.03"), USER_ADDR=None,
+        AUTH_API_URL=None, AUTH_API_TOKEN=None, PASSWORD=None, START_SIDE="sell",
+        IMBALANCE_SELL_BOOST=1000, WS_ENABLED=False, HTTP_KEEPALIVE_SEC=0, REST_BOOK=False,
+    )
+    kw.update(overrides)
+    return Settings(**kw)
+
+def percentiles(xs, ps=(50, 90, 99)) -> dict:
+    if not xs:
+        return {f"p{p}": None for p in ps}
+    s = sorted(xs)
+    return {f"p{p}": s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] for p in ps}
@@ -0,0 +1,223 @@
+# End-to-end benchmark suite against the local stub exchange (benchmarks/stub_exchange.py).
+#
+#   PYTHONPATH=src:benchmarks python benchmarks/suite.py --delay-ms 150 --jitter-ms 50 --seconds 20 --out bench.json
+#   PYTHONPATH=src:benchmarks python benchmarks/suite.py ... --compare bench_prev.json
+#
+# Scenarios:
+#   submit     sequential exchange.smart_submit calls: ack latency, achievable orders/min
+#   bot_sync   MakerBot (ENGINE=sync): orders/min, loop lag, tick-to-ack
+#   bot_async  AsyncMakerBot (ENGINE=async): same metrics
+#   cpu        MakerBot under cProfile (thread CPU time): CPU per order by signing / decimal / json / rendering / other
+import argparse, contextlib, contextvars, cProfile, io, json, platform, pstats, subprocess, sys, threading, time
+
+from mm_bot import engine, exchange, info, strategy
+from mm_bot.engine import AsyncMakerBot
+from mm_bot.panel import panel_lines
+from mm_bot.strategy import MakerBot
+from stub_exchange import StubExchange, bench_settings, percentiles
+
+SCHEMA = 1
+_tick_ts = contextvars.ContextVar("tick_ts", default=None)
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def _setup(stub: StubExchange, **overrides):
+    cfg = bench_settings(stub.base_url, **overrides)
+    info.init_info(cfg)
+    exchange.init_exchange(cfg)
+    return cfg, info.resolve_asset_fields(cfg)
+
+# ---------- submit ----------
+def bench_submit(stub: StubExchange, n: int) -> dict:
+    cfg, asset = _setup(stub)
+    lat = []
+    mid = info.get_mid_by_index(asset.index)
+    t0 = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        mid = info.get_mid_by_index(asset.index)
+        exchange.smart_submit(cfg, asset, bool(i & 1), mid, cfg.SIZE, cfg.TIF, cfg.POST_ONLY, cfg.RETRIES)
+        lat.append((time.perf_counter() - t) * 1000)
+    dt = time.perf_counter() - t0
+    return {"orders": n, "orders_per_min": n * 60 / dt, "tick_to_ack_ms": percentiles(lat)}
+
+# ---------- bot runs ----------
+class _Probe:
+    """Wraps the per-slot hook (tick) and the submit call (ack) of a bot without changing it."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.first_slot = None
+        self.slots = 0
+        self.lag_ms = []
+        self.ack_ms = []
+
+    def on_tick(self):
+        now = time.perf_counter()
+        if self.first_slot is None:
+            self.first_slot = now
+        else:
+            self.lag_ms.append(max(0.0, (now - (self.first_slot + self.slots * self.interval)) * 1000))
+        self.slots += 1
+        _tick_ts.set(now)
+
+    def on_ack(self):
+        t = _tick_ts.get()
+        if t is not None:
+            self.ack_ms.append((time.perf_counter() - t) * 1000)
+
+def bench_bot(stub: StubExchange, kind: str, seconds: float, opm: int) -> dict:
+    cfg, asset = _setup(stub, ORDERS_PER_MINUTE=opm, BUY_PER_MIN=opm // 2, SELL_PER_MIN=opm - opm // 2,
+                        MD_INTERVAL_SEC=0.25)
+    probe = _Probe(60.0 / opm)
+    orig = (MakerBot.compute_band, AsyncMakerBot._fresh_mid, strategy.smart_submit, engine.asmart_submit)
+
+    def compute_band(self):
+        probe.on_tick()
+        return orig[0](self)
+
+    def fresh_mid(self):
+        probe.on_tick()
+        return orig[1](self)
+
+    def smart_submit(*a, **kw):
+        try:
+            return orig[2](*a, **kw)
+        finally:
+            probe.on_ack()
+
+    async def asmart_submit(*a, **kw):
+        try:
+            return await orig[3](*a, **kw)
+        finally:
+            probe.on_ack()
+
+    MakerBot.compute_band, AsyncMakerBot._fresh_mid = compute_band, fresh_mid
+    strategy.smart_submit, engine.asmart_submit = smart_submit, asmart_submit
+    bot = AsyncMakerBot(cfg, asset) if kind == "async" else MakerBot(cfg, asset)
+    stub.reset()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            th = threading.Thread(target=bot.run, daemon=True)
+            th.start()
+            time.sleep(seconds)
+            bot.stop()
+            th.join(10)
+    finally:
+        MakerBot.compute_band, AsyncMakerBot._fresh_mid, strategy.smart_submit, engine.asmart_submit = orig
+    lag = probe.lag_ms
+    return {
+        "engine": kind,
+        "target_orders_per_min": opm,
+        "orders_acked": stub.orders,
+        "orders_per_min": stub.orders * 60 / seconds,
+        "loop_lag_ms": {**percentiles(lag), "max": max(lag) if lag else None},
+        "tick_to_ack_ms": percentiles(probe.ack_ms),
+    }
+
+# ---------- CPU split ----------
+_BUCKETS = (
+    ("signing", ("pybotters", "ecdsa", "keccak", "msgpack", "signer.py")),
+    ("json", ("json",)),
+    ("decimal", ("decimal", "fixed.py", "utils.py")),
+    ("rendering", ("panel.py",)),
+)
+
+def _bucket(key) -> str:
+    filename, _line, func = key
+    s = f"{filename}:{func}"
+    for name, needles in _BUCKETS:
+        if any(n in s for n in needles):
+            return name
+    return "other"
+
+def bench_cpu(stub: StubExchange, seconds: float, opm: int) -> dict:
+    cfg, asset = _setup(stub, ORDERS_PER_MINUTE=opm, BUY_PER_MIN=opm // 2, SELL_PER_MIN=opm - opm // 2)
+    bot = MakerBot(cfg, asset)
+    stub.reset()
+    timer = threading.Timer(seconds, bot.stop)
+    prof = cProfile.Profile(time.thread_time)
+    timer.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        prof.runcall(bot.run)  # main thread only: stub server threads are not counted
+    orders = max(1, stub.orders)
+
+    split = {name: 0.0 for name, _ in _BUCKETS}
+    split["other"] = 0.0
+    for key, (_cc, _nc, tt, _ct, _callers) in pstats.Stats(prof).stats.items():
+        split[_bucket(key)] += tt
+
+    # The panel runs on its own thread (and is off without a TTY), so cost it explicitly per frame.
+    snap = bot.stats.snapshot()
+    t0 = time.thread_time()
+    for _ in range(200):
+        panel_lines(cfg, asset, snap, 100)
+    frame_s = (time.thread_time() - t0) / 200
+    split["rendering"] += frame_s * cfg.PANEL_FPS * seconds
+
+    per_order = {k: v / orders * 1000 for k, v in split.items()}
+    return {"orders": stub.orders, "cpu_ms_per_order": per_order,
+            "cpu_ms_per_order_total": sum(per_order.values()), "panel_frame_ms": frame_s * 1000}
+
+# ---------- compare ----------
+def _flatten(d, prefix=""):
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            yield from _flatten(v, key + ".")
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield key, v
+
+def compare(cur: dict, prev: dict) -> dict:
+    a, b = dict(_flatten(cur["scenarios"])), dict(_flatten(prev["scenarios"]))
+    return {k: {"prev": b[k], "cur": a[k], "change_pct": ((a[k] - b[k]) / b[k] * 100) if b[k] else None}
+            for k in sorted(a.keys() & b.keys())}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--delay-ms", type=float, default=150)
+    ap.add_argument("--jitter-ms", type=float, default=50)
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--opm", type=int, default=120, help="ORDERS_PER_MINUTE target for bot scenarios")
+    ap.add_argument("--submit-n", type=int, default=30)
+    ap.add_argument("--only", default="submit,bot_sync,bot_async,cpu")
+    ap.add_argument("--out", help="write JSON results here (default: stdout)")
+    ap.add_argument("--compare", help="previous results JSON to diff against")
+    a = ap.parse_args()
+
+    stub = StubExchange(a.delay_ms, a.jitter_ms)
+    only = set(a.only.split(","))
+    scen = {}
+    if "submit" in only:
+        scen["submit"] = bench_submit(stub, a.submit_n)
+    if "bot_sync" in only:
+        scen["bot_sync"] = bench_bot(stub, "sync", a.seconds, a.opm)
+    if "bot_async" in only:
+        scen["bot_async"] = bench_bot(stub, "async", a.seconds, a.opm)
+    if "cpu" in only:
+        scen["cpu"] = bench_cpu(stub, a.seconds, a.opm)
+
+    out = {
+        "schema": SCHEMA,
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "ts": int(time.time()),
+        "params": {"delay_ms": a.delay_ms, "jitter_ms": a.jitter_ms, "seconds": a.seconds, "opm": a.opm},
+        "scenarios": scen,
+    }
+    if a.compare:
+        with open(a.compare) as f:
+            out["compare"] = compare(out, json.load(f))
+    text = json.dumps(out, indent=2)
+    if a.out:
+        with open(a.out, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
+import asyncio
 import os
 import threading
 import signal
 import time
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 import uvicorn
 import random
 
+from mm_bot import metrics, profiling
 from mm_bot.main import run_bot
 
 app = FastAPI(title="Based Tradebot", version="1.0.0")
@@ -13,6 +16,7 @@ app = FastAPI(title="Based Tradebot", version="1.0.0")
 _shutdown = threading.Event()
 _bot_started = threading.Event()
 _last_crash = None
+_restarts = metrics.counter("mm_bot_restarts_total", "run_bot restarts by the server wrapper, by cause", ("cause",))
 
 @app.get("/health")
 def health():
@@ -22,6 +26,30 @@ def health():
 def root():
     return {"service": "based-tradebot", "message": "running", "ts": int(time.time())}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/spans")
+def debug_spans(enable: bool | None = None):
+    """?enable=1 / ?enable=0 switches span timing; always returns the per-span summary."""
+    if enable is not None:
+        profiling.enable_spans(enable)
+    return {"enabled": profiling.spans_enabled(), "spans": profiling.span_summary()}
+
+PROFILE_MAX_SEC = 60
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(seconds: float = 10, interval_ms: float = 5):
+    """Collapsed stacks of every thread for `seconds` (<= 60; feed to flamegraph.pl / speedscope)."""
+    try:
+        # sampled on a worker thread: the event loop keeps serving /health and /metrics meanwhile
+        text = await asyncio.to_thread(profiling.sample_stacks, min(max(seconds, 0.1), PROFILE_MAX_SEC),
+                                       max(interval_ms, 1) / 1000)
+    except RuntimeError as e:
+        return PlainTextResponse(str(e), status_code=409)
+    return PlainTextResponse(text, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
 
 def _bot_wrapper():
     _bot_started.set()
@@ -31,14 +59,17 @@ def _bot_wrapper():
         try:
             run_bot()
         except SystemExit as e:
+            _restarts.inc("system_exit")
             backoff = min(cap, base) + random.uniform(0, 1.5)
             print(f"[bot] SystemExit: {e}. restart in {backoff:.1f}s", flush=True)
             time.sleep(backoff)
         except Exception as e:
+            _restarts.inc("crash")
             backoff = min(cap, base) + random.uniform(0, 1.5)
             print(f"[bot] crashed: {e}. restart in {backoff:.1f}s", flush=True)
             time.sleep(backoff)
         else:
+            _restarts.inc("clean_exit")
             backoff = min(cap, base) + random.uniform(0, 1.5)
             print(f"[bot] exited cleanly. restarting in {backoff:.1f}s", flush=True)
             time.sleep(backoff)
@@ -1 +1 @@
-__all__ = ["config", "auth", "utils", "info", "exchange", "stats", "panel", "strategy"]
\ No newline at end of file
+__all__ = ["config", "transport", "auth", "utils", "clock", "fixed", "book", "info", "feed", "nonce", "signer", "exchange", "stats", "panel", "strategy", "engine", "recorder", "sim", "backtest", "fleet", "registry", "metrics", "profiling", "orders", "sched"]
\ No newline at end of file
@@ -1,5 +1,5 @@
-import json, requests
 from .config import Settings
+from . import transport
 
 def verify_or_exit(cfg: Settings):
     if not cfg.AUTH_API_URL:
@@ -13,12 +13,7 @@ def verify_or_exit(cfg: Settings):
         payload["token"] = cfg.AUTH_API_TOKEN
 
     try:
-        r = requests.post(
-            cfg.AUTH_API_URL,
-            headers={"Content-Type": "application/json"},
-            data=json.dumps(payload),
-            timeout=12,
-        )
+        r = transport.post(cfg.AUTH_API_URL, payload, timeout=12)
     except Exception as e:
         raise SystemExit(f"Auth API request failed: {repr(e)}")
 
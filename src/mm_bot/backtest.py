@@ -0,0 +1,271 @@
+# backtest.py
+"""
+Replay recorded market data through MakerBot on a virtual clock (a day runs in seconds):
+
+    python -m mm_bot.backtest --data mids.csv --range-pct 0.03 --ttl 20 --offset-ticks 3
+
+Input is CSV (with a header) or JSON lines: `ts` (seconds or ms) plus either `mid` or
+`bid`/`ask`, optionally `bid_sz`/`ask_sz`, or a recorder.Recorder directory (RECORD_DIR; its
+BBO rows are used once any exist, mid-only rows otherwise). Orders go to an in-process sim.SimExchange (no
+signing, no HTTP) whose top of book is driven by the recording:
+
+- a best level that moves away is withdrawn; resting bot orders the market trades through fill;
+- a best level that shrinks is traded FIFO (--queue fifo), so the bot fills once the size that
+  was ahead of it is gone, or withdrawn from the back of the queue (--queue back: fills only on
+  trade-through); a level that grows is joined behind the bot's orders.
+
+Without recorded sizes, every best level shows --house-sz and fills come only from trade-throughs.
+"""
+import argparse, csv, dataclasses, json, os, time
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional
+
+from . import exchange, info
+from .clock import VirtualClock
+from .config import Settings, load_settings
+from .info import parse_index
+from .recorder import iter_rows
+from .sim import HOUSE, SimExchange, SimMarket
+from .strategy import MakerBot
+
+@dataclass(frozen=True)
+class Tick:
+    ts: float
+    mid: Optional[Decimal] = None
+    bid: Optional[Decimal] = None
+    ask: Optional[Decimal] = None
+    bid_sz: Optional[Decimal] = None
+    ask_sz: Optional[Decimal] = None
+
+def _dec(v) -> Optional[Decimal]:
+    return None if v in (None, "") else Decimal(str(v))
+
+def tick_from_row(row: Dict) -> Tick:
+    ts = float(row["ts"])
+    if ts > 1e11:  # epoch ms
+        ts /= 1000.0
+    t = Tick(ts, _dec(row.get("mid")), _dec(row.get("bid")), _dec(row.get("ask")),
+             _dec(row.get("bid_sz")), _dec(row.get("ask_sz")))
+    if t.mid is None and (t.bid is None or t.ask is None):
+        raise ValueError(f"row needs mid or bid/ask: {row}")
+    return t
+
+def load_ticks(path: str, idx: Optional[int] = None) -> Iterator[Tick]:
+    if os.path.isdir(path):
+        seen_bbo = False
+        for row in iter_rows(path, idx=idx):
+            has_bbo = row["bid"] is not None and row["ask"] is not None
+            seen_bbo = seen_bbo or has_bbo
+            if has_bbo or (row["mid"] is not None and not seen_bbo):
+                yield tick_from_row(row)
+        return
+    with open(path, newline="") as f:
+        if path.endswith((".jsonl", ".json", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield tick_from_row(json.loads(line))
+        else:
+            for row in csv.DictReader(f):
+                yield tick_from_row(row)
+
+class ReplayMarket:
+    """Applies recorded top-of-book to one SimMarket (see the module docstring for the fill model)."""
+
+    def __init__(self, sim: SimExchange, market: SimMarket, queue: str = "fifo", default_sz: Decimal = Decimal(2000)):
+        self.sim = sim
+        self.m = market
+        self.queue = queue
+        self.default_sz = market.sz.units(default_sz)
+        self.top: Dict[bool, Optional[int]] = {True: None, False: None}
+
+    def _house(self, is_buy: bool, px: int):
+        return [o for o in self.m.book.queue(is_buy, px) if o.owner == HOUSE]
+
+    def _levels(self, t: Tick):
+        px, step = self.m.px, self.m.px.step_units
+        if t.bid is not None and t.ask is not None:
+            bid, ask = px.snap_down(px.units(t.bid)), px.snap_up(px.units(t.ask, up=True))
+        else:
+            u = px.units(t.mid)
+            bid, ask = px.snap_up(u) - step, px.snap_down(u) + step
+        if ask <= bid:
+            ask = bid + step
+        bsz = self.m.sz.units(t.bid_sz) if t.bid_sz is not None else self.default_sz
+        asz = self.m.sz.units(t.ask_sz) if t.ask_sz is not None else self.default_sz
+        return bid, ask, bsz, asz
+
+    def _shrink_back(self, is_buy: bool, px: int, d: int):
+        for o in reversed(self._house(is_buy, px)):
+            cut = min(o.sz, d)
+            o.sz -= cut
+            d -= cut
+            if o.sz == 0:
+                self.m.book.remove(o)
+            if d == 0:
+                break
+        self.m.book.version += 1
+
+    def apply(self, t: Tick):
+        m, book = self.m, self.m.book
+        bid, ask, bsz, asz = self._levels(t)
+        for is_buy, px in ((True, bid), (False, ask)):
+            old = self.top[is_buy]
+            if old is not None and old != px:
+                for o in self._house(is_buy, old):
+                    book.remove(o)
+                self.top[is_buy] = None
+        # Resting bot orders at or through the new opposite best were traded.
+        if book.crosses(False, ask):
+            self.sim.take(m, False, ask, 1 << 62)
+        if book.crosses(True, bid):
+            self.sim.take(m, True, bid, 1 << 62)
+        for is_buy, px, sz in ((True, bid, bsz), (False, ask, asz)):
+            have = sum(o.sz for o in self._house(is_buy, px))
+            if sz < have:
+                if self.queue == "fifo":
+                    self.sim.take(m, not is_buy, px, have - sz)
+                else:
+                    self._shrink_back(is_buy, px, have - sz)
+            elif sz > have:
+                self.sim.rest(m, is_buy, px, sz - have)
+            self.top[is_buy] = px
+
+class Backtest:
+    def __init__(self, cfg: Settings, ticks: Iterable[Tick], queue: str = "fifo", latency_ms: float = 0.0,
+                 house_sz: Decimal = Decimal(2000), min_notional: Decimal = Decimal(10),
+                 base_balance: Decimal = Decimal(0), quote_balance: Decimal = Decimal(100000)):
+        self.cfg = dataclasses.replace(cfg, PANEL_FPS=0, WS_ENABLED=False, SIGNER_WORKERS=0, ENGINE="sync",
+                                       USER_ADDR=cfg.USER_ADDR or "0x" + "0" * 40)
+        self.ticks = iter(ticks)
+        self.queue = queue
+        self.latency = latency_ms / 1000.0
+        self.house_sz = house_sz
+        self.min_notional = min_notional
+        self.base0, self.quote0 = base_balance, quote_balance
+        self.n_ticks = 0
+        self.max_long = self.max_short = Decimal(0)
+        self._nonce = 0
+
+    def _advance(self, now: float):
+        while self._next is not None and self._next.ts <= now:
+            self.replay.apply(self._next)
+            self.n_ticks += 1
+            self.last_ts = self._next.ts
+            self._next = next(self.ticks, None)
+        if self._next is None:
+            self.bot.stop()
+        inv = self.sim.balances.get(self.market.base, Decimal(0)) - self.base0
+        self.max_long, self.max_short = max(self.max_long, inv), min(self.max_short, inv)
+
+    def _venue(self, action: Dict) -> Dict:
+        if self.latency:
+            self.clock.sleep(self.latency)  # the market keeps moving while the request is in flight
+        self._nonce += 1
+        return self.sim.handle_action({"action": action, "nonce": self._nonce})
+
+    def run(self) -> Dict:
+        first = next(self.ticks, None)
+        if first is None:
+            raise ValueError("no market data to replay")
+        cfg = self.cfg
+        idx = parse_index(cfg.SYMBOL)
+        idx = 0 if idx is None else idx
+        self.clock = VirtualClock(first.ts, on_advance=self._advance)
+        self.market = SimMarket(idx, "REPLAY/USDC", cfg.TICK_FALLBACK, cfg.LOTSZ_FALLBACK,
+                                first.mid if first.mid is not None else (first.bid + first.ask) / 2,
+                                px_dec=cfg.PX_DEC, sz_dec=cfg.SZ_DEC)
+        self.sim = SimExchange([self.market], depth=0, taker_rate=0.0, vol_ticks=0.0,
+                               min_notional=self.min_notional, clock=self.clock,
+                               balances={self.market.base: self.base0, self.market.quote: self.quote0})
+        self.sim.fills = deque()  # keep every fill for the report
+        self.replay = ReplayMarket(self.sim, self.market, self.queue, self.house_sz)
+        self.replay.apply(first)
+        self.n_ticks, self.first_ts, self.last_ts = 1, first.ts, first.ts
+        self._next = next(self.ticks, None)
+
+        info.attach_venue(self.sim.handle_info)
+        exchange.attach_venue(self._venue)
+        t0 = time.perf_counter()
+        try:
+            asset = info.resolve_asset_fields(cfg)
+            self.bot = MakerBot(cfg, asset, clock=self.clock)
+            if self._next is not None:
+                self.bot.run()
+        finally:
+            info.attach_venue(None)
+            exchange.attach_venue(None)
+        return self.report(time.perf_counter() - t0)
+
+    def report(self, wall: float) -> Dict:
+        st, m = self.bot.stats, self.market
+        buys = [f for f in self.sim.fills if f["side"] == "B"]
+        sells = [f for f in self.sim.fills if f["side"] == "A"]
+        vol = lambda fs: sum(Decimal(f["sz"]) for f in fs)
+        notional = sum(Decimal(f["px"]) * Decimal(f["sz"]) for f in self.sim.fills)
+        base = self.sim.balances.get(m.base, Decimal(0)) - self.base0
+        quote = self.sim.balances.get(m.quote, Decimal(0)) - self.quote0
+        mid = Decimal(m.mid_str())
+        span = self.last_ts - self.first_ts
+        return {
+            "span_sec": span,
+            "ticks": self.n_ticks,
+            "wall_sec": round(wall, 3),
+            "speedup": round(span / wall, 1) if wall > 0 else None,
+            "orders": st.total_buy + st.total_sell,
+            "actions": self.sim.counters["actions"],
+            "modifies": self.sim.counters["modifies"],
+            "rejects": self.sim.counters["rejects"],
+            "cancels": st.cancels,
+            "range_trips": st.range_trips,
+            "closes": st.closes,
+            "fills": {"count": len(self.sim.fills), "buys": len(buys), "sells": len(sells),
+                      "maker": sum(1 for f in self.sim.fills if not f["crossed"])},
+            "volume": {"base_buy": str(vol(buys)), "base_sell": str(vol(sells)), "quote": str(notional)},
+            "inventory": {"final": str(base), "max_long": str(self.max_long), "max_short": str(self.max_short)},
+            "pnl_quote": str(quote + base * mid),
+            "params": {"RANGE_PCT": str(self.cfg.RANGE_PCT), "ORDER_TTL_SEC": self.cfg.ORDER_TTL_SEC,
+                       "QUOTE_OFFSET_TICKS": self.cfg.QUOTE_OFFSET_TICKS,
+                       "ORDERS_PER_MINUTE": self.cfg.ORDERS_PER_MINUTE, "REQUOTE": self.cfg.REQUOTE, "queue": self.queue,
+                       "latency_ms": self.latency * 1000},
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded mids/BBOs through MakerBot")
+    ap.add_argument("--data", required=True, help="CSV or JSON lines (ts, mid | bid, ask[, bid_sz, ask_sz]) or a RECORD_DIR")
+    ap.add_argument("--queue", choices=("fifo", "back"), default="fifo")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--house-sz", default="2000", help="displayed size when the data has none")
+    ap.add_argument("--min-notional", default="10")
+    ap.add_argument("--base-balance", default="0")
+    ap.add_argument("--quote-balance", default="100000")
+    ap.add_argument("--range-pct", help="override RANGE_PCT")
+    ap.add_argument("--ttl", type=int, help="override ORDER_TTL_SEC")
+    ap.add_argument("--offset-ticks", type=int, help="override QUOTE_OFFSET_TICKS")
+    ap.add_argument("--opm", type=int, help="override ORDERS_PER_MINUTE (split evenly between sides)")
+    ap.add_argument("--requote", choices=("on", "off"), help="override REQUOTE")
+    a = ap.parse_args()
+
+    os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)  # never used: nothing is signed in a replay
+    cfg = load_settings()
+    over = {}
+    if a.range_pct is not None:
+        over.update(RANGE_PCT=Decimal(a.range_pct), RANGE_LOWER=None, RANGE_UPPER=None)
+    if a.ttl is not None:
+        over["ORDER_TTL_SEC"] = a.ttl
+    if a.offset_ticks is not None:
+        over["QUOTE_OFFSET_TICKS"] = a.offset_ticks
+    if a.opm is not None:
+        over.update(ORDERS_PER_MINUTE=a.opm, BUY_PER_MIN=a.opm // 2, SELL_PER_MIN=a.opm - a.opm // 2)
+    if a.requote is not None:
+        over["REQUOTE"] = a.requote == "on"
+    cfg = dataclasses.replace(cfg, **over)
+
+    bt = Backtest(cfg, load_ticks(a.data, parse_index(cfg.SYMBOL)), queue=a.queue, latency_ms=a.latency_ms, house_sz=Decimal(a.house_sz),
+                  min_notional=Decimal(a.min_notional), base_balance=Decimal(a.base_balance),
+                  quote_balance=Decimal(a.quote_balance))
+    print(json.dumps(bt.run(), indent=2))
+
+if __name__ == "__main__":
+    main()
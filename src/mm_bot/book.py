@@ -0,0 +1,151 @@
+# book.py
+import time
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+Level = Tuple[float, float]  # (px, sz)
+
+def px_to_decimal(x: float) -> Decimal:
+    """Float book price -> Decimal via shortest repr (0.126985, not 0.12698499999...)."""
+    return Decimal(repr(x))
+
+class _Side:
+    """
+    Price levels in two parallel array('d') columns sorted ascending by key, best level last.
+    Bids use key=px, asks key=-px, so both sides share the same code and best is [-1].
+    The columns are published together as one (keys, szs) tuple: the feed thread builds new ones
+    and swaps the reference, so a reader on another thread always sees a consistent pair.
+    """
+    __slots__ = ("sign", "cols")
+
+    def __init__(self, is_bid: bool):
+        self.sign = 1.0 if is_bid else -1.0
+        self.cols = (array("d"), array("d"))
+
+    def clear(self):
+        self.cols = (array("d"), array("d"))
+
+    def load(self, levels: List[Level]):
+        """levels in exchange order (best first)."""
+        s = self.sign
+        self.cols = (array("d", [s * px for px, _ in reversed(levels)]),
+                     array("d", [sz for _, sz in reversed(levels)]))
+
+    def update(self, px: float, sz: float):
+        k = self.sign * px
+        keys, szs = self.cols
+        i = bisect_left(keys, k)
+        hit = i < len(keys) and keys[i] == k
+        if sz <= 0 and not hit:
+            return
+        keys, szs = array("d", keys), array("d", szs)  # copy-on-write (a few dozen levels)
+        if sz <= 0:
+            del keys[i]
+            del szs[i]
+        elif hit:
+            szs[i] = sz
+        else:
+            keys.insert(i, k)
+            szs.insert(i, sz)
+        self.cols = (keys, szs)
+
+    def level(self, n: int) -> Optional[Level]:
+        keys, szs = self.cols
+        if n >= len(keys):
+            return None
+        j = -1 - n
+        return self.sign * keys[j], szs[j]
+
+    def depth(self, n: int) -> float:
+        """Total size over the best n levels."""
+        return sum(self.cols[1][-n:]) if n > 0 else 0.0
+
+    def __len__(self):
+        return len(self.cols[0])
+
+class L2Book:
+    """In-process L2 book for one coin; fed by l2Book snapshots and/or per-level updates."""
+
+    __slots__ = ("coin", "bids", "asks", "ts", "exch_time", "updates")
+
+    def __init__(self, coin: str):
+        self.coin = coin
+        self.bids = _Side(True)
+        self.asks = _Side(False)
+        self.ts = 0.0          # monotonic time of last change
+        self.exch_time = 0     # exchange timestamp (ms) of last snapshot
+        self.updates = 0
+
+    # ---------- Writers ----------
+    def apply_snapshot(self, levels, exch_time: int = 0):
+        """levels = [bids, asks] as in the l2Book channel: [{"px","sz","n"}, ...] best first."""
+        bids, asks = (levels or [[], []])[:2]
+        self.bids.load([(float(l["px"]), float(l["sz"])) for l in bids])
+        self.asks.load([(float(l["px"]), float(l["sz"])) for l in asks])
+        self.exch_time = int(exch_time or 0)
+        self.ts = time.monotonic()
+        self.updates += 1
+
+    def apply_update(self, is_bid: bool, px: float, sz: float):
+        """Set one level (sz <= 0 removes it)."""
+        (self.bids if is_bid else self.asks).update(float(px), float(sz))
+        self.ts = time.monotonic()
+        self.updates += 1
+
+    def on_l2book(self, data: Dict):
+        """Listener for feed.MarketFeed's l2Book channel."""
+        if data and data.get("coin") == self.coin:
+            self.apply_snapshot(data.get("levels"), data.get("time") or 0)
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.ts = time.monotonic()
+
+    # ---------- Readers (O(1) except depth_sum) ----------
+    def best_bid(self) -> Optional[Level]:
+        return self.bids.level(0)
+
+    def best_ask(self) -> Optional[Level]:
+        return self.asks.level(0)
+
+    def level(self, is_bid: bool, n: int) -> Optional[Level]:
+        """n-th level from the top (0 = best)."""
+        return (self.bids if is_bid else self.asks).level(n)
+
+    def depth_sum(self, is_bid: bool, n: int) -> float:
+        return (self.bids if is_bid else self.asks).depth(n)
+
+    def mid(self) -> Optional[float]:
+        b, a = self.bids.level(0), self.asks.level(0)
+        if b is None or a is None:
+            return None
+        return (b[0] + a[0]) / 2
+
+    def mid_decimal(self) -> Optional[Decimal]:
+        """Exact mid for pricing: the float mid of 0.126983 and 0.126985 is 0.12698399999999999."""
+        b, a = self.bids.level(0), self.asks.level(0)
+        if b is None or a is None:
+            return None
+        return (px_to_decimal(b[0]) + px_to_decimal(a[0])) / 2
+
+    def spread(self) -> Optional[float]:
+        b, a = self.bids.level(0), self.asks.level(0)
+        if b is None or a is None:
+            return None
+        return a[0] - b[0]
+
+    def microprice(self) -> Optional[float]:
+        """Size-weighted mid: leans toward the side with less resting size."""
+        b, a = self.bids.level(0), self.asks.level(0)
+        if b is None or a is None:
+            return None
+        tot = b[1] + a[1]
+        if tot <= 0:
+            return (b[0] + a[0]) / 2
+        return (b[0] * a[1] + a[0] * b[1]) / tot
+
+    def is_empty(self) -> bool:
+        return not len(self.bids) and not len(self.asks)
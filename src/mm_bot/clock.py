@@ -0,0 +1,40 @@
+# clock.py
+import time
+from typing import Callable, Optional
+
+class Clock:
+    """Wall clock: what MakerBot uses for order ages and timestamps; monotonic() drives its schedule."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, sec: float):
+        if sec > 0:
+            time.sleep(sec)
+
+class VirtualClock(Clock):
+    """
+    Replay clock: sleep() jumps time forward instead of blocking. on_advance(t) runs after
+    every jump so a replay can apply the market data recorded up to the new time.
+    """
+
+    def __init__(self, start: float, on_advance: Optional[Callable[[float], None]] = None):
+        self.now = float(start)
+        self.on_advance = on_advance
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, sec: float):
+        if sec > 0:
+            self.now += sec
+        if self.on_advance is not None:
+            self.on_advance(self.now)
+
+WALL_CLOCK = Clock()
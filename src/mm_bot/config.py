@@ -1,5 +1,5 @@
-import os
-from dataclasses import dataclass
+import os, re
+from dataclasses import dataclass, replace
 from decimal import Decimal, getcontext
 from dotenv import load_dotenv
 
@@ -47,6 +47,54 @@ class Settings:
     # Bias / side control
     START_SIDE: str # "sell" | "buy"
     IMBALANCE_SELL_BOOST: int
+    # Batch both sides into one signed order action
+    PAIR_QUOTES: bool = False
+    # Max cancels per signed cancel action
+    CANCEL_BATCH_SIZE: int = 50
+    # Execution engine: "sync" (MakerBot loop) | "async" (engine.AsyncMakerBot)
+    ENGINE: str = "sync"
+    MAX_INFLIGHT: int = 4
+    MD_INTERVAL_SEC: float = 0.5
+    # Off-thread signing: 0 = inline on the trading thread
+    SIGNER_WORKERS: int = 0
+    SIGNER_KIND: str = "process"
+    # Shared nonce counter file (None -> per-wallet file in the temp dir)
+    NONCE_FILE: str | None = None
+    # Terminal panel frames per second (0 = off; always off when stdout is not a TTY)
+    PANEL_FPS: float = 4.0
+    # HTTP transport
+    HTTP_POOL_SIZE: int = 8
+    HTTP_KEEPALIVE_SEC: float = 20.0
+    # WebSocket market data
+    WS_ENABLED: bool = True
+    WS_URL: str | None = None
+    WS_STALE_SEC: float = 10.0
+    # Quote distance from mid, in ticks
+    QUOTE_OFFSET_TICKS: int = 3
+    # Market-data recorder (None = off); spot indices to record (empty = the traded one)
+    RECORD_DIR: str | None = None
+    RECORD_INDICES: tuple[int, ...] = ()
+    # Multi-symbol: quote every symbol in SYMBOLS from this process (empty = SYMBOL only)
+    SYMBOLS: tuple[str, ...] = ()
+    MIDS_CACHE_SEC: float = 0.0     # allMids fetched at most once per window, shared by all pairs
+    BATCH_WINDOW_MS: float = 5.0    # coalesce orders/cancels from different pairs (0 = off)
+    # spotMeta cache: restarts within the TTL resolve assets without a network call
+    ASSET_CACHE_FILE: str | None = None
+    ASSET_CACHE_TTL_SEC: float = 3600.0
+    # Hot-path span timing at startup (mm_span_seconds); also switchable at runtime via /debug/spans
+    SPANS_ENABLED: bool = False
+    # Order state: REST reconcile (openOrders + userFillsByTime) while the WS user stream is down (0 = off)
+    ORDER_SYNC_SEC: float = 5.0
+    # Quote slots the loop missed while busy: skip | coalesce (one late order) | catchup (burst)
+    QUOTE_MISSED_SLOTS: str = "coalesce"
+    # Pre-submit post-only clamp: trust a REST / reject BBO this long (0 = off); without a feed, mids come from l2Book
+    BBO_MAX_AGE_SEC: float = 2.0
+    REST_BOOK: bool = False
+    # Tick/lot sizes learned from rejects, kept on disk for this long (None file -> per-host file in the temp dir; 0 = off)
+    STEPS_FILE: str | None = None
+    STEPS_TTL_SEC: float = 86400.0
+    # Keep one standing bid and ask and move them with batchModify (cancel+place only when a modify fails)
+    REQUOTE: bool = False
 
 def _to_bool(v: str | None, default: bool) -> bool:
     if v is None: return default
@@ -114,6 +162,54 @@ def load_settings() -> Settings:
         start_side = "sell"
     imbalance_sell_boost = int(os.getenv("IMBALANCE_SELL_BOOST") or 2)
 
+    pair_quotes = _to_bool(os.getenv("PAIR_QUOTES"), False)
+    cancel_batch_size = int(os.getenv("CANCEL_BATCH_SIZE") or 50)
+
+    engine = (os.getenv("ENGINE") or "sync").strip().lower()
+    if engine not in ("sync", "async"):
+        engine = "sync"
+    max_inflight    = int(os.getenv("MAX_INFLIGHT") or 4)
+    md_interval_sec = float(os.getenv("MD_INTERVAL_SEC") or 0.5)
+
+    signer_workers = int(os.getenv("SIGNER_WORKERS") or 0)
+    signer_kind    = (os.getenv("SIGNER_KIND") or "process").strip().lower()
+
+    nonce_file = os.getenv("NONCE_FILE") or None
+
+    panel_fps = float(os.getenv("PANEL_FPS") or 4)
+
+    http_pool_size     = int(os.getenv("HTTP_POOL_SIZE") or 8)
+    http_keepalive_sec = float(os.getenv("HTTP_KEEPALIVE_SEC") or 20)
+
+    ws_enabled   = _to_bool(os.getenv("WS_ENABLED"), True)
+    ws_url       = os.getenv("WS_URL") or None
+    ws_stale_sec = float(os.getenv("WS_STALE_SEC") or 10)
+
+    quote_offset_ticks = int(os.getenv("QUOTE_OFFSET_TICKS") or 3)
+
+    record_dir = os.getenv("RECORD_DIR") or None
+    try:
+        record_indices = tuple(int(x.strip().lstrip("@")) for x in (os.getenv("RECORD_INDICES") or "").split(",") if x.strip())
+    except ValueError:
+        raise SystemExit("RECORD_INDICES must be comma-separated spot indices, e.g. 223,107")
+
+    symbols = tuple(s.strip().upper() for s in (os.getenv("SYMBOLS") or "").split(",") if s.strip())
+    mids_cache_sec  = float(os.getenv("MIDS_CACHE_SEC") or (0.25 if len(symbols) > 1 else 0))
+    batch_window_ms = float(os.getenv("BATCH_WINDOW_MS") or 5)
+
+    asset_cache_file    = os.getenv("ASSET_CACHE_FILE") or None
+    asset_cache_ttl_sec = float(os.getenv("ASSET_CACHE_TTL_SEC") or 3600)
+    spans_enabled       = _to_bool(os.getenv("SPANS_ENABLED"), False)
+    order_sync_sec      = float(os.getenv("ORDER_SYNC_SEC") or 5)
+    quote_missed_slots  = (os.getenv("QUOTE_MISSED_SLOTS") or "coalesce").strip().lower()
+    if quote_missed_slots not in ("skip", "coalesce", "catchup"):
+        raise SystemExit("QUOTE_MISSED_SLOTS must be skip, coalesce or catchup")
+    bbo_max_age_sec     = float(os.getenv("BBO_MAX_AGE_SEC") or 2)
+    rest_book           = _to_bool(os.getenv("REST_BOOK"), False)
+    steps_file          = os.getenv("STEPS_FILE") or None
+    steps_ttl_sec       = float(os.getenv("STEPS_TTL_SEC") or 86400)
+    requote             = _to_bool(os.getenv("REQUOTE"), False)
+
     return Settings(
         PRIVATE_KEY=private_key,
         IS_MAINNET=is_mainnet,
@@ -145,4 +241,76 @@ def load_settings() -> Settings:
         PASSWORD=password,
         START_SIDE=start_side,
         IMBALANCE_SELL_BOOST=imbalance_sell_boost,
-    )
\ No newline at end of file
+        PAIR_QUOTES=pair_quotes,
+        CANCEL_BATCH_SIZE=cancel_batch_size,
+        ENGINE=engine,
+        MAX_INFLIGHT=max_inflight,
+        MD_INTERVAL_SEC=md_interval_sec,
+        SIGNER_WORKERS=signer_workers,
+        SIGNER_KIND=signer_kind,
+        NONCE_FILE=nonce_file,
+        PANEL_FPS=panel_fps,
+        HTTP_POOL_SIZE=http_pool_size,
+        HTTP_KEEPALIVE_SEC=http_keepalive_sec,
+        WS_ENABLED=ws_enabled,
+        WS_URL=ws_url,
+        WS_STALE_SEC=ws_stale_sec,
+        QUOTE_OFFSET_TICKS=quote_offset_ticks,
+        RECORD_DIR=record_dir,
+        RECORD_INDICES=record_indices,
+        SYMBOLS=symbols,
+        MIDS_CACHE_SEC=mids_cache_sec,
+        BATCH_WINDOW_MS=batch_window_ms,
+        ASSET_CACHE_FILE=asset_cache_file,
+        ASSET_CACHE_TTL_SEC=asset_cache_ttl_sec,
+        SPANS_ENABLED=spans_enabled,
+        ORDER_SYNC_SEC=order_sync_sec,
+        QUOTE_MISSED_SLOTS=quote_missed_slots,
+        BBO_MAX_AGE_SEC=bbo_max_age_sec,
+        REST_BOOK=rest_book,
+        STEPS_FILE=steps_file,
+        STEPS_TTL_SEC=steps_ttl_sec,
+        REQUOTE=requote,
+    )
+
+# Settings a pair may override in multi-symbol mode: <FIELD>_<SYMBOL KEY>, e.g. SIZE_223=50, RANGE_PCT_PURR_USDC=0.05
+_PER_SYMBOL = {
+    "SIZE": _to_decimal,
+    "PRICE": _to_decimal,
+    "TIF": str,
+    "POST_ONLY": lambda v: _to_bool(v, True),
+    "ORDERS_PER_MINUTE": int,
+    "BUY_PER_MIN": int,
+    "SELL_PER_MIN": int,
+    "ORDER_TTL_SEC": int,
+    "RANGE_LOWER": _to_decimal,
+    "RANGE_UPPER": _to_decimal,
+    "RANGE_PCT": _to_decimal,
+    "START_SIDE": lambda v: "buy" if v.strip().lower() == "buy" else "sell",
+    "IMBALANCE_SELL_BOOST": int,
+    "QUOTE_OFFSET_TICKS": int,
+    "PAIR_QUOTES": lambda v: _to_bool(v, False),
+    "REQUOTE": lambda v: _to_bool(v, False),
+}
+
+def symbol_key(symbol: str) -> str:
+    """Env suffix for a symbol: @223 -> 223, PURR/USDC -> PURR_USDC."""
+    return re.sub(r"[^0-9A-Z]+", "_", symbol.upper().lstrip("@")).strip("_")
+
+def symbol_settings(cfg: Settings) -> list[Settings]:
+    """One Settings per pair in SYMBOLS (per-pair env overrides applied), or [cfg] when SYMBOLS is empty."""
+    if not cfg.SYMBOLS:
+        return [cfg]
+    out = []
+    for sym in cfg.SYMBOLS:
+        key = symbol_key(sym)
+        over = {"SYMBOL": sym}
+        for name, conv in _PER_SYMBOL.items():
+            v = os.getenv(f"{name}_{key}")
+            if v is not None and v.strip():
+                try:
+                    over[name] = conv(v)
+                except ValueError:
+                    raise SystemExit(f"Bad value for {name}_{key}: {v!r}")
+        out.append(replace(cfg, **over))
+    return out
\ No newline at end of file
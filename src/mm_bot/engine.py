@@ -0,0 +1,251 @@
+# engine.py
+import asyncio
+from decimal import Decimal
+from typing import List, Optional, Set
+
+from .config import Settings
+from .info import aget_mid_by_index
+from .exchange import OrderSpec, acancel_by_cloids, amodify_orders, aplace_spot_limit_orders, asmart_submit
+from .transport import close_async_session
+from .metrics import LOOP_LAG_SECONDS, add_collector, remove_collector
+from .sched import Cadence, run_cadence
+from .strategy import MakerBot
+
+
+class AsyncMakerBot(MakerBot):
+    """
+    MakerBot's quoting rules run as independent asyncio tasks (ENGINE=async):
+    market data, quoting and TTL expiry each keep their own cadence (sched.Cadence; the panel has its own thread),
+    so a slow /exchange reply no longer delays the next mid refresh or order.
+    At most MAX_INFLIGHT order submissions are outstanding at once.
+    """
+
+    def __init__(self, cfg: Settings, asset, clock=None):
+        super().__init__(cfg, asset, clock)
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._orders: Set[asyncio.Task] = set()
+
+    # ---------- Tasks ----------
+    async def _market_data_task(self):
+        self._md = Cadence("md", self.cfg.MD_INTERVAL_SEC, start=self.clock.monotonic())
+        await run_cadence(self._md, self._md_step, self._stop, self.clock)
+
+    async def _md_step(self):
+        if self.asset.index is None:
+            return
+        try:
+            self._set_mid(self._book_mid() or await aget_mid_by_index(self.asset.index))
+        except Exception:
+            self.stats.errors += 1
+
+    async def _quote_task(self):
+        self._start_minute()
+        self._quote = Cadence("quote", self._quote_interval(), policy=self.cfg.QUOTE_MISSED_SLOTS,
+                              start=self.clock.monotonic())
+        await run_cadence(self._quote, self._quote_step_async, self._stop, self.clock)
+
+    async def _quote_step_async(self):
+        LOOP_LAG_SECONDS.observe(self._quote.lag, "async")
+        self._maybe_roll_minute()
+
+        mid = self._fresh_mid()
+        if mid is None:
+            self.stats.last_action = "Waiting for mid..."
+            return
+
+        if not self.in_range(mid):
+            self.stats.last_action = (
+                f"⛔ Mid {mid:.6f} out of range [{self.range_lo}, {self.range_hi}] → cancel+close"
+            )
+            self.stats.range_trips += 1
+            await asyncio.to_thread(self.cancel_all)
+            await asyncio.to_thread(self.close_position)
+            return
+
+        side = self._choose_side()
+        if side is None:
+            self.stats.last_action = "Minute quotas reached"
+            return
+
+        await self._sem.acquire()  # a full pipeline makes this slot late; QUOTE_MISSED_SLOTS decides what follows
+        # Reserve the quota now so _choose_side / _pair_ok see in-flight orders; undone on failure.
+        if self.cfg.PAIR_QUOTES and self._pair_ok():
+            self._use_quota(True)
+            self._use_quota(False)
+            t = asyncio.create_task(self._pair(mid))
+            self._quote.defer(1)  # two order slots used
+        else:
+            self._use_quota(side)
+            self._last_side = side
+            if self.cfg.REQUOTE:
+                t = asyncio.create_task(self._requote(side, mid))
+            else:
+                t = asyncio.create_task(self._submit(side, mid))
+        self._orders.add(t)
+        t.add_done_callback(self._orders.discard)
+
+    async def _pair(self, mid: Decimal):
+        """Async MakerBot.place_pair (with REQUOTE: requote of both sides); both quotas are reserved by the slot."""
+        try:
+            sides, moved = [True, False], 0
+            if self.cfg.REQUOTE:
+                sides, moved = await self._move_parked(sides, mid)
+            await self._place_sides(sides, mid)
+            if self.cfg.REQUOTE:
+                self.stats.last_action = f"REQUOTE {moved} moved, {len(sides)} new @~{mid:.6f}"
+            else:
+                self.stats.last_action = f"PAIR {self.cfg.SIZE} @~{mid:.6f} (±{self.cfg.QUOTE_OFFSET_TICKS} ticks)"
+        except Exception:
+            self.stats.last_action = "pair: failed"
+        finally:
+            self._sem.release()
+
+    async def _move_parked(self, sides: List[bool], mid: Decimal) -> tuple[List[bool], int]:
+        """
+        MakerBot.requote's batchModify: each side's oldest parked order moved, all in one action.
+        Returns the sides that still need a new order (nothing parked, or the modify failed) and the moves.
+        """
+        moves: List[OrderSpec] = []
+        fresh: List[bool] = []
+        for is_buy in sides:
+            cloid = self._take_parked(is_buy)
+            left = self.orders.remaining(cloid) if cloid is not None else Decimal(0)
+            if left <= 0:
+                fresh.append(is_buy)
+            else:
+                moves.append(OrderSpec(is_buy, self._quote_px(is_buy, mid), left, self.cfg.TIF,
+                                       self.cfg.POST_ONLY, cloid=cloid))
+        if not moves:
+            return fresh, 0
+        try:
+            results = await amodify_orders(self.cfg, self.asset, moves)
+        except Exception:
+            results = [None] * len(moves)  # may have landed: the fallback cancel is by cloid
+        failed = [sp for sp, res in zip(moves, results) if self.orders.on_modify(sp.cloid, sp.px, sp.sz, res) is None]
+        resting = [sp.cloid for sp in failed if sp.cloid in self.orders.open]
+        if resting:
+            results = await acancel_by_cloids(self.cfg, [(self.asset.asset_id, c) for c in resting])
+            self.stats.cancels += self.orders.on_cancel_results(resting, results)[0]
+        return fresh + [sp.is_buy for sp in failed], len(moves) - len(failed)
+
+    async def _place_sides(self, sides: List[bool], mid: Decimal):
+        """One order per side in one signed action; a rejected leg retries through asmart_submit."""
+        specs = [
+            OrderSpec(is_buy, self._quote_px(is_buy, mid), self.cfg.SIZE, self.cfg.TIF,
+                      self.cfg.POST_ONLY, cloid=self._gen_cloid())
+            for is_buy in sides
+        ]
+        try:
+            results = await aplace_spot_limit_orders(self.cfg, self.asset, specs)
+        except Exception:
+            for sp in specs:
+                self._use_quota(sp.is_buy, n=-1)
+            raise
+        legs = await asyncio.gather(*(
+            asmart_submit(self.cfg, self.asset, sp.is_buy, sp.px, sp.sz, sp.tif, sp.post_only,
+                          self.cfg.RETRIES, cloid=sp.cloid, first_res=res)
+            for sp, res in zip(specs, results)), return_exceptions=True)
+        for sp, res in zip(specs, legs):
+            if isinstance(res, Exception):
+                self._use_quota(sp.is_buy, n=-1)
+            else:
+                self.orders.on_submit(sp.cloid, sp.is_buy, sp.px, sp.sz, res)
+
+    async def _submit(self, is_buy: bool, mid: Decimal):
+        try:
+            cloid = self._gen_cloid()
+            px = self._quote_px(is_buy, mid)
+            res = await asmart_submit(
+                self.cfg,
+                self.asset,
+                is_buy,
+                px,
+                self.cfg.SIZE,
+                self.cfg.TIF,
+                self.cfg.POST_ONLY,
+                self.cfg.RETRIES,
+                cloid=cloid,
+            )
+            self._note_submit(cloid, is_buy, px, mid, res)
+        except Exception:
+            self._use_quota(is_buy, n=-1)
+            self.stats.last_action = "place: failed/retried"
+        finally:
+            self._sem.release()
+
+    async def _requote(self, is_buy: bool, mid: Decimal):
+        """Async MakerBot.requote for one side."""
+        try:
+            cloid, px = self._take_parked(is_buy), self._quote_px(is_buy, mid)
+            left = self.orders.remaining(cloid) if cloid is not None else Decimal(0)
+            if left > 0:
+                spec = OrderSpec(is_buy, px, left, self.cfg.TIF, self.cfg.POST_ONLY, cloid=cloid)
+                try:
+                    res = (await amodify_orders(self.cfg, self.asset, [spec]))[0]
+                except Exception:
+                    res = None
+                if self.orders.on_modify(cloid, px, left, res) is not None:
+                    self.stats.last_action = f"REQUOTE {'BUY ' if is_buy else 'SELL'} moved @~{mid:.6f}"
+                    return
+            if cloid in self.orders.open:
+                results = await acancel_by_cloids(self.cfg, [(self.asset.asset_id, cloid)])
+                self.stats.cancels += self.orders.on_cancel_results([cloid], results)[0]
+            cloid = self._gen_cloid()
+            res = await asmart_submit(self.cfg, self.asset, is_buy, px, self.cfg.SIZE, self.cfg.TIF,
+                                      self.cfg.POST_ONLY, self.cfg.RETRIES, cloid=cloid)
+            self._note_submit(cloid, is_buy, px, mid, res)
+        except Exception:
+            self._use_quota(is_buy, n=-1)
+            self.stats.last_action = "requote: failed"
+        finally:
+            self._sem.release()
+
+    async def _ttl_task(self):
+        prune = Cadence("prune", 0.25, start=self.clock.monotonic() + 0.25)
+        await run_cadence(prune, self._prune_step, self._stop, self.clock)
+
+    async def _prune_step(self):
+        if self.orders.sync_due(self.cfg.ORDER_SYNC_SEC):
+            await asyncio.to_thread(self.orders.maybe_sync, self.cfg.ORDER_SYNC_SEC)
+        expired = self._take_expired()
+        if self.cfg.REQUOTE:
+            expired = self._park(expired)
+        if expired:
+            results = await acancel_by_cloids(self.cfg, [(self.asset.asset_id, c) for c in expired])
+            canceled, _ = self.orders.on_cancel_results(expired, results)
+            if canceled:
+                self.stats.cancels += canceled
+                self.stats.last_action = f"Auto-cancel {canceled} stale order(s)"
+
+    # ---------- Lifecycle ----------
+    async def run_async(self):
+        assert (
+            self.cfg.BUY_PER_MIN + self.cfg.SELL_PER_MIN == self.cfg.ORDERS_PER_MINUTE
+        ), "BUY_PER_MIN + SELL_PER_MIN must equal ORDERS_PER_MINUTE"
+
+        self._sem = asyncio.Semaphore(max(1, self.cfg.MAX_INFLIGHT))
+        tasks = [
+            asyncio.create_task(self._market_data_task(), name="market-data"),
+            asyncio.create_task(self._quote_task(), name="quote"),
+            asyncio.create_task(self._ttl_task(), name="ttl"),
+        ]
+        self.renderer.start()  # reporting runs on the panel thread
+        add_collector(self.metric_samples)
+        try:
+            while not self._stop.is_set():
+                done = [t for t in tasks if t.done()]
+                for t in done:
+                    t.result()  # re-raise a crashed task so server._bot_wrapper restarts us
+                await asyncio.sleep(0.1)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._orders:
+                await asyncio.gather(*list(self._orders), return_exceptions=True)
+            await close_async_session()
+            remove_collector(self.metric_samples)
+            self.renderer.stop()
+
+    def run(self):
+        asyncio.run(self.run_async())
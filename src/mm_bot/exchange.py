@@ -1,14 +1,18 @@
-import json
+import asyncio, json, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, Optional
-import requests
-
-from pybotters.helpers import hyperliquid as hlh
+from typing import Any, Dict, List, Optional
 
 from .config import Settings
+from .transport import post_json as _post_json, apost_json as _apost_json
+from .signer import sign_payload
+from .nonce import NonceAllocator, default_nonce_path
+from .fixed import fixed_step
+from . import info
+from .metrics import CLAMPS, MODIFIES, ORDERS, REJECTS, RETRIES, SIGN_SECONDS
+from .profiling import spanned
 from .utils import (
-    fmt_decimal_str,
-    decimals_of,
     snap_to_step,
     to_decimal_safe,
     infer_tick_from_bbo,
@@ -16,38 +20,73 @@ from .utils import (
 )
 
 EXCHANGE_URL: Optional[str] = None
+SIGNER = None  # optional signer.SigningService; None signs inline
+NONCES = NonceAllocator()  # replaced by a wallet-wide file-backed one in init_exchange
+VENUE = None  # optional in-process exchange (backtest): fn(action) -> response, no signing or HTTP
+BATCHER = None  # optional ActionBatcher (multi-symbol): coalesces order/cancel/modify actions across pairs
+BATCH_RESULT_TIMEOUT = 30.0  # longest a caller waits for its batched reply (window + signing + HTTP timeout)
+
+def attach_signer(svc):
+    global SIGNER
+    SIGNER = svc
+
+def attach_venue(fn):
+    global VENUE
+    VENUE = fn
+
+def attach_batcher(b):
+    global BATCHER
+    BATCHER = b
 
 def init_exchange(cfg: Settings):
     """Call once at startup (see main.py)."""
-    global EXCHANGE_URL
+    global EXCHANGE_URL, NONCES
     EXCHANGE_URL = f"{cfg.BASE_URL}/exchange"
+    path = cfg.NONCE_FILE or default_nonce_path(cfg.PRIVATE_KEY)
+    if NONCES.path != path:
+        old, NONCES = NONCES, NonceAllocator(path)
+        old.close()
 
-def _post_json(url: str, body: Dict, timeout: int = 15) -> Dict:
-    r = requests.post(
-        url,
-        headers={"Content-Type": "application/json"},
-        data=json.dumps(body),
-        timeout=timeout,
-    )
-    try:
-        data = r.json()
-    except Exception:
-        raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
-    if r.status_code != 200:
-        raise RuntimeError(f"HTTP {r.status_code}: {data}")
-    return data
+@spanned("sign")
+def sign_action(cfg: Settings, action: Dict) -> Dict:
+    """Nonce + EIP-712 signature -> the /exchange request body."""
+    nonce = NONCES.next()
+    t0 = time.perf_counter()
+    if SIGNER is not None:
+        payload = SIGNER.sign(action, nonce)
+    else:
+        payload = sign_payload(cfg.PRIVATE_KEY, cfg.IS_MAINNET, action, nonce)
+    SIGN_SECONDS.observe(time.perf_counter() - t0)
+    return payload
 
-def build_and_send(cfg: Settings, action: Dict) -> Dict:
+def _send(cfg: Settings, action: Dict) -> Dict:
     if EXCHANGE_URL is None:
         raise RuntimeError("EXCHANGE_URL is not initialized. Call init_exchange(cfg) first.")
-    nonce = hlh.get_timestamp_ms()
-    domain, types, message = hlh.construct_l1_action(
-        action=action, nonce=nonce, is_mainnet=cfg.IS_MAINNET
-    )
-    signature = hlh.sign_typed_data(cfg.PRIVATE_KEY, domain, types, message)
-    return _post_json(EXCHANGE_URL, {"action": action, "nonce": nonce, "signature": signature})
+    res = _post_json(EXCHANGE_URL, sign_action(cfg, action))
+    NONCES.note_response(res)
+    return res
 
-def place_spot_limit_order(
+def build_and_send(cfg: Settings, action: Dict) -> Dict:
+    if VENUE is not None:
+        return VENUE(action)
+    if BATCHER is not None and BATCHER.accepts(action):
+        return BATCHER.submit(action)
+    return _send(cfg, action)
+
+@dataclass
+class OrderSpec:
+    """One entry of a batched order action (see place_spot_limit_orders)."""
+    is_buy: bool
+    px: Decimal
+    sz: Decimal
+    tif: str = "Gtc"
+    post_only: bool = True
+    reduce_only: bool = False
+    cloid: Optional[str] = None
+    override_tick: Optional[Decimal] = None
+    asset: Any = None  # None -> the batch's asset
+
+def _limit_order_wire(
     cfg: Settings,
     asset,
     is_buy: bool,
@@ -58,13 +97,10 @@ def place_spot_limit_order(
     reduce_only: bool = False,
     override_tick: Optional[Decimal] = None,
     cloid: Optional[str] = None,
+    override_lot: Optional[Decimal] = None,
 ) -> Dict:
-    tick_sz = override_tick or asset.tick_sz
-    px = snap_to_step(px, tick_sz, direction="down")
-    sz = snap_to_step(sz, asset.lot_sz, direction="down")
-
-    px_wire = fmt_decimal_str(px, decimals_of(tick_sz))
-    sz_wire = fmt_decimal_str(sz, decimals_of(asset.lot_sz))
+    px_wire = fixed_step(override_tick or asset.tick_sz).snap_wire(px)
+    sz_wire = fixed_step(override_lot or asset.lot_sz).snap_wire(sz)
     tif_eff = "Alo" if post_only else tif
 
     order = {
@@ -79,14 +115,325 @@ def place_spot_limit_order(
         order["c"] = cloid
     elif cfg.CLIENT_ID:
         order["c"] = cfg.CLIENT_ID
+    return order
 
-    action: Dict = {"type": "order", "orders": [order], "grouping": "na"}
+def _order_action(cfg: Settings, orders: List[Dict]) -> Dict:
+    action: Dict = {"type": "order", "orders": orders, "grouping": "na"}
     if cfg.INCLUDE_BUILDER:
         action["builder"] = {"b": cfg.BUILDER_ADDR, "f": cfg.BUILDER_FEE_TENTH_BPS}
+    return action
 
-    return build_and_send(cfg, action)
+def place_spot_limit_order(
+    cfg: Settings,
+    asset,
+    is_buy: bool,
+    px: Decimal,
+    sz: Decimal,
+    tif: str,
+    post_only: bool,
+    reduce_only: bool = False,
+    override_tick: Optional[Decimal] = None,
+    cloid: Optional[str] = None,
+    override_lot: Optional[Decimal] = None,
+) -> Dict:
+    order = _limit_order_wire(cfg, asset, is_buy, px, sz, tif, post_only, reduce_only, override_tick, cloid, override_lot)
+    return build_and_send(cfg, _order_action(cfg, [order]))
+
+def slice_statuses(res: Dict, start: int, n: int) -> Dict:
+    """
+    Entries [start, start + n) of a batched order/cancel response, shaped like the reply to an
+    n-entry action. A whole-action failure (status != "ok" or missing statuses) is returned as is;
+    a reply that is not an object at all (e.g. an error string) as {"status": "err", "response": ...}.
+    """
+    if not isinstance(res, dict):
+        return {"status": "err", "response": str(res)}
+    resp = res.get("response")
+    data = resp.get("data") if isinstance(resp, dict) else None
+    statuses = data.get("statuses") if isinstance(data, dict) else None
+    if res.get("status") != "ok" or not isinstance(statuses, list):
+        return res
+    part = [statuses[i] if i < len(statuses) else {"error": "missing status in batch response"}
+            for i in range(start, start + n)]
+    return {"status": "ok", "response": {"type": resp.get("type"), "data": {"statuses": part}}}
+
+def split_statuses(res: Dict, n: int) -> List[Dict]:
+    """
+    Split a batched order/cancel response into n single-entry responses, in request order,
+    shaped like the reply to a one-element action (response.data.statuses = [status]).
+    A whole-action failure (status != "ok" or missing statuses) is copied to every entry.
+    """
+    return [slice_statuses(res, i, 1) for i in range(n)]
+
+def _fail(futures: List[Future], e: BaseException):
+    for fut in futures:
+        if not fut.done():
+            fut.set_exception(e)
+
+class ActionBatcher:
+    """
+    Coalesces order and cancel actions submitted from several threads (one per pair) into one
+    signed action per `window_ms`: one nonce, one signature and one round trip for all of them.
+    Each caller gets the response shaped like the reply to its own action (see slice_statuses).
+    Merged actions hold at most `max_entries` entries; a caller's entries are never split.
+    Every future is resolved: with the reply, with the error that stopped its chunk, or with
+    RuntimeError when submitted after shutdown().
+    """
+    _FIELDS = {"order": "orders", "cancelByCloid": "cancels", "cancel": "cancels", "batchModify": "modifies"}
+
+    def __init__(self, cfg: Settings, window_ms: float = 5.0, max_entries: int = 50, senders: int = 4):
+        self.cfg = cfg
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_entries = max(1, int(max_entries))
+        self._cv = threading.Condition()
+        self._pending: List[tuple] = []
+        self._pool = ThreadPoolExecutor(max_workers=max(1, senders), thread_name_prefix="batch-send")
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # metrics
+        self.actions_in = 0
+        self.actions_out = 0
+
+    def accepts(self, action: Dict) -> bool:
+        return action.get("type") in self._FIELDS
+
+    def submit_future(self, action: Dict) -> Future:
+        field = self._FIELDS[action["type"]]
+        rest = json.dumps({k: v for k, v in action.items() if k != field}, sort_keys=True)
+        fut: Future = Future()
+        with self._cv:
+            if self._stopping or self._thread is None:
+                fut.set_exception(RuntimeError("ActionBatcher is not running"))
+                return fut
+            self._pending.append(((field, rest), action, fut))
+            self.actions_in += 1
+            self._cv.notify()
+        return fut
+
+    def submit(self, action: Dict) -> Dict:
+        return self.submit_future(action).result(timeout=BATCH_RESULT_TIMEOUT)
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._pending and not self._stopping:
+                    self._cv.wait()
+                if not self._pending:
+                    return
+            time.sleep(self.window)  # let the other pairs' actions join this one
+            with self._cv:
+                batch, self._pending = self._pending, []
+            try:
+                self._flush(batch)
+            except Exception as e:
+                _fail([fut for _, _, fut in batch], e)
+
+    def _flush(self, batch: List[tuple]):
+        groups: Dict[tuple, list] = {}
+        for key, action, fut in batch:
+            groups.setdefault(key, []).append((action, fut))
+        for (field, _), items in groups.items():
+            chunk, n = [], 0
+            for action, fut in items:
+                k = len(action[field])
+                if chunk and n + k > self.max_entries:
+                    self._pool.submit(self._send_chunk, field, chunk)
+                    chunk, n = [], 0
+                chunk.append((action, fut))
+                n += k
+            if chunk:
+                self._pool.submit(self._send_chunk, field, chunk)
+
+    def _send_chunk(self, field: str, chunk: List[tuple]):
+        try:
+            merged = dict(chunk[0][0])
+            merged[field] = [e for action, _ in chunk for e in action[field]]
+            res = _send(self.cfg, merged)
+            self.actions_out += 1
+            start = 0
+            for action, fut in chunk:
+                n = len(action[field])
+                fut.set_result(slice_statuses(res, start, n))
+                start += n
+        except Exception as e:
+            _fail([fut for _, fut in chunk], e)
+
+    def start(self) -> "ActionBatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="action-batcher")
+            self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Send what is queued, then stop."""
+        with self._cv:
+            self._stopping = True
+            self._cv.notify()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        self._pool.shutdown(wait=True)
+
+def place_spot_limit_orders(cfg: Settings, asset, specs: List[OrderSpec]) -> List[Dict]:
+    """
+    Snap, format, sign and send N limit orders as one action (one nonce, one signature,
+    one round trip). Returns one single-order-shaped response per spec, in spec order.
+    """
+    if not specs:
+        return []
+    orders = [
+        _limit_order_wire(cfg, sp.asset or asset, sp.is_buy, sp.px, sp.sz, sp.tif, sp.post_only,
+                          sp.reduce_only, sp.override_tick, sp.cloid)
+        for sp in specs
+    ]
+    res = build_and_send(cfg, _order_action(cfg, orders))
+    return split_statuses(res, len(specs))
+
+def _modify_action(cfg: Settings, asset, specs: List[OrderSpec]) -> Dict:
+    """batchModify: each spec's cloid names the resting order, which becomes the spec (post-only prices clamped first)."""
+    modifies = []
+    for sp in specs:
+        a = sp.asset or asset
+        px = clamp_post_only(a, sp.is_buy, sp.px, sp.override_tick) if sp.post_only else sp.px
+        wire = _limit_order_wire(cfg, a, sp.is_buy, px, sp.sz, sp.tif, sp.post_only, sp.reduce_only,
+                                 sp.override_tick, sp.cloid)
+        modifies.append({"oid": sp.cloid, "order": wire})
+    return {"type": "batchModify", "modifies": modifies}
+
+def _count_modifies(asset, specs: List[OrderSpec], results: List[Dict]) -> List[Dict]:
+    for sp, res in zip(specs, results):
+        err = first_error(res)
+        if err:
+            _note_reject(sp.asset or asset, err)
+        MODIFIES.inc("buy" if sp.is_buy else "sell", "failed" if err or not entry_ok(res) else "ok")
+    return results
+
+@spanned("modify_orders")
+def modify_orders(cfg: Settings, asset, specs: List[OrderSpec]) -> List[Dict]:
+    """
+    Move resting orders (by cloid, kept by the exchange) to new prices in one signed batchModify.
+    One single-order-shaped response per spec; no retries: a failed entry is the caller's to replace.
+    """
+    if not specs:
+        return []
+    res = build_and_send(cfg, _modify_action(cfg, asset, specs))
+    return _count_modifies(asset, specs, split_statuses(res, len(specs)))
+
+def first_error(res: Dict) -> Optional[str]:
+    statuses = res.get("response", {}).get("data", {}).get("statuses", []) if isinstance(res, dict) else []
+    return statuses[0].get("error") if statuses and isinstance(statuses[0], dict) else None
+
+
+def _next_attempt(err_msg: str, is_buy: bool, cur_px: Decimal, cur_tick: Decimal) -> Optional[tuple[Decimal, Decimal]]:
+    """Adjusted (px, tick) for a retry after err_msg, or None if the error is not retryable."""
+    if "Post only order would have immediately matched" in err_msg:
+        inferred = infer_tick_from_bbo(err_msg)
+        if inferred:
+            cur_tick = inferred
+        import re
+        m = re.search(r"bbo was ([0-9.]+)@([0-9.]+)", err_msg)
+        if not m:
+            return None
+        bid = to_decimal_safe(m.group(1), "retry.bid")
+        ask_raw = m.group(2).rstrip(" .")
+        ask = to_decimal_safe(ask_raw, "retry.ask")
+        return snap_to_step((bid - cur_tick) if is_buy else (ask + cur_tick), cur_tick, direction="down"), cur_tick
+
+    if "Price must be divisible by tick size" in err_msg:
+        inferred = infer_tick_from_bbo(err_msg)
+        if inferred and inferred != cur_tick:
+            cur_tick = inferred
+        else:
+            cur_tick = next_coarser_tick(cur_tick) or Decimal("0.00001")
+        return snap_to_step(cur_px, cur_tick, direction="down"), cur_tick
+
+    return None
+
+def _next_lot(err_msg: str, cur_sz: Decimal, cur_lot: Decimal) -> Optional[tuple[Decimal, Decimal]]:
+    """(sz, lot) for a retry after an "invalid size" reject: lot x10, size snapped down to it; None if nothing is left."""
+    if "invalid size" not in err_msg:
+        return None
+    lot = cur_lot * 10
+    if lot == lot.to_integral_value():
+        lot = lot.quantize(Decimal(1))  # 1, not 1.0
+    sz = snap_to_step(cur_sz, lot, direction="down")
+    return (sz, lot) if sz > 0 else None
+
+def _learn_steps(asset, res: Optional[Dict], reason: Optional[str], tick: Decimal, lot: Decimal,
+                 fixed: frozenset = frozenset()):
+    """
+    Tell info.STEPS how an attempt at (tick, lot) went: accepted (reason None) or rejected for `reason`.
+    Only a step a tick_size / size reject made the call change (`fixed`) is learned on accept; a tick
+    inferred from a post-only "bbo was" text stays local to the call (it only reflects the book's digits).
+    """
+    steps = info.STEPS
+    if steps is None:
+        return
+    if reason is not None:
+        steps.on_reject(asset, reason, tick, lot)
+        return
+    if not entry_ok(res):
+        return
+    tick = tick if "tick_size" in fixed else asset.tick_sz
+    lot = lot if "size" in fixed else asset.lot_sz
+    if fixed or (tick, lot) == (asset.tick_sz, asset.lot_sz):
+        steps.on_accepted(asset, tick, lot)
 
+def _reject_reason(err_msg: str) -> str:
+    if "Post only order would have immediately matched" in err_msg:
+        return "post_only_cross"
+    if "Price must be divisible by tick size" in err_msg:
+        return "tick_size"
+    if "minimum value" in err_msg:
+        return "min_notional"
+    if "Insufficient" in err_msg:
+        return "balance"
+    if "invalid size" in err_msg:
+        return "size"
+    return "other"
 
+def _note_reject(asset, err_msg: str) -> str:
+    reason = _reject_reason(err_msg)
+    REJECTS.inc(reason)
+    if reason == "post_only_cross":
+        info.note_reject(asset.index, err_msg)  # the next order is priced off this book, not rejected by it
+    return reason
+
+def clamp_post_only(asset, is_buy: bool, px: Decimal, tick: Optional[Decimal] = None) -> Decimal:
+    """
+    Pre-submit pricing: a post-only buy at or above the best ask goes one tick under it, a sell at or
+    below the best bid one tick over it (newest BBO from info.get_bbo). Unchanged without a BBO.
+    """
+    bbo = info.get_bbo(asset.index)
+    if bbo is None:
+        return px
+    bid, ask, source = bbo
+    step = fixed_step(tick or asset.tick_sz)
+    if is_buy:
+        if ask is None or px < ask:
+            return px
+        u = step.snap_down(step.units(ask, up=True) - 1)  # highest price on the grid below the ask
+        if u <= 0:
+            return px
+    else:
+        if bid is None or px > bid:
+            return px
+        u = step.snap_up(step.units(bid) + 1)  # lowest price on the grid above the bid
+    CLAMPS.inc("buy" if is_buy else "sell", source)
+    return step.to_decimal(u)
+
+def _count_order(is_buy: bool, res: Optional[Dict]) -> Dict:
+    """ORDERS{side, outcome} for a final smart_submit result (None = raised)."""
+    if res is None:
+        outcome = "error"
+    else:
+        statuses = res.get("response", {}).get("data", {}).get("statuses", []) if isinstance(res, dict) else []
+        st = statuses[0] if statuses and isinstance(statuses[0], dict) else {}
+        outcome = "resting" if "resting" in st else "filled" if "filled" in st else "rejected"
+    ORDERS.inc("buy" if is_buy else "sell", outcome)
+    return res
+
+@spanned("smart_submit")
 def smart_submit(
     cfg: Settings,
     asset,
@@ -97,65 +444,100 @@ def smart_submit(
     post_only: bool,
     max_retries: int,
     cloid: Optional[str] = None,
+    first_res: Optional[Dict] = None,
 ) -> Dict:
-    cur_tick = asset.tick_sz
+    """
+    Place one limit order, retrying on post-only crosses, tick-size and lot-size errors (the steps that
+    worked are kept in info.STEPS, so later orders start from them). A post-only price is
+    first clamped against the cached BBO (clamp_post_only), so a stale quote normally needs no retry.
+    first_res: response already obtained for (px, sz) (e.g. one entry of a batch);
+    it counts as the first attempt and only the retries are sent from here.
+    """
+    cur_tick, cur_lot = asset.tick_sz, asset.lot_sz
     cur_px, cur_sz = px, sz
     attempt = 0
+    fixed = frozenset()  # step rejects seen by this call (see _learn_steps)
 
     while True:
-        res = place_spot_limit_order(
-            cfg,
-            asset,
-            is_buy,
-            cur_px,
-            cur_sz,
-            tif,
-            post_only,
-            reduce_only=False,
-            override_tick=cur_tick,
-            cloid=cloid,
-        )
-        statuses = res.get("response", {}).get("data", {}).get("statuses", [])
-        err_msg = (statuses[0].get("error") if statuses and isinstance(statuses[0], dict) else None)
+        if first_res is not None:
+            res, first_res = first_res, None
+        else:
+            if post_only:
+                cur_px = clamp_post_only(asset, is_buy, cur_px, cur_tick)
+            try:
+                res = place_spot_limit_order(
+                    cfg,
+                    asset,
+                    is_buy,
+                    cur_px,
+                    cur_sz,
+                    tif,
+                    post_only,
+                    reduce_only=False,
+                    override_tick=cur_tick,
+                    cloid=cloid,
+                    override_lot=cur_lot,
+                )
+            except Exception:
+                _count_order(is_buy, None)
+                raise
+        err_msg = first_error(res)
 
         if not err_msg:
-            return res
-
-        if "Post only order would have immediately matched" in (err_msg or ""):
-            inferred = infer_tick_from_bbo(err_msg)
-            if inferred:
-                cur_tick = inferred
-            import re
-            m = re.search(r"bbo was ([0-9.]+)@([0-9.]+)", err_msg or "")
-            if m:
-                bid = to_decimal_safe(m.group(1), "retry.bid")
-                ask_raw = m.group(2).rstrip(" .")
-                ask = to_decimal_safe(ask_raw, "retry.ask")
-                cur_px = snap_to_step((bid - cur_tick) if is_buy else (ask + cur_tick), cur_tick, direction="down")
-                attempt += 1
-                if attempt <= max_retries:
-                    continue
-            return res
-
-        if "Price must be divisible by tick size" in (err_msg or ""):
-            inferred = infer_tick_from_bbo(err_msg)
-            if inferred and inferred != cur_tick:
-                cur_tick = inferred
-            else:
-                cur_tick = next_coarser_tick(cur_tick) or Decimal("0.00001")
-            cur_px = snap_to_step(cur_px, cur_tick, direction="down")
-            attempt += 1
-            if attempt <= max_retries:
-                continue
-            return res
+            _learn_steps(asset, res, None, cur_tick, cur_lot, fixed)
+            return _count_order(is_buy, res)
 
-        return res
+        reason = _note_reject(asset, err_msg)
+        _learn_steps(asset, res, reason, cur_tick, cur_lot)
+        if reason in ("tick_size", "size"):
+            fixed |= {reason}
+        nxt = _next_attempt(err_msg, is_buy, cur_px, cur_tick)
+        if nxt is not None:
+            cur_px, cur_tick = nxt
+        else:
+            nxt = _next_lot(err_msg, cur_sz, cur_lot)
+            if nxt is None:
+                return _count_order(is_buy, res)
+            cur_sz, cur_lot = nxt
+        attempt += 1
+        if attempt > max_retries:
+            return _count_order(is_buy, res)
+        RETRIES.inc(reason)
 
 
 def cancel_by_cloid(cfg: Settings, asset_id: int, cloid: str):
     action = {"type": "cancelByCloid", "cancels": [{"asset": asset_id, "cloid": cloid}]}
     return build_and_send(cfg, action)
 
+def entry_ok(res: Dict) -> bool:
+    """True if a (split) single-entry response succeeded."""
+    return isinstance(res, dict) and res.get("status") == "ok" and first_error(res) is None
+
+def _send_chunked(cfg: Settings, action_type: str, cancels: List[Dict], chunk_size: int) -> List[Dict]:
+    out: List[Dict] = []
+    step = max(1, int(chunk_size))
+    for i in range(0, len(cancels), step):
+        part = cancels[i:i + step]
+        try:
+            res = build_and_send(cfg, {"type": action_type, "cancels": part})
+        except Exception as e:
+            res = {"status": "err", "response": repr(e)}
+        out.extend(split_statuses(res, len(part)))
+    return out
+
+def cancel_by_cloids(cfg: Settings, items: List[tuple[int, str]], chunk_size: Optional[int] = None) -> List[Dict]:
+    """
+    Bulk cancelByCloid: items = [(asset_id, cloid), ...], one signed action per chunk.
+    Returns one single-entry response per item (see entry_ok); a failed chunk marks all its items.
+    """
+    cancels = [{"asset": a, "cloid": c} for a, c in items]
+    return _send_chunked(cfg, "cancelByCloid", cancels, chunk_size or cfg.CANCEL_BATCH_SIZE)
+
+def cancel_by_oids(cfg: Settings, items: List[tuple[int, int]], chunk_size: Optional[int] = None) -> List[Dict]:
+    """Bulk cancel by exchange oid: items = [(asset_id, oid), ...]; same chunking/results as cancel_by_cloids."""
+    cancels = [{"a": a, "o": int(o)} for a, o in items]
+    return _send_chunked(cfg, "cancel", cancels, chunk_size or cfg.CANCEL_BATCH_SIZE)
+
 
 def schedule_cancel_all(cfg: Settings, at_ms: int | None = None):
     action = {"type": "scheduleCancel"}
@@ -164,11 +546,132 @@ def schedule_cancel_all(cfg: Settings, at_ms: int | None = None):
     return build_and_send(cfg, action)
 
 
-def place_market_ioc(cfg: Settings, asset, side_buy: bool, sz: Decimal) -> Dict:
-    sz = snap_to_step(sz, asset.lot_sz, "down")
-    sz_wire = fmt_decimal_str(sz, decimals_of(asset.lot_sz))
+def place_market_ioc(cfg: Settings, asset, side_buy: bool, sz: Decimal, cloid: Optional[str] = None) -> Dict:
+    sz_wire = fixed_step(asset.lot_sz).snap_wire(sz)
     order = {"a": asset.asset_id, "b": bool(side_buy), "s": sz_wire, "t": {"market": {"tif": "Ioc"}}}
-    action: Dict = {"type": "order", "orders": [order], "grouping": "na"}
-    if cfg.INCLUDE_BUILDER:
-        action["builder"] = {"b": cfg.BUILDER_ADDR, "f": cfg.BUILDER_FEE_TENTH_BPS}
-    return build_and_send(cfg, action)
\ No newline at end of file
+    if cloid:
+        order["c"] = cloid
+    return build_and_send(cfg, _order_action(cfg, [order]))
+
+# ---------- asyncio variants (used by engine.AsyncMakerBot) ----------
+async def abuild_and_send(cfg: Settings, action: Dict) -> Dict:
+    """Signs in the default executor so the event loop keeps serving other tasks."""
+    if VENUE is not None:
+        return VENUE(action)
+    if BATCHER is not None and BATCHER.accepts(action):
+        return await asyncio.wait_for(asyncio.wrap_future(BATCHER.submit_future(action)), BATCH_RESULT_TIMEOUT)
+    if EXCHANGE_URL is None:
+        raise RuntimeError("EXCHANGE_URL is not initialized. Call init_exchange(cfg) first.")
+    if SIGNER is not None:
+        t0 = time.perf_counter()
+        payload = await asyncio.wrap_future(SIGNER.submit(action, NONCES.next()))
+        SIGN_SECONDS.observe(time.perf_counter() - t0)
+    else:
+        payload = await asyncio.get_running_loop().run_in_executor(None, sign_action, cfg, action)
+    res = await _apost_json(EXCHANGE_URL, payload)
+    NONCES.note_response(res)
+    return res
+
+async def aplace_spot_limit_order(
+    cfg: Settings,
+    asset,
+    is_buy: bool,
+    px: Decimal,
+    sz: Decimal,
+    tif: str,
+    post_only: bool,
+    reduce_only: bool = False,
+    override_tick: Optional[Decimal] = None,
+    cloid: Optional[str] = None,
+    override_lot: Optional[Decimal] = None,
+) -> Dict:
+    order = _limit_order_wire(cfg, asset, is_buy, px, sz, tif, post_only, reduce_only, override_tick, cloid, override_lot)
+    return await abuild_and_send(cfg, _order_action(cfg, [order]))
+
+async def aplace_spot_limit_orders(cfg: Settings, asset, specs: List[OrderSpec]) -> List[Dict]:
+    """Async place_spot_limit_orders."""
+    if not specs:
+        return []
+    orders = [
+        _limit_order_wire(cfg, sp.asset or asset, sp.is_buy, sp.px, sp.sz, sp.tif, sp.post_only,
+                          sp.reduce_only, sp.override_tick, sp.cloid)
+        for sp in specs
+    ]
+    res = await abuild_and_send(cfg, _order_action(cfg, orders))
+    return split_statuses(res, len(specs))
+
+@spanned("asmart_submit")
+async def asmart_submit(
+    cfg: Settings,
+    asset,
+    is_buy: bool,
+    px: Decimal,
+    sz: Decimal,
+    tif: str,
+    post_only: bool,
+    max_retries: int,
+    cloid: Optional[str] = None,
+    first_res: Optional[Dict] = None,
+) -> Dict:
+    """Async smart_submit (same retry and learning rules, see _next_attempt / _next_lot; same first_res)."""
+    cur_tick, cur_lot = asset.tick_sz, asset.lot_sz
+    cur_px, cur_sz = px, sz
+    attempt = 0
+    fixed = frozenset()  # step rejects seen by this call (see _learn_steps)
+    while True:
+        if first_res is not None:
+            res, first_res = first_res, None
+        else:
+            if post_only:
+                cur_px = clamp_post_only(asset, is_buy, cur_px, cur_tick)
+            try:
+                res = await aplace_spot_limit_order(cfg, asset, is_buy, cur_px, cur_sz, tif, post_only, reduce_only=False,
+                                                    override_tick=cur_tick, cloid=cloid, override_lot=cur_lot)
+            except Exception:
+                _count_order(is_buy, None)
+                raise
+        err_msg = first_error(res)
+        if not err_msg:
+            _learn_steps(asset, res, None, cur_tick, cur_lot, fixed)
+            return _count_order(is_buy, res)
+        reason = _note_reject(asset, err_msg)
+        _learn_steps(asset, res, reason, cur_tick, cur_lot)
+        if reason in ("tick_size", "size"):
+            fixed |= {reason}
+        nxt = _next_attempt(err_msg, is_buy, cur_px, cur_tick)
+        if nxt is not None:
+            cur_px, cur_tick = nxt
+        else:
+            nxt = _next_lot(err_msg, cur_sz, cur_lot)
+            if nxt is None:
+                return _count_order(is_buy, res)
+            cur_sz, cur_lot = nxt
+        attempt += 1
+        if attempt > max_retries:
+            return _count_order(is_buy, res)
+        RETRIES.inc(reason)
+
+async def amodify_orders(cfg: Settings, asset, specs: List[OrderSpec]) -> List[Dict]:
+    """Async modify_orders."""
+    if not specs:
+        return []
+    res = await abuild_and_send(cfg, _modify_action(cfg, asset, specs))
+    return _count_modifies(asset, specs, split_statuses(res, len(specs)))
+
+async def acancel_by_cloids(cfg: Settings, items: List[tuple[int, str]], chunk_size: Optional[int] = None) -> List[Dict]:
+    """Async cancel_by_cloids; chunks are sent concurrently."""
+    cancels = [{"asset": a, "cloid": c} for a, c in items]
+    step = max(1, int(chunk_size or cfg.CANCEL_BATCH_SIZE))
+    parts = [cancels[i:i + step] for i in range(0, len(cancels), step)]
+
+    async def _one(part):
+        try:
+            res = await abuild_and_send(cfg, {"type": "cancelByCloid", "cancels": part})
+        except Exception as e:
+            res = {"status": "err", "response": repr(e)}
+        return split_statuses(res, len(part))
+
+    out: List[Dict] = []
+    for chunk in await asyncio.gather(*(_one(p) for p in parts)):
+        out.extend(chunk)
+    return out
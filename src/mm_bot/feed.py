@@ -0,0 +1,242 @@
+# feed.py
+import asyncio, json, threading, time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from .config import Settings
+from .book import L2Book
+from .utils import to_decimal_safe
+
+@dataclass(frozen=True)
+class Bbo:
+    bid: Optional[Decimal]
+    bid_sz: Optional[Decimal]
+    ask: Optional[Decimal]
+    ask_sz: Optional[Decimal]
+    ts: float  # monotonic receive time
+
+def ws_url_from_base(base_url: str) -> str:
+    if base_url.startswith("https://"):
+        return "wss://" + base_url[len("https://"):].rstrip("/") + "/ws"
+    if base_url.startswith("http://"):
+        return "ws://" + base_url[len("http://"):].rstrip("/") + "/ws"
+    return base_url.rstrip("/") + "/ws"
+
+def _level(lv) -> tuple[Optional[Decimal], Optional[Decimal]]:
+    if not lv:
+        return None, None
+    return to_decimal_safe(lv.get("px"), "bbo.px"), to_decimal_safe(lv.get("sz"), "bbo.sz")
+
+class MarketFeed:
+    """
+    Background WebSocket client (own thread + asyncio loop) for allMids / bbo / l2Book.
+    Readers (mid(), bbo()) only touch in-memory caches and never do I/O; they return
+    None when the socket is down or the cached value is older than `stale_after`.
+    """
+
+    def __init__(self, url: str, stale_after: float = 10.0, ping_sec: float = 30.0):
+        self.url = url
+        self.stale_after = float(stale_after)
+        self.ping_sec = float(ping_sec)
+
+        self._subs: List[Dict] = []
+        self._listeners: Dict[str, List[Callable[[Dict], None]]] = {}
+        self._mids: Dict[str, str] = {}
+        self._mids_ts = 0.0
+        self._bbos: Dict[str, Bbo] = {}
+        self._books: Dict[str, L2Book] = {}
+
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.last_msg_ts = 0.0
+        self.last_error: Optional[str] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._stop = threading.Event()
+        self._wake: Optional[asyncio.Event] = None
+
+    # ---------- Subscriptions ----------
+    def subscribe(self, sub: Dict):
+        if sub in self._subs:
+            return
+        self._subs.append(sub)
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._send_sub(self._ws, sub), self._loop)
+
+    def subscribe_all_mids(self):
+        self.subscribe({"type": "allMids"})
+
+    def subscribe_bbo(self, coin: str):
+        self.subscribe({"type": "bbo", "coin": coin})
+
+    def subscribe_l2_book(self, coin: str) -> L2Book:
+        book = self._books.get(coin)
+        if book is None:
+            book = self._books[coin] = L2Book(coin)
+        self.subscribe({"type": "l2Book", "coin": coin})
+        return book
+
+    def add_listener(self, channel: str, fn: Callable[[Dict], None]):
+        """fn(data) is called on the feed thread for every message on `channel`."""
+        self._listeners.setdefault(channel, []).append(fn)
+
+    # ---------- Readers (O(1), no I/O) ----------
+    def is_live(self) -> bool:
+        return self.connected and (time.monotonic() - self.last_msg_ts) <= self.stale_after
+
+    def mid(self, coin: str) -> Optional[Decimal]:
+        if not self.connected:
+            return None
+        now = time.monotonic()
+        raw = self._mids.get(coin)
+        if raw is not None and now - self._mids_ts <= self.stale_after:
+            return to_decimal_safe(raw, f"ws.mid[{coin}]")
+        b = self._bbos.get(coin)
+        if b is not None and b.bid is not None and b.ask is not None and now - b.ts <= self.stale_after:
+            return (b.bid + b.ask) / 2
+        return None
+
+    def bbo(self, coin: str) -> Optional[Bbo]:
+        b = self._bbos.get(coin)
+        if b is None or not self.connected or time.monotonic() - b.ts > self.stale_after:
+            return None
+        return b
+
+    def book(self, coin: str) -> Optional[L2Book]:
+        b = self._books.get(coin)
+        if b is None or not self.connected or b.is_empty() or time.monotonic() - b.ts > self.stale_after:
+            return None
+        return b
+
+    # ---------- Message handling ----------
+    def _on_message(self, raw: str):
+        try:
+            msg = json.loads(raw)
+        except Exception:
+            return
+        ch = msg.get("channel")
+        data = msg.get("data")
+        now = time.monotonic()
+        self.messages += 1
+        self.last_msg_ts = now
+
+        if ch == "allMids" and isinstance(data, dict):
+            mids = data.get("mids")
+            if isinstance(mids, dict):
+                self._mids = mids  # swap, readers see old or new map
+                self._mids_ts = now
+        elif ch == "bbo" and isinstance(data, dict):
+            levels = data.get("bbo") or [None, None]
+            try:
+                bid, bid_sz = _level(levels[0])
+                ask, ask_sz = _level(levels[1])
+                self._bbos[data.get("coin")] = Bbo(bid, bid_sz, ask, ask_sz, now)
+            except Exception:
+                pass
+        elif ch == "l2Book" and isinstance(data, dict):
+            book = self._books.get(data.get("coin"))
+            if book is not None:
+                try:
+                    book.apply_snapshot(data.get("levels"), data.get("time") or 0)
+                except Exception as e:
+                    self.last_error = f"l2Book: {e!r}"
+
+        for fn in self._listeners.get(ch, ()):
+            try:
+                fn(data)
+            except Exception as e:
+                self.last_error = f"listener[{ch}]: {e!r}"
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True, name="ws-feed")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        loop = self._loop
+        if loop is not None and self._wake is not None:
+            loop.call_soon_threadsafe(self._wake.set)
+            if self._ws is not None:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.connected = False
+
+    def wait_live(self, timeout: float = 5.0) -> bool:
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if self.is_live():
+                return True
+            time.sleep(0.02)
+        return self.is_live()
+
+    async def _send_sub(self, ws, sub: Dict):
+        try:
+            await ws.send_str(json.dumps({"method": "subscribe", "subscription": sub}))
+        except Exception as e:
+            self.last_error = repr(e)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        backoff = 0.5
+        async with aiohttp.ClientSession() as sess:
+            while not self._stop.is_set():
+                try:
+                    async with sess.ws_connect(self.url) as ws:
+                        self._ws = ws
+                        for sub in list(self._subs):
+                            await self._send_sub(ws, sub)
+                        self.connected = True
+                        self.connects += 1
+                        self.last_msg_ts = time.monotonic()
+                        backoff = 0.5
+                        await self._read_loop(ws)
+                except Exception as e:
+                    self.last_error = repr(e)
+                finally:
+                    self.connected = False
+                    self._ws = None
+                if self._stop.is_set():
+                    break
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(10.0, backoff * 2)
+        self._loop = None
+
+    async def _read_loop(self, ws):
+        while not self._stop.is_set():
+            try:
+                msg = await ws.receive(timeout=self.ping_sec)
+            except asyncio.TimeoutError:
+                # Quiet socket: ping, and give up if the previous ping went unanswered too.
+                if time.monotonic() - self.last_msg_ts > 2 * self.ping_sec:
+                    return
+                await ws.send_str(json.dumps({"method": "ping"}))
+                continue
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                self._on_message(msg.data)
+            elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED,
+                              aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.ERROR):
+                return
+
+def start_feed(cfg: Settings, coins: List[str]) -> MarketFeed:
+    feed = MarketFeed(cfg.WS_URL or ws_url_from_base(cfg.BASE_URL), stale_after=cfg.WS_STALE_SEC)
+    feed.subscribe_all_mids()
+    for c in coins:
+        feed.subscribe_bbo(c)
+        feed.subscribe_l2_book(c)
+    feed.start()
+    return feed
@@ -0,0 +1,84 @@
+# fixed.py
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict
+
+from .utils import decimals_of, to_decimal_safe
+
+_WIRE_CACHE_MAX = 4096
+
+class FixedStep:
+    """
+    One step grid (tick or lot) in integer units of 10^-dec, dec = decimals_of(step).
+    Values are plain ints: snapping is integer modulo and wire strings are cached, so the
+    order path needs no Decimal division/quantize/normalize. Non-negative values only
+    (prices and sizes); results match snap_to_step + fmt_decimal_str(…, decimals_of(step)).
+    """
+    __slots__ = ("step", "dec", "pow10", "_pow10_d", "step_units", "_wire")
+
+    def __init__(self, step: Decimal):
+        step = to_decimal_safe(step, "fixed.step")
+        if step <= 0:
+            raise ValueError(f"step must be positive: {step}")
+        self.step = step
+        self.dec = decimals_of(step)
+        self.pow10 = 10 ** self.dec
+        self._pow10_d = Decimal(self.pow10)
+        self.step_units = int(step.scaleb(self.dec))
+        self._wire: Dict[int, str] = {}
+
+    # ---------- Conversions ----------
+    def units(self, x, up: bool = False) -> int:
+        """Decimal/str/int -> units, floored (or ceiled) to 10^-dec; not yet on the step grid."""
+        if isinstance(x, int):
+            return x * self.pow10
+        d = x if isinstance(x, Decimal) else to_decimal_safe(x, "fixed.value")
+        scaled = d * self._pow10_d
+        u = int(scaled)  # truncation == floor for non-negative values
+        return u + 1 if up and scaled != u else u
+
+    def units_from_float(self, x: float) -> int:
+        """For on-grid float prices (e.g. from book.L2Book); rounds to the nearest unit."""
+        return round(x * self.pow10)
+
+    def to_decimal(self, u: int) -> Decimal:
+        return Decimal(u).scaleb(-self.dec)
+
+    # ---------- Grid ----------
+    def snap_down(self, u: int) -> int:
+        return u - (u % self.step_units)
+
+    def snap_up(self, u: int) -> int:
+        r = u % self.step_units
+        return u if r == 0 else u + (self.step_units - r)
+
+    def steps(self, n: int) -> int:
+        """n steps (ticks/lots) in units."""
+        return n * self.step_units
+
+    # ---------- Wire ----------
+    def wire(self, u: int) -> str:
+        """Units -> exchange string with trailing zeros stripped (cached)."""
+        s = self._wire.get(u)
+        if s is not None:
+            return s
+        if self.dec == 0:
+            s = str(u)
+        else:
+            ip, fp = divmod(u, self.pow10)
+            frac = str(fp).rjust(self.dec, "0").rstrip("0")
+            s = f"{ip}.{frac}" if frac else str(ip)
+        if len(self._wire) >= _WIRE_CACHE_MAX:
+            self._wire.clear()
+        self._wire[u] = s
+        return s
+
+    def snap_wire(self, x, direction: str = "down") -> str:
+        if direction == "up":
+            return self.wire(self.snap_up(self.units(x, up=True)))
+        return self.wire(self.snap_down(self.units(x)))
+
+@lru_cache(maxsize=256)
+def fixed_step(step: Decimal) -> FixedStep:
+    """Shared FixedStep per distinct tick/lot value (derived once, reused every order)."""
+    return FixedStep(step)
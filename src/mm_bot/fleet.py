@@ -0,0 +1,400 @@
+# fleet.py
+"""
+Several wallets on one host: one market-data process plus one bot process per wallet env file.
+
+Only the market-data process talks to the WebSocket / allMids. It publishes the latest mid and
+BBO of every traded spot index into a shared-memory table (SharedMarket). Workers read it through
+SharedFeed, attached in place of their own MarketFeed, without locks. Each worker sends Stats
+snapshots back on a queue and the supervisor sums them.
+
+    PYTHONPATH=src python -m mm_bot.fleet wallet1.env wallet2.env wallet3.env
+
+A wallet env file holds what differs per wallet (PRIVATE_KEY, USER_ADDR, SYMBOL/SYMBOLS, SIZE,
+NONCE_FILE, ...) on top of the shared .env.
+"""
+import argparse, math, multiprocessing as mp, os, queue, random, signal, struct, sys, threading, time
+from dataclasses import asdict, replace
+from decimal import Decimal
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+from dotenv import dotenv_values, load_dotenv
+
+from .config import Settings, load_settings, symbol_settings
+from .feed import Bbo, start_feed
+from .stats import Stats, sum_stats
+
+_MAGIC = b"MMSM"
+_HDR = struct.Struct("<4sIId")        # magic, slot count, publisher pid, publisher heartbeat (wall time)
+_SEQ = struct.Struct("<I")            # per-slot sequence: odd while the publisher is writing
+_DATA = struct.Struct("<iddddddd")    # index, ts (wall), mid, bid, bid_sz, ask, ask_sz (NaN = none), bbo ts (wall)
+_HDR_SIZE = 64
+_SLOT_SIZE = 64                       # _SEQ + _DATA, one cache line per index
+_NAN = float("nan")
+
+def _dec(x: float) -> Optional[Decimal]:
+    return None if math.isnan(x) else Decimal(repr(x))  # repr: shortest round trip of the wire value
+
+def _f(x) -> float:
+    return _NAN if x is None else float(x)
+
+class SharedMarket:
+    """
+    Latest mid/BBO per spot index in shared memory: one writer (the market-data process), any
+    number of lock-free readers. Each slot is a seqlock: the writer bumps the sequence to odd,
+    writes, bumps it to even; a reader retries when it saw an odd or changed sequence.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        magic, n, _pid, _hb = _HDR.unpack_from(self.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{shm.name}: not a market table")
+        self.slots: Dict[int, int] = {}
+        for i in range(n):
+            off = _HDR_SIZE + i * _SLOT_SIZE
+            self.slots[_DATA.unpack_from(self.buf, off + _SEQ.size)[0]] = off
+        self._lock = threading.Lock()  # writers only (feed thread + REST loop)
+        self._last: Dict[int, list] = {idx: [0.0, _NAN, _NAN, _NAN, _NAN, _NAN, 0.0] for idx in self.slots}
+
+    @classmethod
+    def create(cls, indices: List[int], name: Optional[str] = None) -> "SharedMarket":
+        indices = sorted(set(indices))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HDR_SIZE + len(indices) * _SLOT_SIZE)
+        _HDR.pack_into(shm.buf, 0, _MAGIC, len(indices), 0, 0.0)
+        for i, idx in enumerate(indices):
+            off = _HDR_SIZE + i * _SLOT_SIZE
+            _SEQ.pack_into(shm.buf, off, 0)
+            _DATA.pack_into(shm.buf, off + _SEQ.size, idx, 0.0, _NAN, _NAN, _NAN, _NAN, _NAN, 0.0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, track: bool = True) -> "SharedMarket":
+        """
+        track=False in child processes: the segment is the supervisor's, so a child's resource
+        tracker must not unlink it (or warn about a leak) when that child exits.
+        """
+        if track:
+            return cls(shared_memory.SharedMemory(name=name), owner=False)
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), owner=False)
+        # < 3.13 registers every attach. Skip that rather than unregister afterwards: a spawned child
+        # shares the supervisor's tracker, where unregister would drop the supervisor's own entry.
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    # ---------- Writer ----------
+    def publish(self, idx: int, ts: Optional[float] = None, **fields):
+        """
+        Update some of mid/bid/bid_sz/ask/ask_sz for idx (others keep their last value), stamped `ts`
+        (wall time, default now); a BBO field also stamps the BBO, so an allMids tick never makes it look newer.
+        """
+        off = self.slots.get(idx)
+        if off is None:
+            return
+        with self._lock:
+            rec = self._last[idx]
+            rec[0] = time.time() if ts is None else ts
+            for i, k in enumerate(("mid", "bid", "bid_sz", "ask", "ask_sz"), 1):
+                if k in fields:
+                    rec[i] = _f(fields[k])
+                    if i > 1:
+                        rec[6] = rec[0]
+            seq = _SEQ.unpack_from(self.buf, off)[0]
+            _SEQ.pack_into(self.buf, off, (seq + 1) & 0xFFFFFFFF)
+            _DATA.pack_into(self.buf, off + _SEQ.size, idx, *rec)
+            _SEQ.pack_into(self.buf, off, (seq + 2) & 0xFFFFFFFF)
+
+    def heartbeat(self):
+        _HDR.pack_into(self.buf, 0, _MAGIC, len(self.slots), os.getpid(), time.time())
+
+    # ---------- Readers ----------
+    def read(self, idx: int) -> Optional[tuple]:
+        """(ts, mid, bid, bid_sz, ask, ask_sz, bbo_ts) as floats, or None if idx was never published."""
+        off = self.slots.get(idx)
+        if off is None:
+            return None
+        buf = self.buf
+        for _ in range(1000):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if s1 & 1:
+                continue
+            rec = _DATA.unpack_from(buf, off + _SEQ.size)
+            if _SEQ.unpack_from(buf, off)[0] == s1:
+                return rec[1:] if s1 else None
+        return None
+
+    def publisher_age(self) -> float:
+        return time.time() - _HDR.unpack_from(self.buf, 0)[3]
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SharedFeed:
+    """The part of feed.MarketFeed the bot reads (mid/bbo/book/is_live), served from a SharedMarket."""
+
+    def __init__(self, market: SharedMarket, stale_after: float = 10.0):
+        self.market = market
+        self.stale_after = float(stale_after)
+
+    def _rec(self, coin: str) -> Optional[tuple]:
+        try:
+            rec = self.market.read(int(coin.lstrip("@")))
+        except ValueError:
+            return None
+        if rec is None or time.time() - rec[0] > self.stale_after:
+            return None
+        return rec
+
+    def is_live(self) -> bool:
+        return self.market.publisher_age() <= self.stale_after
+
+    def mid(self, coin: str) -> Optional[Decimal]:
+        rec = self._rec(coin)
+        if rec is None:
+            return None
+        if not math.isnan(rec[1]):
+            return _dec(rec[1])
+        if not math.isnan(rec[2]) and not math.isnan(rec[4]):
+            return (_dec(rec[2]) + _dec(rec[4])) / 2
+        return None
+
+    def bbo(self, coin: str) -> Optional[Bbo]:
+        """Bbo.ts is when the publisher wrote it, on this process's monotonic clock (info.get_bbo compares ages)."""
+        rec = self._rec(coin)
+        if rec is None or (math.isnan(rec[2]) and math.isnan(rec[4])):
+            return None
+        age = time.time() - rec[6]
+        if age > self.stale_after:
+            return None
+        return Bbo(_dec(rec[2]), _dec(rec[3]), _dec(rec[4]), _dec(rec[5]), time.monotonic() - max(0.0, age))
+
+    def book(self, coin: str):
+        return None  # only the top of book is shared; the bot falls back to mid-based quoting
+
+    def stop(self):
+        self.market.close()
+
+# ---------- Market-data process ----------
+def _md_main(env_file: Optional[str], shm_name: str, stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor decides when we stop
+    if env_file:
+        load_dotenv(env_file, override=True)
+    from .info import all_mids, init_info
+    from .transport import init_transport
+    cfg = load_settings()
+    init_transport(cfg)
+    init_info(cfg)
+    market = SharedMarket.attach(shm_name, track=False)
+    coins = {f"@{idx}": idx for idx in market.slots}
+
+    feed = None
+    if cfg.WS_ENABLED:
+        feed = start_feed(cfg, list(coins))
+
+        def on_all_mids(data):
+            mids = data.get("mids") if isinstance(data, dict) else None
+            if isinstance(mids, dict):
+                for coin, idx in coins.items():
+                    if coin in mids:
+                        market.publish(idx, mid=mids[coin])
+
+        def on_bbo(data):
+            idx = coins.get(data.get("coin")) if isinstance(data, dict) else None
+            if idx is None:
+                return
+            bid, ask = (data.get("bbo") or [None, None])[:2]
+            market.publish(idx, bid=bid and bid.get("px"), bid_sz=bid and bid.get("sz"),
+                           ask=ask and ask.get("px"), ask_sz=ask and ask.get("sz"))
+
+        feed.add_listener("allMids", on_all_mids)
+        feed.add_listener("bbo", on_bbo)
+    try:
+        while not stop.is_set():
+            market.heartbeat()
+            if feed is None or not feed.is_live():
+                try:
+                    mids = all_mids() or {}  # one request for the whole fleet
+                    for coin, idx in coins.items():
+                        if coin in mids:
+                            market.publish(idx, mid=mids[coin])
+                except Exception as e:
+                    print(f"[fleet/md] allMids failed: {e!r}", flush=True)
+            stop.wait(cfg.MD_INTERVAL_SEC)
+    finally:
+        if feed is not None:
+            feed.stop()
+        market.close()
+
+# ---------- Worker process ----------
+def _worker_main(wid: int, env_file: str, shm_name: str, uni: list, stats_q, stop, stats_sec: float):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_dotenv(env_file, override=True)
+    from .main import run_bot
+    cfg = replace(load_settings(), PANEL_FPS=0)  # many processes, one terminal: the supervisor reports
+    feed = SharedFeed(SharedMarket.attach(shm_name, track=False), stale_after=cfg.WS_STALE_SEC)
+
+    def on_start(bots):
+        def report():
+            while True:
+                stopping = stop.wait(stats_sec)
+                stats_q.put((wid, [asdict(b.stats.snapshot()) for b in bots]))
+                if stopping:
+                    for b in bots:
+                        b.stop()
+                    return
+        threading.Thread(target=report, daemon=True, name="fleet-stats").start()
+
+    run_bot(cfg, feed=feed, uni=uni, on_start=on_start)
+
+# ---------- Supervisor ----------
+def _settings_for(env_file: str) -> Settings:
+    """load_settings() as a worker would see it, without leaking the file into our environment."""
+    saved = dict(os.environ)
+    try:
+        os.environ.update({k: v for k, v in dotenv_values(env_file).items() if v is not None})
+        return load_settings()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+class Fleet:
+    """
+    Starts the market-data process and one worker per env file, restarts workers that die
+    (5 s doubling to 60 s, like server._bot_wrapper) and keeps their latest Stats.
+    """
+
+    def __init__(self, env_files: List[str], stats_sec: float = 1.0):
+        self.env_files = list(env_files)
+        self.stats_sec = float(stats_sec)
+        self.ctx = mp.get_context("spawn")
+        self.stop_event = self.ctx.Event()
+        self.stats_q = self.ctx.Queue()
+        self.market: Optional[SharedMarket] = None
+        self.uni: list = []
+        self.md = None
+        self.workers: Dict[int, object] = {}
+        self.restarts: Dict[int, int] = {}
+        self._backoff: Dict[int, tuple] = {}  # wid -> (restart at, current backoff)
+        self.latest: Dict[int, List[Stats]] = {}
+
+    def _resolve(self) -> List[int]:
+        from .info import init_info, resolve_asset_fields
+        from .registry import AssetRegistry, default_registry_path
+        from .transport import init_transport
+        cfgs = [_settings_for(p) for p in self.env_files]
+        init_transport(cfgs[0])
+        init_info(cfgs[0])
+        c0 = cfgs[0]
+        reg = AssetRegistry(c0.ASSET_CACHE_FILE or default_registry_path(c0.BASE_URL), c0.ASSET_CACHE_TTL_SEC, c0.BASE_URL)
+        self.uni = reg.load().universe  # one spotMeta (or none, from the cache) for everyone
+        return [resolve_asset_fields(c, self.uni).index for cfg in cfgs for c in symbol_settings(cfg)]
+
+    def _spawn_worker(self, wid: int):
+        p = self.ctx.Process(target=_worker_main, name=f"fleet-worker-{wid}", daemon=True,
+                             args=(wid, self.env_files[wid], self.market.name, self.uni,
+                                   self.stats_q, self.stop_event, self.stats_sec))
+        p.start()
+        self.workers[wid] = p
+
+    def start(self) -> "Fleet":
+        if not self.env_files:
+            raise SystemExit("fleet: no wallet env files given")
+        indices = [i for i in self._resolve() if i is not None]
+        self.market = SharedMarket.create(indices)
+        self.md = self.ctx.Process(target=_md_main, name="fleet-md", daemon=True,
+                                   args=(self.env_files[0], self.market.name, self.stop_event))
+        self.md.start()
+        for wid in range(len(self.env_files)):
+            self._spawn_worker(wid)
+        return self
+
+    def poll(self, timeout: float = 0.0):
+        """Drain stats reports; restart dead workers whose backoff has elapsed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                wid, snaps = self.stats_q.get(timeout=max(0.0, deadline - time.monotonic()))
+                self.latest[wid] = [Stats(**s) for s in snaps]
+            except queue.Empty:
+                break
+        if self.stop_event.is_set():
+            return
+        now = time.monotonic()
+        for wid, p in list(self.workers.items()):
+            if p.is_alive():
+                continue
+            at, backoff = self._backoff.get(wid, (None, 5.0))
+            if at is None:
+                delay = backoff + random.uniform(0, 1.5)
+                print(f"[fleet] worker {wid} ({self.env_files[wid]}) exited with {p.exitcode}. "
+                      f"restart in {delay:.1f}s", flush=True)
+                self._backoff[wid] = (now + delay, backoff)
+            elif now >= at:
+                self._backoff[wid] = (None, min(60.0, backoff * 2))
+                self.restarts[wid] = self.restarts.get(wid, 0) + 1
+                self._spawn_worker(wid)
+
+    def totals(self) -> Stats:
+        return sum_stats(s for snaps in self.latest.values() for s in snaps)
+
+    def status_line(self) -> str:
+        t = self.totals()
+        alive = sum(p.is_alive() for p in self.workers.values())
+        md_age = f"{self.market.publisher_age():.1f}s" if self.market is not None else "-"
+        return (f"[fleet] workers {alive}/{len(self.workers)} | orders {t.total_buy + t.total_sell} "
+                f"(B {t.total_buy} / S {t.total_sell}) | notional≈ {t.notional_buy + t.notional_sell:.2f} | "
+                f"cancels {t.cancels} | errors {t.errors} | md age {md_age}")
+
+    def stop(self, timeout: float = 10.0):
+        self.stop_event.set()
+        end = time.monotonic() + timeout
+        for p in [*self.workers.values(), self.md]:
+            if p is not None:
+                p.join(max(0.1, end - time.monotonic()))
+        self.poll()  # final reports
+        for p in [*self.workers.values(), self.md]:
+            if p is not None and p.is_alive():
+                p.terminate()
+                p.join(2)
+        if self.market is not None:
+            self.market.close()
+            self.market = None
+
+def _handle_sigterm(*_args):
+    raise KeyboardInterrupt
+
+def main():
+    ap = argparse.ArgumentParser(description="Run one bot process per wallet env file on shared market data")
+    ap.add_argument("env_files", nargs="+", help="per-wallet .env files")
+    ap.add_argument("--stats-sec", type=float, default=1.0, help="worker stats report period")
+    a = ap.parse_args()
+
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    fleet = Fleet(a.env_files, a.stats_sec).start()
+    try:
+        while True:
+            fleet.poll(a.stats_sec)
+            print(fleet.status_line(), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+        print(fleet.status_line().replace("[fleet]", "[fleet] final:"), flush=True)
+
+if __name__ == "__main__":
+    main()
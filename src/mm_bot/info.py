@@ -1,33 +1,88 @@
-import json, requests
+import threading, time
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Dict, Optional, Tuple, List
 from .config import Settings
-from .utils import to_decimal_safe, one_tick_from_dec
+from .utils import to_decimal_safe, one_tick_from_dec, find_bbo
+from .book import px_to_decimal
+from .transport import post_json as _post_json, apost_json as _apost_json
 
 INFO_URL = None
+MIDS_TTL = 0.0  # >0: all_mids() is shared by every caller for this long (multi-symbol)
+_mids_lock = threading.Lock()
+_mids_cache: Tuple[float, Dict] = (0.0, {})
+FEED = None  # optional feed.MarketFeed; get_mid_by_index reads it before REST
+VENUE = None  # optional in-process /info handler (backtest): fn(body) -> response
+RECORDER = None  # optional recorder.Recorder; REST mids are recorded (feed data is tapped on the feed)
+REGISTRY = None  # optional registry.AssetRegistry; resolve_asset_fields reads it instead of spotMeta
+STEPS = None  # optional registry.StepRegistry; learned tick/lot sizes applied to every resolved asset
+REST_BOOK = False  # without a feed mid, get_mid_by_index reads l2Book (mid + BBO in one call) instead of allMids
+BBO_MAX_AGE = 2.0  # seconds a REST / reject BBO is trusted by get_bbo; 0 = no BBO (no pre-submit clamp)
+_bbos: Dict[int, Tuple[Optional[Decimal], Optional[Decimal], float, str]] = {}  # spot index -> (bid, ask, monotonic ts, source)
 
-def _post_json(url: str, body: Dict, timeout: int = 15) -> Dict:
-    r = requests.post(url, headers={"Content-Type": "application/json"}, data=json.dumps(body), timeout=timeout)
-    try:
-        data = r.json()
-    except Exception:
-        raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
-    if r.status_code != 200:
-        raise RuntimeError(f"HTTP {r.status_code}: {data}")
-    return data
+def attach_feed(feed):
+    global FEED
+    FEED = feed
+
+def attach_venue(fn):
+    global VENUE
+    VENUE = fn
+    _bbos.clear()
+
+def attach_recorder(rec):
+    global RECORDER
+    RECORDER = rec
+
+def attach_registry(reg):
+    global REGISTRY
+    REGISTRY = reg
+
+def attach_steps(steps):
+    global STEPS
+    STEPS = steps
+
+def _info(body: Dict):
+    return VENUE(body) if VENUE is not None else _post_json(INFO_URL, body)
 
 def init_info(cfg: Settings):
-    global INFO_URL
+    global INFO_URL, MIDS_TTL, _mids_cache, REST_BOOK, BBO_MAX_AGE
     INFO_URL = f"{cfg.BASE_URL}/info"
+    MIDS_TTL = cfg.MIDS_CACHE_SEC
+    _mids_cache = (0.0, {})
+    REST_BOOK = cfg.REST_BOOK and MIDS_TTL <= 0  # shared allMids (multi-symbol) stays one call for every pair
+    BBO_MAX_AGE = cfg.BBO_MAX_AGE_SEC
+    _bbos.clear()
 
 def spot_meta() -> Dict:
-    return _post_json(INFO_URL, {"type": "spotMeta"})
+    return _info({"type": "spotMeta"})
 
 def all_mids() -> Dict:
-    return _post_json(INFO_URL, {"type": "allMids"})
+    """allMids; with MIDS_TTL, one fetch serves every caller (and every pair) inside the window."""
+    global _mids_cache
+    if MIDS_TTL <= 0:
+        return _info({"type": "allMids"})
+    with _mids_lock:  # single flight: concurrent callers wait for the one fetch
+        ts, mids = _mids_cache
+        if time.monotonic() - ts < MIDS_TTL:
+            return mids
+        mids = _info({"type": "allMids"}) or {}
+        _mids_cache = (time.monotonic(), mids)
+        return mids
 
 def user_spot_balances(addr: str) -> Dict:
-    return _post_json(INFO_URL, {"type": "spotUserBalances", "user": addr})
+    return _info({"type": "spotUserBalances", "user": addr})
+
+def open_orders(addr: str) -> list:
+    return _info({"type": "openOrders", "user": addr})
+
+def user_fills_by_time(addr: str, start_ms: int, end_ms: Optional[int] = None) -> list:
+    body = {"type": "userFillsByTime", "user": addr, "startTime": int(start_ms)}
+    if end_ms is not None:
+        body["endTime"] = int(end_ms)
+    return _info(body)
+
+def l2_book(idx: int) -> Dict:
+    return _info({"type": "l2Book", "coin": f"@{idx}"})
 
 def get_universe() -> list:
     smeta = spot_meta() or {}
@@ -46,59 +101,160 @@ def extract_steps(a: Dict, px_dec: int, sz_dec: int, lotsz_fb: Decimal) -> tuple
     lot_sz  = to_decimal_safe(lot,  "lotSz")  if lot  is not None else (Decimal(1) / (Decimal(10) ** sz_dec) if sz_dec > 0 else lotsz_fb)
     return tick_sz, lot_sz
 
-def resolve_asset_fields(cfg: Settings):
-    uni = get_universe()
-    idx = parse_index(cfg.SYMBOL)
-
-    from dataclasses import dataclass
-    @dataclass
-    class AssetInfo:
-        asset_id: int
-        px_dec: int
-        sz_dec: int
-        index: int | None
-        name: str
-        tick_sz: Decimal
-        lot_sz: Decimal
+@dataclass
+class AssetInfo:
+    asset_id: int
+    px_dec: int
+    sz_dec: int
+    index: int | None
+    name: str
+    tick_sz: Decimal
+    lot_sz: Decimal
 
-    if idx is not None:
-        asset_id = 10000 + idx
+def asset_from_entry(cfg: Settings, a: Optional[Dict], idx: int) -> AssetInfo:
+    """AssetInfo for spot index idx from its spotMeta universe entry (None = not listed: cfg fallbacks), learned steps applied."""
+    if a is None:
         px_dec, sz_dec = cfg.PX_DEC, cfg.SZ_DEC
-        name = f"@{idx}"
-        tick_sz, lot_sz = cfg.TICK_FALLBACK, cfg.LOTSZ_FALLBACK
-
-        if 0 <= idx < len(uni):
-            a = uni[idx]
-            px_dec = int(a.get("pxDecimals") or cfg.PX_DEC)
-            sz_dec = int(a.get("szDecimals") or cfg.SZ_DEC)
-            name   = a.get("name", name)
-            tick_sz, lot_sz = extract_steps(a, px_dec, sz_dec, cfg.LOTSZ_FALLBACK)
-        else:
-            from .utils import one_tick_from_dec
-            tick_sz = one_tick_from_dec(px_dec)
-            lot_sz  = cfg.LOTSZ_FALLBACK if sz_dec == 0 else (Decimal(1) / (Decimal(10) ** sz_dec))
+        lot_sz = cfg.LOTSZ_FALLBACK if sz_dec == 0 else (Decimal(1) / (Decimal(10) ** sz_dec))
+        asset = AssetInfo(10000 + idx, px_dec, sz_dec, idx, f"@{idx}", one_tick_from_dec(px_dec), lot_sz)
+    else:
+        px_dec = int(a.get("pxDecimals") or cfg.PX_DEC)
+        sz_dec = int(a.get("szDecimals") or cfg.SZ_DEC)
+        tick_sz, lot_sz = extract_steps(a, px_dec, sz_dec, cfg.LOTSZ_FALLBACK)
+        asset = AssetInfo(10000 + idx, px_dec, sz_dec, idx, a.get("name", f"@{idx}"), tick_sz, lot_sz)
+    return STEPS.apply(asset) if STEPS is not None else asset
 
-        return AssetInfo(asset_id, px_dec, sz_dec, idx, name, tick_sz, lot_sz)
+def symbol_not_found(symbol: str, uni: list) -> ValueError:
+    names = ", ".join(a.get("name","") for a in uni[:30])
+    return ValueError(f"Spot symbol not found: {symbol}. Available (first 30): {names}")
+
+def resolve_asset_fields(cfg: Settings, uni: Optional[list] = None) -> AssetInfo:
+    """
+    uni: spotMeta universe already fetched (multi-symbol resolves every pair from one fetch).
+    Without it, the attached AssetRegistry answers (no network), else spotMeta is fetched.
+    """
+    if uni is None:
+        if REGISTRY is not None:
+            return REGISTRY.resolve(cfg)
+        uni = get_universe()
+    idx = parse_index(cfg.SYMBOL)
+    if idx is not None:
+        return asset_from_entry(cfg, uni[idx] if 0 <= idx < len(uni) else None, idx)
 
     target = cfg.SYMBOL.upper()
     for i, a in enumerate(uni):
         if a.get("name", "").upper() == target:
-            px_dec = int(a.get("pxDecimals") or cfg.PX_DEC)
-            sz_dec = int(a.get("szDecimals") or cfg.SZ_DEC)
-            asset_id = 10000 + i
-            tick_sz, lot_sz = extract_steps(a, px_dec, sz_dec, cfg.LOTSZ_FALLBACK)
-            return AssetInfo(asset_id, px_dec, sz_dec, i, a.get("name", target), tick_sz, lot_sz)
-
-    names = ", ".join(a.get("name","") for a in uni[:30])
-    raise ValueError(f"Spot symbol not found: {cfg.SYMBOL}. Available (first 30): {names}")
+            return asset_from_entry(cfg, a, i)
+    raise symbol_not_found(cfg.SYMBOL, uni)
 
 def get_mid_by_index(idx: int) -> Decimal:
+    key = f"@{idx}"
+    if FEED is not None:
+        mid = FEED.mid(key)
+        if mid is not None:
+            return mid
+    if REST_BOOK:
+        try:
+            mid = note_book(idx, l2_book(idx))
+        except Exception:
+            mid = None
+        if mid is not None:
+            return mid
     mids = all_mids() or {}
+    val = mids.get(key)
+    if val is None:
+        raise RuntimeError(f"Mid not found for spot index {idx} (key {key})")
+    mid = to_decimal_safe(val, f"mid[{key}]")
+    if RECORDER is not None:
+        RECORDER.record(idx, mid=mid)
+    return mid
+
+async def aget_mid_by_index(idx: int) -> Decimal:
+    """Async get_mid_by_index: feed cache first, aiohttp allMids otherwise."""
     key = f"@{idx}"
+    if FEED is not None:
+        mid = FEED.mid(key)
+        if mid is not None:
+            return mid
+    if REST_BOOK:
+        try:
+            body = {"type": "l2Book", "coin": key}
+            mid = note_book(idx, VENUE(body) if VENUE is not None else await _apost_json(INFO_URL, body))
+        except Exception:
+            mid = None
+        if mid is not None:
+            return mid
+    global _mids_cache
+    ts, mids = _mids_cache
+    if MIDS_TTL <= 0 or time.monotonic() - ts >= MIDS_TTL:
+        if VENUE is not None:
+            mids = VENUE({"type": "allMids"}) or {}
+        else:
+            mids = await _apost_json(INFO_URL, {"type": "allMids"}) or {}
+        if MIDS_TTL > 0:
+            _mids_cache = (time.monotonic(), mids)
     val = mids.get(key)
     if val is None:
         raise RuntimeError(f"Mid not found for spot index {idx} (key {key})")
-    return to_decimal_safe(val, f"mid[{key}]")
+    mid = to_decimal_safe(val, f"mid[{key}]")
+    if RECORDER is not None:
+        RECORDER.record(idx, mid=mid)
+    return mid
+
+# ---------- Best bid/ask (pre-submit pricing, see exchange.clamp_post_only) ----------
+def note_bbo(idx: int | None, bid: Optional[Decimal], ask: Optional[Decimal], source: str):
+    if idx is not None and (bid is not None or ask is not None):
+        _bbos[idx] = (bid, ask, time.monotonic(), source)
+
+def note_book(idx: int, res) -> Optional[Decimal]:
+    """Cache the top of a REST l2Book reply; its mid, if it has both sides (recorded like a REST mid)."""
+    levels = res.get("levels") if isinstance(res, dict) else None
+    if not isinstance(levels, list) or len(levels) < 2:
+        return None
+    bids, asks = levels[0], levels[1]
+    bid = to_decimal_safe(bids[0]["px"], "l2Book.bid") if bids else None
+    ask = to_decimal_safe(asks[0]["px"], "l2Book.ask") if asks else None
+    note_bbo(idx, bid, ask, "rest")
+    if bid is None or ask is None:
+        return None
+    mid = (bid + ask) / 2
+    if RECORDER is not None:
+        RECORDER.record(idx, mid=mid, bid=bid, ask=ask)
+    return mid
+
+def note_reject(idx: int | None, err_msg: str) -> bool:
+    """A post-only reject quotes the book it hit ("bbo was b@a"): the freshest BBO there is."""
+    bid, ask = find_bbo(err_msg)
+    note_bbo(idx, bid, ask, "reject")
+    return bid is not None or ask is not None
+
+def get_bbo(idx: int | None) -> Optional[Tuple[Optional[Decimal], Optional[Decimal], str]]:
+    """
+    Newest known (bid, ask, source) for a spot index, no I/O: the feed's bbo / L2 book (as long as
+    the feed calls them live) or a REST / reject BBO younger than BBO_MAX_AGE. None if there is none.
+    """
+    if idx is None or BBO_MAX_AGE <= 0:
+        return None
+    now = time.monotonic()
+    best = _bbos.get(idx)
+    if best is not None and now - best[2] > BBO_MAX_AGE:
+        best = None
+    if FEED is not None:
+        coin = f"@{idx}"
+        b = FEED.bbo(coin)
+        if b is not None and (best is None or b.ts > best[2]):
+            best = (b.bid, b.ask, b.ts, "feed")
+        book = FEED.book(coin)
+        if book is not None and (best is None or book.ts > best[2]):
+            bb, ba = book.best_bid(), book.best_ask()
+            best = (px_to_decimal(bb[0]) if bb else None, px_to_decimal(ba[0]) if ba else None, book.ts, "feed")
+    return (best[0], best[1], best[3]) if best is not None else None
+
+def get_book_by_index(idx: int | None):
+    """Live feed.MarketFeed L2 book for a spot index, or None (no feed / stale / empty)."""
+    if FEED is None or idx is None:
+        return None
+    return FEED.book(f"@{idx}")
 
 def clamp_price_to_ref_band(idx: int | None, raw_px: Decimal) -> tuple[Decimal, tuple[Decimal, Decimal], Decimal | None]:
     if idx is None:
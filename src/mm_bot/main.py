@@ -1,33 +1,167 @@
-from .config import load_settings
+import asyncio, threading
+from dataclasses import replace
+
+from .config import load_settings, symbol_settings
 from .auth import verify_or_exit
-from .info import init_info, resolve_asset_fields, clamp_price_to_ref_band
-from .exchange import init_exchange, smart_submit
+from .transport import init_transport, prewarm, start_keepalive
+from .info import (init_info, resolve_asset_fields, clamp_price_to_ref_band, attach_feed, attach_recorder, attach_registry,
+                   attach_steps)
+from .feed import start_feed
+from .exchange import init_exchange, smart_submit, attach_signer, attach_batcher, ActionBatcher
+from .signer import start_signer
+from .recorder import start_recorder
+from .registry import start_registry, start_steps
+from .profiling import enable_spans
+from .panel import PanelRenderer
 from .strategy import MakerBot
+from .engine import AsyncMakerBot
+
+def _place_initial(cfg, asset):
+    px0, _, _ = clamp_price_to_ref_band(asset.index, cfg.PRICE)
+    try:
+        smart_submit(cfg, asset, is_buy=True,  px=px0, sz=cfg.SIZE,
+                    tif=cfg.TIF, post_only=cfg.POST_ONLY, max_retries=cfg.RETRIES)
+    except Exception:
+        pass
+    try:
+        smart_submit(cfg, asset, is_buy=False, px=px0, sz=cfg.SIZE,
+                    tif=cfg.TIF, post_only=cfg.POST_ONLY, max_retries=cfg.RETRIES)
+    except Exception:
+        pass
+
+def _run_threads(bots):
+    """One thread per pair; the first bot to fail stops the others and its error is re-raised."""
+    errors = []
+
+    def one(bot):
+        try:
+            bot.run()
+        except BaseException as e:
+            errors.append(e)
+            for b in bots:
+                b.stop()
+
+    threads = [threading.Thread(target=one, args=(b,), daemon=True, name=f"bot-{b.asset.name}") for b in bots]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    finally:
+        for b in bots:
+            b.stop()
+        for t in threads:
+            t.join(5)
+    if errors:
+        raise errors[0]
 
-def run_bot():
-    cfg = load_settings()
+async def _run_tasks(bots):
+    async def one(bot):
+        try:
+            await bot.run_async()
+        except BaseException:
+            for b in bots:
+                b.stop()
+            raise
+    await asyncio.gather(*(one(b) for b in bots))
+
+def run_bot(cfg=None, feed=None, uni=None, on_start=None):
+    """
+    cfg/uni: settings and spotMeta universe when the caller already has them (fleet workers).
+    feed: market data to read instead of starting a MarketFeed (fleet.SharedFeed).
+    on_start(bots): called once the bots exist, before they run.
+    """
+    cfg = cfg or load_settings()
+    if cfg.SPANS_ENABLED:
+        enable_spans(True)
+    init_transport(cfg)
     init_info(cfg)
     init_exchange(cfg)
+    prewarm([cfg.BASE_URL])
+    start_keepalive([cfg.BASE_URL], cfg.HTTP_KEEPALIVE_SEC)
 
     verify_or_exit(cfg)
 
-    asset = resolve_asset_fields(cfg)
+    pairs = symbol_settings(cfg)
+    steps = start_steps(cfg)
+    attach_steps(steps)  # before resolving: assets start with the steps learned by earlier runs
+    registry = start_registry(cfg, uni)
+    attach_registry(registry)
+    try:
+        assets = [resolve_asset_fields(c) for c in pairs]
+    except BaseException:
+        attach_registry(None)
+        attach_steps(None)
+        registry.stop()
+        raise
+    indices = [a.index for a in assets if a.index is not None]
 
-    if cfg.PRICE is not None:
-        px0, _, _ = clamp_price_to_ref_band(asset.index, cfg.PRICE)
-        try:
-            smart_submit(cfg, asset, is_buy=True,  px=px0, sz=cfg.SIZE,
-                        tif=cfg.TIF, post_only=cfg.POST_ONLY, max_retries=cfg.RETRIES)
-        except Exception:
-            pass
-        try:
-            smart_submit(cfg, asset, is_buy=False, px=px0, sz=cfg.SIZE,
-                        tif=cfg.TIF, post_only=cfg.POST_ONLY, max_retries=cfg.RETRIES)
-        except Exception:
-            pass
+    batcher = None
+    signer = start_signer(cfg)
+    attach_signer(signer)
+    recorder = start_recorder(replace(cfg, RECORD_INDICES=cfg.RECORD_INDICES or tuple(indices)), None)
+    attach_recorder(recorder)
+    try:
+        if feed is not None:
+            attach_feed(feed)
+        elif cfg.WS_ENABLED and indices:
+            feed = start_feed(cfg, [f"@{i}" for i in indices])  # one connection for every pair
+            attach_feed(feed)
+            if recorder is not None:
+                recorder.tap_feed(feed)
+
+        if len(pairs) > 1 and cfg.BATCH_WINDOW_MS > 0:
+            batcher = ActionBatcher(cfg, cfg.BATCH_WINDOW_MS, cfg.CANCEL_BATCH_SIZE, cfg.HTTP_POOL_SIZE).start()
+            attach_batcher(batcher)
+
+        for c, asset in zip(pairs, assets):
+            if c.PRICE is not None:
+                _place_initial(c, asset)
 
-    bot = MakerBot(cfg, asset)
-    bot.run()
+        Bot = AsyncMakerBot if cfg.ENGINE == "async" else MakerBot
+        if len(pairs) == 1:
+            bots = [Bot(pairs[0], assets[0])]
+        else:
+            # Per-pair panels off; the first bot's renderer draws them all stacked.
+            bots = [Bot(replace(c, PANEL_FPS=0), a) for c, a in zip(pairs, assets)]
+        if feed is not None:
+            for b in bots:
+                b.orders.attach_feed(feed)  # order/fill streams for USER_ADDR on the same socket
+        if on_start is not None:
+            on_start(bots)
+        if len(bots) == 1:
+            bots[0].run()
+        else:
+            renderer = PanelRenderer(pairs[0], assets[0], bots[0].stats, fps=cfg.PANEL_FPS)
+            for b in bots[1:]:
+                renderer.add_panel(b.cfg, b.asset, b.stats)
+            renderer.start()
+            try:
+                if cfg.ENGINE == "async":
+                    asyncio.run(_run_tasks(bots))
+                else:
+                    _run_threads(bots)
+            finally:
+                renderer.stop()
+    finally:
+        if batcher is not None:
+            attach_batcher(None)
+            batcher.shutdown()
+        if feed is not None:
+            attach_feed(None)
+            feed.stop()
+        if signer is not None:
+            attach_signer(None)
+            signer.shutdown()
+        if recorder is not None:
+            attach_recorder(None)
+            recorder.stop()
+        attach_registry(None)
+        registry.stop()
+        if steps is not None:
+            attach_steps(None)
+            steps.close()
 
 def main():
     run_bot()
@@ -0,0 +1,244 @@
+# metrics.py
+"""
+Prometheus metrics without locks on the hot path. Every thread writes to its own cell
+(a dict per metric, created on first use); a scrape sums the cells. An exited thread's cell
+is folded into the metric's "retired" cell, so short-lived threads do not pile up cells.
+Histograms are HDR-style: log-linear microsecond buckets, 8 per power of two (<= 12.5%
+relative error), exported with power-of-two `le` bounds. State that already lives elsewhere (bot Stats, mids, live orders) is
+read at scrape time through collectors instead of being mirrored on every change.
+"""
+import math, threading, weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_SUB_BITS = 3
+_SUB = 1 << _SUB_BITS                       # sub-buckets per power of two
+_MAX_US = 1 << 27                           # ~134 s; slower samples land in the last bucket
+_NBUCKETS = _SUB + (_MAX_US.bit_length() - _SUB_BITS - 1) * _SUB
+_LE_EXP = range(6, _MAX_US.bit_length())    # exported bounds: 64 us .. 67 s
+_INF_LE = 'le="+Inf"'
+
+def _bucket(us: int) -> int:
+    if us < _SUB:
+        return max(0, us)
+    if us >= _MAX_US:
+        return _NBUCKETS - 1
+    shift = us.bit_length() - _SUB_BITS - 1
+    return _SUB + shift * _SUB + ((us >> shift) - _SUB)
+
+def _bucket_upper_us(i: int) -> int:
+    """Exclusive upper bound of bucket i, in microseconds."""
+    if i < _SUB:
+        return i + 1
+    shift, top = divmod(i - _SUB, _SUB)
+    return (_SUB + top + 1) << shift
+
+def _escape(v: str) -> str:
+    """Label value escaping of the text format: backslash, double quote and line feed."""
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt(v: float) -> str:
+    if isinstance(v, int):
+        return str(v)
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+class _Owner:
+    """Lives only in one thread's slot of a threading.local; collected when that thread exits."""
+    __slots__ = ("__weakref__",)
+
+class _Sharded:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._tls = threading.local()
+        self._retired: Dict = {}  # what exited threads wrote
+        self._cells: List[Dict] = [self._retired]
+        self._lock = threading.RLock()  # taken once per thread on its first write, and again when it exits
+
+    def _cell(self) -> Dict:
+        c = getattr(self._tls, "cell", None)
+        if c is None:
+            c = self._tls.cell = {}
+            self._tls.owner = owner = _Owner()
+            with self._lock:
+                self._cells.append(c)
+            weakref.finalize(owner, self._retire, c)
+        return c
+
+    def _retire(self, c: Dict):
+        with self._lock:
+            self._cells = [x for x in self._cells if x is not c]  # not remove(): equal cells compare ==
+            for k, v in c.items():
+                self._fold(k, v)
+
+    def _fold(self, k: Tuple, v):
+        raise NotImplementedError
+
+    def _items(self):
+        with self._lock:  # a cell is never counted both live and retired
+            items = [kv for c in self._cells for kv in list(c.items())]  # C-level copies: safe against owners inserting
+        return iter(items)
+
+    def reset(self):
+        with self._lock:
+            for c in self._cells:
+                c.clear()
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *labels, n: int = 1):
+        c = self._cell()
+        c[labels] = c.get(labels, 0) + n
+
+    def _fold(self, k: Tuple, v):
+        self._retired[k] = self._retired.get(k, 0) + v
+
+    def values(self) -> Dict[Tuple, float]:
+        out: Dict[Tuple, float] = {}
+        for k, v in self._items():
+            out[k] = out.get(k, 0) + v
+        return out
+
+    def value(self, *labels) -> float:
+        return self.values().get(labels, 0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt(v)}" for k, v in sorted(self.values().items())]
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def observe(self, seconds: float, *labels):
+        c = self._cell()
+        h = c.get(labels)
+        if h is None:
+            h = c[labels] = [[0] * _NBUCKETS, 0.0]
+        h[0][_bucket(int(seconds * 1e6))] += 1
+        h[1] += seconds
+
+    def _fold(self, k: Tuple, v):
+        h = self._retired.get(k)
+        if h is None:
+            self._retired[k] = [list(v[0]), v[1]]
+        else:
+            h[0] = [a + b for a, b in zip(h[0], v[0])]
+            h[1] += v[1]
+
+    def merged(self) -> Dict[Tuple, Tuple[List[int], float]]:
+        out: Dict[Tuple, Tuple[List[int], float]] = {}
+        for k, (counts, total) in self._items():
+            counts = list(counts)
+            if k in out:
+                prev, s = out[k]
+                out[k] = ([a + b for a, b in zip(prev, counts)], s + total)
+            else:
+                out[k] = (counts, total)
+        return out
+
+    def count(self, *labels) -> int:
+        h = self.merged().get(labels)
+        return sum(h[0]) if h else 0
+
+    def quantile(self, q: float, *labels) -> Optional[float]:
+        """Upper bound (seconds) of the bucket holding the q-th sample, or None if empty."""
+        h = self.merged().get(labels)
+        n = sum(h[0]) if h else 0
+        if not n:
+            return None
+        rank, seen = max(1, math.ceil(q * n)), 0
+        for i, c in enumerate(h[0]):
+            seen += c
+            if seen >= rank:
+                return _bucket_upper_us(i) / 1e6
+        return _MAX_US / 1e6
+
+    def render(self) -> List[str]:
+        out = []
+        for k, (counts, total) in sorted(self.merged().items()):
+            cum, i = 0, 0
+            for e in _LE_EXP:
+                bound = 1 << e
+                while i < _NBUCKETS and _bucket_upper_us(i) <= bound:
+                    cum += counts[i]
+                    i += 1
+                le = f'le="{bound / 1e6:g}"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, le)} {cum}")
+            n = sum(counts)
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, _INF_LE)} {n}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, k)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, k)} {n}")
+        return out
+
+# ---------- Registry ----------
+_metrics: Dict[str, _Sharded] = {}
+_collectors: List[Callable[[], Iterable[tuple]]] = []
+_reg_lock = threading.Lock()
+
+def _get(cls, name: str, help: str, labels: Tuple[str, ...]):
+    with _reg_lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = cls(name, help, labels)
+        return m
+
+def counter(name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+    return _get(Counter, name, help, labels)
+
+def histogram(name: str, help: str, labels: Tuple[str, ...] = ()) -> Histogram:
+    return _get(Histogram, name, help, labels)
+
+def add_collector(fn: Callable[[], Iterable[tuple]]):
+    """fn() -> [(name, "gauge"|"counter", help, {label: value}, value), ...], called per scrape."""
+    with _reg_lock:
+        _collectors.append(fn)
+
+def remove_collector(fn):
+    with _reg_lock:
+        if fn in _collectors:
+            _collectors.remove(fn)
+
+def render() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    with _reg_lock:
+        metrics, collectors = list(_metrics.values()), list(_collectors)
+    out: List[str] = []
+    for m in metrics:
+        out.append(f"# HELP {m.name} {m.help}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        out.extend(m.render())
+    groups: Dict[str, Tuple[str, str, List[str]]] = {}
+    for fn in collectors:
+        try:
+            samples = list(fn())
+        except Exception:
+            continue
+        for name, kind, help, labels, value in samples:
+            if value is None:
+                continue
+            g = groups.setdefault(name, (kind, help, []))
+            names = tuple(labels)
+            g[2].append(f"{name}{_fmt_labels(names, tuple(labels[n] for n in names))} {_fmt(value if isinstance(value, int) else float(value))}")
+    for name, (kind, help, lines) in groups.items():
+        out.append(f"# HELP {name} {help}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+# ---------- Bot metrics ----------
+ORDERS = counter("mm_orders_total", "Orders submitted, by side and final outcome", ("side", "outcome"))
+RETRIES = counter("mm_order_retries_total", "Order re-submissions, by reason", ("reason",))
+REJECTS = counter("mm_order_rejects_total", "Order attempts the exchange rejected, by reason", ("reason",))
+CLAMPS = counter("mm_presubmit_clamps_total", "Post-only prices moved off the cached BBO before signing, by side and BBO source", ("side", "source"))
+MODIFIES = counter("mm_order_modifies_total", "Standing quotes moved with batchModify (REQUOTE), by side and outcome", ("side", "outcome"))
+HTTP_SECONDS = histogram("mm_http_request_seconds", "HTTP request latency, by endpoint", ("endpoint",))
+SIGN_SECONDS = histogram("mm_sign_seconds", "Time to sign one action (incl. signer queue wait)")
+LOOP_LAG_SECONDS = histogram("mm_loop_lag_seconds", "How late the quote loop started each order slot", ("engine",))
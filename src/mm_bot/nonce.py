@@ -0,0 +1,99 @@
+# nonce.py
+import hashlib, os, re, struct, tempfile, threading, time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process guarantee only
+    fcntl = None
+
+NONCE_RESYNC_MS = 1000  # jump after a nonce reject that does not say which nonce the exchange expects
+_MS_NUMBER = re.compile(r"\d{12,}")
+
+def default_nonce_path(private_key: str) -> str:
+    """One counter file per wallet under the temp dir (file name is a hash, never the key)."""
+    tag = hashlib.sha256(private_key.lower().encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"mm_bot_nonce_{tag}.bin")
+
+class NonceAllocator:
+    """
+    Strictly increasing ms nonces that track wall time: next() = max(now_ms, last + 1).
+    Threads are serialised by a lock; with `path`, the last nonce also lives in a
+    flock()-protected 8-byte file so every process on the host using the same wallet
+    draws from one sequence.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._last = 0
+        self._fd: Optional[int] = None
+        self._fd_pid = 0
+        # metrics
+        self.issued = 0
+        self.bumped = 0        # wall clock had not advanced past the last nonce
+        self.max_lead_ms = 0   # furthest a nonce ran ahead of wall time
+        self.rejected = 0      # exchange replies that blamed the nonce
+        self.resynced = 0      # times the sequence was pushed forward after such a reply
+
+    def _file(self) -> int:
+        # flock is per open file description, so a forked child must reopen.
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def _bump(self, floor_of) -> int:
+        """Under both locks: last = floor_of(last) where last is the larger of ours and the file's."""
+        if self.path:
+            fd = self._file()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(fd, 8, 0)
+                n = floor_of(max(self._last, struct.unpack("<Q", raw)[0] if len(raw) == 8 else 0))
+                os.pwrite(fd, struct.pack("<Q", n), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            n = floor_of(self._last)
+        self._last = n
+        return n
+
+    def next(self) -> int:
+        with self._lock:
+            now = int(time.time() * 1000)
+            n = self._bump(lambda last: max(now, last + 1))
+            self.issued += 1
+            if n != now:
+                self.bumped += 1
+                self.max_lead_ms = max(self.max_lead_ms, n - now)
+            return n
+
+    def note_response(self, res) -> bool:
+        """
+        Count a rejected action if the exchange blamed the nonce and jump the sequence
+        NONCE_RESYNC_MS past it (or past a nonce quoted in the message), so the retry is
+        not refused as too old again; returns True if so.
+        """
+        if not (isinstance(res, dict) and res.get("status") == "err"):
+            return False
+        msg = str(res.get("response", ""))
+        if "nonce" not in msg.lower():
+            return False
+        quoted = max((int(x) for x in _MS_NUMBER.findall(msg)), default=None)
+        with self._lock:
+            self.rejected += 1
+            self.resynced += 1
+            self._bump(lambda last: max(last, quoted or 0) + NONCE_RESYNC_MS)
+        return True
+
+    def close(self):
+        """Release the counter file; a later next() reopens it."""
+        with self._lock:
+            if self._fd is not None and self._fd_pid == os.getpid():
+                os.close(self._fd)
+            self._fd = None
+
+    def metrics(self) -> Dict[str, int]:
+        return {"issued": self.issued, "bumped": self.bumped,
+                "max_lead_ms": self.max_lead_ms, "rejected": self.rejected, "resynced": self.resynced}
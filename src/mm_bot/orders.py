@@ -0,0 +1,406 @@
+# orders.py
+"""
+Order lifecycle as the exchange reports it: resting -> partial -> filled, or cancelled /
+rejected. A submit response opens the order; orderUpdates and userFills (WebSocket) move it on,
+and openOrders + userFillsByTime (REST) reconcile it whenever the socket is not live.
+Volume, notional and fill counts in Stats come from the fills themselves (fills of close-position
+IOCs, tagged by their cloid prefix, are counted apart from the maker fills); an order the exchange
+says is gone leaves `open`, so TTL expiry never sends a cancel for an order that already filled.
+
+Expiry is a min-heap of (deadline, seq, order): take_expired() pops only what is due, so a pass
+costs O(expired log n) instead of a scan of every live order. Orders that finish early are left
+in the heap and skipped when their deadline comes up (the heap is rebuilt if they pile up).
+
+With REQUOTE an expired order is moved to a new price by batchModify instead of being cancelled:
+on_modify gives it its new oid and price and restarts its TTL (the old heap entry is then skipped).
+"""
+import heapq, itertools, threading
+from collections import OrderedDict, deque
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from .clock import Clock, WALL_CLOCK
+from .exchange import entry_ok
+from .info import open_orders, user_fills_by_time
+from .utils import to_decimal_safe
+
+RESTING, PARTIAL, FILLED, CANCELLED, REJECTED = "resting", "partial", "filled", "cancelled", "rejected"
+OPEN_STATES = (RESTING, PARTIAL)
+GONE_ERROR = "already canceled, or filled"  # cancel reply for an order no longer on the book
+MODIFY_GONE_ERROR = "Cannot modify canceled or filled order"  # batchModify entry, same case
+MAX_CANCEL_FAILS = 3
+CLOSE_CLOID_PREFIX = "0xc105e"  # cloids of close-position IOCs (MakerBot.close_position)
+SYNC_GRACE_SEC = 2.0  # an order this young may be missing from openOrders only because of the race
+
+class TrackedOrder:
+    __slots__ = ("cloid", "oid", "is_buy", "px", "sz", "placed_at", "state", "filled",
+                 "cancelling", "cancel_fails", "error", "expires_at")
+
+    def __init__(self, cloid: str, is_buy: bool, px: Decimal, sz: Decimal, placed_at: float,
+                 oid: Optional[int] = None):
+        self.cloid = cloid
+        self.oid = oid
+        self.is_buy = is_buy
+        self.px = px                # limit price as submitted
+        self.sz = sz
+        self.placed_at = placed_at  # clock time of the submit reply
+        self.state = RESTING
+        self.filled = Decimal(0)
+        self.cancelling = False     # cancel sent, reply pending
+        self.cancel_fails = 0
+        self.error = ""
+        self.expires_at = 0.0       # TTL deadline in the expiry heap (0: none)
+
+    def __repr__(self) -> str:
+        side = "B" if self.is_buy else "A"
+        return f"TrackedOrder({self.cloid} oid={self.oid} {side} {self.sz}@{self.px} {self.state} filled={self.filled})"
+
+def is_close_cloid(cloid) -> bool:
+    return isinstance(cloid, str) and cloid.lower().startswith(CLOSE_CLOID_PREFIX)
+
+def _first_status(res) -> Dict:
+    resp = res.get("response") if isinstance(res, dict) else None
+    statuses = resp.get("data", {}).get("statuses", []) if isinstance(resp, dict) else []
+    return statuses[0] if statuses and isinstance(statuses[0], dict) else {}
+
+def _error_text(res) -> str:
+    """Entry error, or the whole-action failure (e.g. {"status": "err", "response": "..."})."""
+    err = _first_status(res).get("error")
+    return str(err if err else (res.get("response") if isinstance(res, dict) else res))
+
+class OrderManager:
+    """
+    One per bot. Called from the bot (submit / cancel results, REST sync) and from the feed
+    thread (WebSocket listeners); one lock guards the indexes and the fill counters in Stats.
+    """
+
+    def __init__(self, stats, asset, clock: Optional[Clock] = None, user: Optional[str] = None,
+                 ttl: float = 0.0, keep_done: int = 1000):
+        self.stats = stats
+        self.asset = asset
+        self.clock = clock or WALL_CLOCK
+        self.user = user or None
+        self.ttl = float(ttl or 0)  # <= 0: orders never expire
+        self.keep_done = int(keep_done)
+        self.open: Dict[str, TrackedOrder] = {}                      # cloid -> resting / partial
+        self.by_oid: Dict[int, TrackedOrder] = {}                    # open and recently finished
+        self.done: "OrderedDict[str, TrackedOrder]" = OrderedDict()  # finished, oldest first
+        self._early: "OrderedDict[int, Decimal]" = OrderedDict()     # filled size seen before the submit reply
+        self._expiry: List[tuple] = []                               # heap of (deadline, seq, order)
+        self._seq = itertools.count()
+        self._tids = set()
+        self._tid_fifo: deque = deque()
+        self._lock = threading.RLock()
+        self.since_ms = int(self.clock.time() * 1000)  # unmatched fills before this are not ours
+        self._fills_cursor = self.since_ms
+        self.synced_at = 0.0
+        self.feed = None
+        # metrics
+        self.ws_events = 0
+        self.rest_syncs = 0
+        self.ghosts = 0
+
+    def coins(self) -> Tuple[str, str]:
+        return self.asset.name, f"@{self.asset.index}"
+
+    def ws_live(self) -> bool:
+        return self.feed is not None and self.feed.is_live()
+
+    # ---------- State changes (lock held) ----------
+    def _finish(self, o: TrackedOrder, state: str):
+        self.open.pop(o.cloid, None)
+        o.state, o.cancelling = state, False
+        self.done[o.cloid] = o
+        while len(self.done) > self.keep_done:
+            _, old = self.done.popitem(last=False)
+            if old.oid is not None and self.by_oid.get(old.oid) is old:
+                del self.by_oid[old.oid]
+
+    def _schedule(self, o: TrackedOrder, deadline: float):
+        if self.ttl <= 0:
+            return
+        if len(self._expiry) > 2 * len(self.open) + 64:  # mostly finished orders: rebuild
+            self._expiry = [e for e in self._expiry if self.open.get(e[2].cloid) is e[2] and e[0] == e[2].expires_at]
+            heapq.heapify(self._expiry)
+        o.expires_at = deadline
+        heapq.heappush(self._expiry, (deadline, next(self._seq), o))
+
+    def _add_filled(self, o: TrackedOrder, sz: Decimal):
+        o.filled = min(o.sz, o.filled + sz)
+        if o.state in OPEN_STATES:
+            if o.filled >= o.sz:
+                self._finish(o, FILLED)
+            else:
+                o.state = PARTIAL
+
+    def _count_fill(self, is_buy: bool, sz: Decimal, px: Decimal, close: bool = False):
+        st = self.stats
+        if close:
+            st.close_fills += 1
+            st.vol_base_close += sz
+            st.notional_close += sz * px
+            return
+        st.fills += 1
+        if is_buy:
+            st.vol_base_buy += sz
+            st.notional_buy += sz * px
+        else:
+            st.vol_base_sell += sz
+            st.notional_sell += sz * px
+
+    def _seen(self, tid) -> bool:
+        if tid is None:
+            return False
+        if tid in self._tids:
+            return True
+        self._tids.add(tid)
+        self._tid_fifo.append(tid)
+        if len(self._tid_fifo) > 10000:
+            self._tids.discard(self._tid_fifo.popleft())
+        return False
+
+    def _lookup(self, oid, cloid) -> Optional[TrackedOrder]:
+        o = self.by_oid.get(oid) if oid is not None else None
+        if o is None and cloid:
+            o = self.open.get(cloid) or self.done.get(cloid)
+        return o
+
+    def _apply_fill(self, f: Dict) -> bool:
+        if not isinstance(f, dict) or f.get("coin") not in self.coins():
+            return False
+        oid = f.get("oid")
+        o = self._lookup(oid, f.get("cloid"))
+        if o is None and int(f.get("time") or 0) < self.since_ms:
+            return False
+        if self._seen(f.get("tid")):
+            return False
+        sz = to_decimal_safe(f.get("sz"), "fill.sz")
+        px = to_decimal_safe(f.get("px"), "fill.px")
+        if o is None and is_close_cloid(f.get("cloid")):
+            self._count_fill(f.get("side") == "B", sz, px, close=True)
+            return True
+        self._count_fill(f.get("side") == "B", sz, px)
+        if o is not None:
+            self._add_filled(o, sz)
+        elif oid is not None:  # ours in flight (reply not back yet), or an untracked order
+            self._early[oid] = self._early.get(oid, Decimal(0)) + sz
+            while len(self._early) > 256:
+                self._early.popitem(last=False)
+        return True
+
+    # ---------- Bot side ----------
+    def on_submit(self, cloid: str, is_buy: bool, px: Decimal, sz: Decimal, res) -> TrackedOrder:
+        """Final smart_submit response for one order: opens it, or records the rejection."""
+        st = _first_status(res)
+        with self._lock:
+            o = TrackedOrder(cloid, is_buy, px, sz, self.clock.time())
+            if "resting" in st:
+                o.oid = st["resting"].get("oid")
+            elif "filled" in st:
+                f = st["filled"]
+                o.oid = f.get("oid")
+                if self.user is None:  # no fill stream to wait for: the reply is all we learn
+                    total = to_decimal_safe(f.get("totalSz") or "0", "filled.totalSz")
+                    self._count_fill(is_buy, total, to_decimal_safe(f.get("avgPx") or px, "filled.avgPx"))
+                    o.filled = min(sz, total)
+                o.state = FILLED
+            else:
+                o.error = _error_text(res)[:200]
+                self.stats.rejected += 1
+                self._finish(o, REJECTED)
+                return o
+            if is_buy:
+                self.stats.total_buy += 1
+            else:
+                self.stats.total_sell += 1
+            if o.oid is not None:
+                self.by_oid[o.oid] = o
+                o.filled = min(sz, o.filled + self._early.pop(o.oid, Decimal(0)))
+            if o.state == FILLED or o.filled >= sz:
+                self._finish(o, FILLED)
+            else:
+                self.open[cloid] = o
+                self._schedule(o, o.placed_at + self.ttl)
+                if o.filled:
+                    o.state = PARTIAL
+            return o
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest pending expiry (may belong to an order that has since finished)."""
+        h = self._expiry
+        return h[0][0] if h else None
+
+    def take_expired(self) -> List[str]:
+        """Cloids of open orders past their TTL with no cancel in flight; marked as being cancelled."""
+        now = self.clock.time()
+        out = []
+        with self._lock:
+            h = self._expiry
+            while h and h[0][0] < now:
+                deadline, _, o = heapq.heappop(h)
+                if self.open.get(o.cloid) is o and not o.cancelling and deadline == o.expires_at:
+                    o.cancelling = True
+                    out.append(o.cloid)
+        return out
+
+    def remaining(self, cloid: str) -> Decimal:
+        """Unfilled size of open order `cloid` (0 once it has left `open`): what a requote moves."""
+        with self._lock:
+            o = self.open.get(cloid)
+            return o.sz - o.filled if o is not None else Decimal(0)
+
+    def on_modify(self, cloid: str, px: Decimal, sz: Decimal, res) -> Optional[TrackedOrder]:
+        """
+        batchModify reply for open order `cloid` (taken by take_expired): moved to px for sz (its
+        unfilled remainder, see remaining) under a new oid, its TTL restarted; None if the modify failed
+        (the order stays open unless the exchange says it is gone) or the order already left `open`
+        (see MakerBot.requote).
+        """
+        st = _first_status(res)
+        with self._lock:
+            o = self.open.get(cloid)
+            if o is None:
+                return None
+            moved = st.get("resting") or st.get("filled")
+            if not moved:
+                o.error = _error_text(res)[:200]
+                if MODIFY_GONE_ERROR in o.error:  # no cancel needed
+                    self.ghosts += 1
+                    self._finish(o, FILLED if o.filled >= o.sz else CANCELLED)
+                return None
+            if o.oid is not None and self.by_oid.get(o.oid) is o:
+                del self.by_oid[o.oid]
+            o.oid = moved.get("oid")
+            o.px, o.sz, o.placed_at, o.filled, o.state, o.cancelling = px, sz, self.clock.time(), Decimal(0), RESTING, False
+            if o.oid is not None:
+                self.by_oid[o.oid] = o
+                o.filled = min(o.sz, self._early.pop(o.oid, Decimal(0)))
+            if "filled" in st or o.filled >= o.sz:  # not with Alo; counted from userFills like any fill
+                self._finish(o, FILLED)
+            else:
+                self._schedule(o, o.placed_at + self.ttl)
+                if o.filled:
+                    o.state = PARTIAL
+            return o
+
+    def take_all(self) -> List[str]:
+        with self._lock:
+            for o in self.open.values():
+                o.cancelling = True
+            return list(self.open)
+
+    def on_cancel_results(self, cloids: List[str], results: List[Dict]) -> Tuple[int, int]:
+        """
+        Per-cloid cancel replies -> (cancelled, unresolved). "already canceled, or filled" means
+        the order is gone (a ghost): it is dropped, filled if its fills say so. Other failures stay
+        open for the next pass; after MAX_CANCEL_FAILS the order is dropped as cancelled.
+        """
+        ok = unresolved = 0
+        with self._lock:
+            for cloid, r in zip(cloids, results):
+                o = self.open.get(cloid)
+                if entry_ok(r):
+                    ok += 1
+                    if o is not None:
+                        self._finish(o, CANCELLED)
+                    continue
+                if o is None:
+                    continue
+                err = _error_text(r)
+                if GONE_ERROR in err:
+                    self.ghosts += 1
+                    self._finish(o, FILLED if o.filled >= o.sz else CANCELLED)
+                    continue
+                o.cancelling = False
+                o.cancel_fails += 1
+                o.error = err[:200]
+                if o.cancel_fails >= MAX_CANCEL_FAILS:
+                    self._finish(o, CANCELLED)
+                else:
+                    unresolved += 1
+                    self._schedule(o, o.placed_at + self.ttl)  # already due: retried on the next pass
+        return ok, unresolved
+
+    def drop_open(self, state: str = CANCELLED):
+        """Everything still open is gone (e.g. after a scheduled cancel-all)."""
+        with self._lock:
+            for o in list(self.open.values()):
+                self._finish(o, state)
+
+    # ---------- WebSocket ----------
+    def on_order_updates(self, data):
+        with self._lock:
+            for u in data if isinstance(data, list) else ():
+                od = u.get("order") or {}
+                if od.get("coin") not in self.coins():
+                    continue
+                o = self._lookup(od.get("oid"), od.get("cloid"))
+                if o is None:
+                    continue
+                self.ws_events += 1
+                if o.oid is not None and od.get("oid") not in (None, o.oid):
+                    continue  # the oid this order had before a modify
+                if o.oid is None and od.get("oid") is not None:
+                    o.oid = od["oid"]
+                    self.by_oid[o.oid] = o
+                status = str(u.get("status") or "")
+                if status == "open" or o.state not in OPEN_STATES:
+                    continue
+                if status == "filled":
+                    self._finish(o, FILLED)
+                elif status == "rejected":
+                    self._finish(o, REJECTED)
+                elif status.endswith(("canceled", "Canceled")):
+                    self._finish(o, FILLED if o.filled >= o.sz else CANCELLED)
+
+    def on_user_fills(self, data):
+        fills = data.get("fills") if isinstance(data, dict) else data
+        with self._lock:
+            for f in fills or ():
+                if self._apply_fill(f):
+                    self.ws_events += 1
+
+    def attach_feed(self, feed) -> bool:
+        """Follow orderUpdates / userFills for USER_ADDR on a feed.MarketFeed (one subscription per user)."""
+        if not self.user or not hasattr(feed, "add_listener"):
+            return False
+        feed.add_listener("orderUpdates", self.on_order_updates)
+        feed.add_listener("userFills", self.on_user_fills)
+        feed.subscribe({"type": "orderUpdates", "user": self.user})
+        feed.subscribe({"type": "userFills", "user": self.user})
+        self.feed = feed
+        return True
+
+    # ---------- REST fallback ----------
+    def sync_due(self, interval: float) -> bool:
+        return (interval > 0 and self.user is not None and not self.ws_live()
+                and self.clock.time() - self.synced_at >= interval)
+
+    def sync_rest(self):
+        """userFillsByTime since the last sync, then openOrders: tracked orders not listed are gone."""
+        now = self.clock.time()
+        self.synced_at = now
+        fills = user_fills_by_time(self.user, self._fills_cursor) or []
+        with self._lock:
+            for f in fills:
+                self._apply_fill(f)
+                self._fills_cursor = max(self._fills_cursor, int(f.get("time") or 0))
+        rows = open_orders(self.user) or []
+        live = {r.get("oid") for r in rows} | {r.get("cloid") for r in rows if r.get("cloid")}
+        with self._lock:
+            for o in list(self.open.values()):
+                if o.oid in live or o.cloid in live or now - o.placed_at < SYNC_GRACE_SEC:
+                    continue
+                self.ghosts += 1
+                self._finish(o, FILLED if o.filled >= o.sz else CANCELLED)
+        self.rest_syncs += 1
+
+    def maybe_sync(self, interval: float) -> bool:
+        if not self.sync_due(interval):
+            return False
+        try:
+            self.sync_rest()
+        except Exception:
+            self.stats.errors += 1
+            return False
+        return True
@@ -1,8 +1,13 @@
 # panel.py
 import sys
 import shutil
+import threading
+import time
 from decimal import Decimal
 
+from .profiling import spanned
+from .sched import Cadence
+
 # Windows: ให้ ANSI ทำงาน
 try:
     import colorama
@@ -54,15 +59,11 @@ def teardown_panel():
     sys.stdout.write("\x1b[?25h\n")
     sys.stdout.flush()
 
-def render_panel(cfg, asset, st) -> None:
+def panel_lines(cfg, asset, st, w: int) -> list:
     """
-    วาดแพแนล “คงที่” ไม่เลื่อนจอ:
-    - ใช้ \x1b[H ย้ายเคอร์เซอร์ไปบรรทัดแรกทุกครั้ง
-    - ใช้ \x1b[0J ลบตั้งแต่ตำแหน่งปัจจุบันถึงท้ายจอ (กันเศษบรรทัดเก่า)
-    - ไม่มีบรรทัด Errors ตามที่ขอ
+    Panel body as a list of lines of width w (no cursor control); see render_panel.
     """
     # สรุปค่า
-    w = _term_width()
     uptime = _human_time(__import__("time").time() - st.started_at)
 
     total_orders   = st.total_buy + st.total_sell
@@ -93,9 +94,7 @@ def render_panel(cfg, asset, st) -> None:
     # ความไม่สมดุลฝั่ง (Buy - Sell)
     imbalance = st.total_buy - st.total_sell
 
-    # ย้ายเคอร์เซอร์ขึ้นบนสุด + ลบหน้าจอจากตำแหน่งนี้ลงไป เพื่อ “ไม่เลื่อน”
     out = []
-    out.append("\x1b[H\x1b[0J")  # home + clear to end
 
     # Header
     out.append(f"┌{' Market Maker Bot ':=^{w-2}}┐")
@@ -112,13 +111,13 @@ def render_panel(cfg, asset, st) -> None:
     out.append(f"├{_line(w-2)}┤")
 
     # Totals
-    totals_l1 = f"Orders: {total_orders}  (Buy {st.total_buy} / Sell {st.total_sell})"
+    totals_l1 = f"Orders: {total_orders}  (Buy {st.total_buy} / Sell {st.total_sell})  Fills: {st.fills}"
     totals_l2 = f"Volume (base): {total_vol_base}   Notional≈ {_fmt_money(total_notional)}"
     pad2 = max(1, w - 4 - len(totals_l1) - len(totals_l2))
     out.append(f"│ {totals_l1}{' '*pad2}{totals_l2} │")
 
     # Admin (ตัด Errors ออกตามคำขอ)
-    admin_l = f"Cancels: {st.cancels}   Closes: {st.closes}   Imbalance(B-S): {imbalance:+d}"
+    admin_l = f"Cancels: {st.cancels}   Rejected: {st.rejected}   Closes: {st.closes}   Range trips: {st.range_trips}   Imbalance(B-S): {imbalance:+d}"
     out.append(f"│ {admin_l:<{w-2}} │")
     out.append(f"├{_line(w-2)}┤")
 
@@ -139,5 +138,99 @@ def render_panel(cfg, asset, st) -> None:
 
     out.append(f"└{_line(w-2, ch='=')}┘")
 
-    sys.stdout.write("\n".join(out))
-    sys.stdout.flush()
\ No newline at end of file
+    return out
+
+@spanned("render_panel")
+def render_panel(cfg, asset, st) -> None:
+    """
+    วาดแพแนล “คงที่” ไม่เลื่อนจอ:
+    - ใช้ \x1b[H ย้ายเคอร์เซอร์ไปบรรทัดแรกทุกครั้ง
+    - ใช้ \x1b[0J ลบตั้งแต่ตำแหน่งปัจจุบันถึงท้ายจอ (กันเศษบรรทัดเก่า)
+    - ไม่มีบรรทัด Errors ตามที่ขอ
+    """
+    out = panel_lines(cfg, asset, st, _term_width())
+    sys.stdout.write("\x1b[H\x1b[0J" + "\n".join(out))  # home + clear to end
+    sys.stdout.flush()
+
+class PanelRenderer:
+    """
+    Draws the panel from its own thread at most `fps` times per second, from a
+    Stats.snapshot() taken on that thread. Only lines that changed since the last
+    frame are rewritten. Does nothing when stdout is not a TTY (Docker logs) or fps <= 0.
+    Further pairs (multi-symbol) are stacked under the first one with add_panel.
+    """
+
+    def __init__(self, cfg, asset, stats, fps: float = 4.0):
+        self.cfg = cfg
+        self.asset = asset
+        self.stats = stats
+        self.panels = [(cfg, asset, stats)]
+        self.fps = float(fps)
+        self.enabled = self.fps > 0 and sys.stdout.isatty()
+        self.frames = 0
+        self._prev: list = []
+        self._width = 0
+        self._width_ts = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_panel(self, cfg, asset, stats):
+        self.panels.append((cfg, asset, stats))
+        self._prev = []
+
+    def _term_width_cached(self) -> int:
+        now = time.monotonic()
+        if now - self._width_ts >= 1.0:
+            w = _term_width()
+            if w != self._width:
+                self._prev = []  # layout changed -> full redraw
+            self._width, self._width_ts = w, now
+        return self._width
+
+    @spanned("panel_frame")
+    def frame(self) -> str:
+        """Escape sequence that turns the previous frame into the current one ("" if unchanged)."""
+        w = self._term_width_cached()
+        lines = []
+        for cfg, asset, stats in self.panels:
+            lines += panel_lines(cfg, asset, stats.snapshot(), w)
+        prev = self._prev
+        if not prev:
+            buf = ["\x1b[H\x1b[0J", "\n".join(lines)]
+        else:
+            buf = []
+            for i, ln in enumerate(lines):
+                if i >= len(prev) or prev[i] != ln:
+                    buf.append(f"\x1b[{i + 1};1H{ln}\x1b[K")
+            if len(lines) < len(prev):
+                buf.append(f"\x1b[{len(lines) + 1};1H\x1b[0J")
+        self._prev = lines
+        return "".join(buf)
+
+    def _loop(self):
+        render = Cadence("render", 1.0 / self.fps, start=time.monotonic())  # a slow frame drops the frames it overran
+        init_panel()
+        try:
+            while not self._stop.is_set():
+                if render.take(time.monotonic()):
+                    out = self.frame()
+                    if out:
+                        sys.stdout.write(out)
+                        sys.stdout.flush()
+                    self.frames += 1
+                self._stop.wait(max(0.0, render.next_at - time.monotonic()))
+        finally:
+            teardown_panel()
+
+    def start(self):
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._prev = []
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="panel")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2)
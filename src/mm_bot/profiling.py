@@ -0,0 +1,90 @@
+# profiling.py
+"""
+Where does a slow loop spend its time?
+
+- Spans: @spanned("name") around hot-path functions records their wall time into the
+  mm_span_seconds{span} histogram (see metrics). Off by default; enable_spans() turns them on
+  and off at runtime. A disabled span costs one global lookup and a branch.
+- Sampling profiler: sample_stacks(seconds) walks every thread's stack each `interval` and
+  returns collapsed stacks ("thread;file:func;file:func count" per line), the input format of
+  flamegraph.pl, speedscope and inferno. Nothing runs unless a profile is requested.
+"""
+import functools, inspect, os, sys, threading, time
+from typing import Dict, Optional
+
+from .metrics import histogram
+
+SPAN_SECONDS = histogram("mm_span_seconds", "Wall time inside instrumented hot-path functions", ("span",))
+_ON = False
+_profile_lock = threading.Lock()
+
+def enable_spans(on: bool = True):
+    global _ON
+    _ON = bool(on)
+
+def spans_enabled() -> bool:
+    return _ON
+
+def spanned(name: str):
+    """Decorator: time calls of a function (sync or async) into SPAN_SECONDS{span=name} while enabled."""
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*a, **kw):
+                if not _ON:
+                    return await fn(*a, **kw)
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*a, **kw)
+                finally:
+                    SPAN_SECONDS.observe(time.perf_counter() - t0, name)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _ON:
+                return fn(*a, **kw)
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **kw)
+            finally:
+                SPAN_SECONDS.observe(time.perf_counter() - t0, name)
+        return wrapper
+    return deco
+
+def span_summary() -> Dict[str, Dict]:
+    """Per span: calls, total seconds, p50/p99 (bucket upper bounds, seconds)."""
+    out = {}
+    for (name,), (counts, total) in SPAN_SECONDS.merged().items():
+        out[name] = {"count": sum(counts), "total_s": total,
+                     "p50_s": SPAN_SECONDS.quantile(0.5, name), "p99_s": SPAN_SECONDS.quantile(0.99, name)}
+    return out
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+def sample_stacks(seconds: float, interval: float = 0.005, max_depth: int = 128) -> str:
+    """Collapsed stacks of all other threads sampled for `seconds` (one profile at a time)."""
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("a profile is already running")
+    try:
+        me = threading.get_ident()
+        counts: Dict[str, int] = {}
+        end = time.monotonic() + max(0.0, seconds)
+        while time.monotonic() < end:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                f: Optional[object] = frame
+                while f is not None and len(stack) < max_depth:
+                    stack.append(_frame_label(f.f_code))
+                    f = f.f_back
+                stack.append(names.get(tid, f"thread-{tid}").replace(";", ":").replace(" ", "_"))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            time.sleep(interval)
+        return "".join(f"{k} {v}\n" for k, v in sorted(counts.items()))
+    finally:
+        _profile_lock.release()
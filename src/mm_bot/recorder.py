@@ -0,0 +1,302 @@
+# recorder.py
+"""
+Market-data recorder: the mids/BBOs the bot sees, one fixed-width column file per field.
+
+    {root}/{YYYYMMDD}/ts.f8 idx.i4 mid.f8 bid.f8 ask.f8 bid_sz.f8 ask_sz.f8   (little-endian, no header)
+    {root}/{YYYYMMDD}/index.i8   first row at or after each UTC minute start (1440 entries, -1 = none yet)
+
+Every column is a plain array, so np.memmap(path, dtype="<f8", mode="r") reads it as is.
+Missing values are NaN. Days rotate on the row's UTC date; ts is non-decreasing within a day.
+record() only appends to a deque; a writer thread flushes batches every `flush_sec`.
+"""
+import json, math, mmap, os, sys, threading, time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import Settings
+from .utils import to_decimal_safe
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts", "d"), ("idx", "i"), ("mid", "d"), ("bid", "d"), ("ask", "d"), ("bid_sz", "d"), ("ask_sz", "d"),
+)
+_SUFFIX = {"d": "f8", "i": "i4"}
+_DTYPE = {"d": "<f8", "i": "<i4"}
+_WIDTH = {"d": 8, "i": 4}
+MINUTES = 1440
+NAN = float("nan")
+
+def _fname(col: str, code: str) -> str:
+    return f"{col}.{_SUFFIX[code]}"
+
+def day_key(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+
+def _f(x) -> float:
+    return NAN if x is None else float(x)
+
+class Recorder:
+    def __init__(self, root: str, indices: Iterable[int], flush_sec: float = 0.5):
+        self.root = root
+        self.indices = set(int(i) for i in indices)
+        self.coins = {f"@{i}": i for i in self.indices}
+        self.flush_sec = float(flush_sec)
+        self._q: deque = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._day: Optional[str] = None
+        self._files: Dict[str, object] = {}
+        self._index_fd: Optional[int] = None
+        self._rows = 0
+        self._last_ts = 0.0
+        self._last_min = -1
+        # metrics
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    # ---------- Taps (any thread; O(1), no I/O) ----------
+    def record(self, idx: int, mid=None, bid=None, ask=None, bid_sz=None, ask_sz=None, ts: Optional[float] = None):
+        if idx not in self.indices:
+            return
+        self._q.append((ts or time.time(), idx, _f(mid), _f(bid), _f(ask), _f(bid_sz), _f(ask_sz)))
+        self.recorded += 1
+
+    def on_all_mids(self, data: Dict):
+        mids = data.get("mids") if isinstance(data, dict) else None
+        if not isinstance(mids, dict):
+            return
+        now = time.time()
+        for coin, idx in self.coins.items():
+            v = mids.get(coin)
+            if v is not None:
+                self.record(idx, mid=v, ts=now)
+
+    def on_bbo(self, data: Dict):
+        idx = self.coins.get(data.get("coin")) if isinstance(data, dict) else None
+        if idx is None:
+            return
+        bid, ask = (data.get("bbo") or [None, None])[:2]
+        bp = to_decimal_safe(bid["px"], "bbo.bid") if bid else None
+        ap = to_decimal_safe(ask["px"], "bbo.ask") if ask else None
+        self.record(idx, mid=(bp + ap) / 2 if bp is not None and ap is not None else None,
+                    bid=bp, ask=ap, bid_sz=bid.get("sz") if bid else None, ask_sz=ask.get("sz") if ask else None)
+
+    def tap_feed(self, feed):
+        """Record allMids and bbo pushes for our indices (subscribes bbo for any not yet subscribed)."""
+        feed.add_listener("allMids", self.on_all_mids)
+        feed.add_listener("bbo", self.on_bbo)
+        for coin in self.coins:
+            feed.subscribe_bbo(coin)
+
+    # ---------- Writer ----------
+    def _open_day(self, day: str):
+        self._close_day()
+        d = os.path.join(self.root, day)
+        os.makedirs(d, exist_ok=True)
+        meta = os.path.join(d, "meta.json")
+        if not os.path.exists(meta):
+            with open(meta, "w") as f:
+                json.dump({"columns": {c: {"file": _fname(c, k), "dtype": _DTYPE[k]} for c, k in COLUMNS},
+                           "index": {"file": "index.i8", "dtype": "<i8", "entries": MINUTES}}, f)
+        self._files = {c: open(os.path.join(d, _fname(c, k)), "ab") for c, k in COLUMNS}
+        sizes = [os.path.getsize(os.path.join(d, _fname(c, k))) // _WIDTH[k] for c, k in COLUMNS]
+        self._rows = min(sizes)
+        for (c, k), n in zip(COLUMNS, sizes):
+            if n != self._rows:  # torn write from a crash: drop the partial tail
+                self._files[c].truncate(self._rows * _WIDTH[k])
+                self._files[c].seek(0, os.SEEK_END)
+        ipath = os.path.join(d, "index.i8")
+        fresh = not os.path.exists(ipath)
+        self._index_fd = os.open(ipath, os.O_RDWR | os.O_CREAT, 0o644)
+        if fresh:
+            os.pwrite(self._index_fd, array("q", [-1] * MINUTES).tobytes(), 0)
+        idx = array("q", os.pread(self._index_fd, MINUTES * 8, 0))
+        self._last_min = max((m for m in range(MINUTES) if idx[m] >= 0), default=-1)
+        self._last_ts = 0.0
+        if self._rows:
+            with open(os.path.join(d, "ts.f8"), "rb") as f:
+                f.seek((self._rows - 1) * 8)
+                self._last_ts = array("d", f.read(8))[0]
+        self._day = day
+
+    def _close_day(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        if self._index_fd is not None:
+            os.close(self._index_fd)
+            self._index_fd = None
+        self._day = None
+
+    def _write(self, batch: List[tuple]):
+        batch.sort(key=lambda r: r[0])
+        start = 0
+        while start < len(batch):
+            day = day_key(batch[start][0])
+            end = start
+            while end < len(batch) and day_key(batch[end][0]) == day:
+                end += 1
+            if day != self._day:
+                self._open_day(day)
+            self._write_day(batch[start:end])
+            start = end
+
+    def _write_day(self, rows: List[tuple]):
+        cols = [array(k) for _, k in COLUMNS]
+        day0 = datetime.strptime(self._day, "%Y%m%d").replace(tzinfo=timezone.utc).timestamp()
+        for n, r in enumerate(rows):
+            ts = max(r[0], self._last_ts)
+            self._last_ts = ts
+            minute = min(MINUTES - 1, int((ts - day0) // 60))
+            if minute > self._last_min:
+                os.pwrite(self._index_fd, array("q", [self._rows + n] * (minute - self._last_min)).tobytes(),
+                          (self._last_min + 1) * 8)
+                self._last_min = minute
+            cols[0].append(ts)
+            for c, v in zip(cols[1:], r[1:]):
+                c.append(v)
+        for (name, _), c in zip(COLUMNS, cols):
+            if sys.byteorder != "little":
+                c.byteswap()
+            self._files[name].write(c.tobytes())
+        for f in self._files.values():
+            f.flush()
+        self._rows += len(rows)
+        self.written += len(rows)
+
+    def flush(self):
+        batch = []
+        while self._q:
+            batch.append(self._q.popleft())
+        if batch:
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                self.last_error = repr(e)
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_sec):
+            self.flush()
+        self.flush()
+        self._close_day()
+
+    def start(self) -> "Recorder":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="md-recorder")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+# ---------- Reader (zero-copy) ----------
+class DayFile:
+    """One recorded day, memory-mapped read-only; columns are memoryviews over the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._maps: Dict[str, mmap.mmap] = {}
+        counts = []
+        for c, k in COLUMNS:
+            p = os.path.join(path, _fname(c, k))
+            size = os.path.getsize(p) if os.path.exists(p) else 0
+            counts.append(size // _WIDTH[k])
+            if size:
+                with open(p, "rb") as f:
+                    self._maps[c] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.rows = min(counts)
+        self._cols = {c: (memoryview(self._maps[c])[:self.rows * _WIDTH[k]].cast(k) if self.rows else
+                          memoryview(array(k)))
+                      for c, k in COLUMNS}
+        ipath = os.path.join(path, "index.i8")
+        with open(ipath, "rb") if os.path.exists(ipath) else open(os.devnull, "rb") as f:
+            raw = f.read()
+        self.index = array("q", raw) if len(raw) == MINUTES * 8 else None
+        self.day0 = datetime.strptime(os.path.basename(path.rstrip(os.sep)), "%Y%m%d").replace(
+            tzinfo=timezone.utc).timestamp()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> memoryview:
+        return self._cols[name]
+
+    def _bound(self, t: float) -> int:
+        """First row with ts >= t: time index narrows the range, bisect finishes it."""
+        ts = self._cols["ts"]
+        lo, hi = 0, self.rows
+        if self.index is not None:
+            m = int((t - self.day0) // 60)
+            if m < 0:
+                return 0
+            if m >= MINUTES:
+                return self.rows
+            start = self.index[m]
+            if start >= 0:
+                lo = start
+            nxt = next((self.index[j] for j in range(m + 1, MINUTES) if self.index[j] >= 0), -1)
+            if nxt >= 0:
+                hi = nxt
+            if start < 0 and nxt < 0:
+                return self.rows
+        return bisect_left(ts, t, lo, hi)
+
+    def slice(self, t0: float, t1: float) -> Dict[str, memoryview]:
+        """Rows with t0 <= ts < t1 as column memoryviews (no copies)."""
+        a, b = self._bound(t0), self._bound(t1)
+        return {c: v[a:b] for c, v in self._cols.items()}
+
+    def close(self):
+        self._cols = {}
+        for m in self._maps.values():
+            try:
+                m.close()
+            except BufferError:  # a caller still holds a slice; the mapping goes with it
+                pass
+        self._maps = {}
+
+def days(root: str, t0: float, t1: float) -> List[str]:
+    """Day directories overlapping [t0, t1), oldest first."""
+    lo, hi = day_key(t0), day_key(max(t0, t1 - 1e-6))
+    if not os.path.isdir(root):
+        return []
+    return [os.path.join(root, d) for d in sorted(os.listdir(root)) if d.isdigit() and lo <= d <= hi]
+
+def read_range(root: str, t0: float, t1: float) -> Iterator[Dict[str, memoryview]]:
+    """Zero-copy column slices for [t0, t1), one dict per day file."""
+    for path in days(root, t0, t1):
+        yield DayFile(path).slice(t0, t1)
+
+def iter_rows(root: str, t0: float = 0.0, t1: float = float("inf"), idx: Optional[int] = None) -> Iterator[Dict]:
+    """Row dicts (NaN -> None) for [t0, t1), optionally one spot index only."""
+    t1 = min(t1, time.time() + 86400)
+    if t0 <= 0:
+        ds = [d for d in (sorted(os.listdir(root)) if os.path.isdir(root) else []) if d.isdigit()]
+        if not ds:
+            return
+        t0 = datetime.strptime(ds[0], "%Y%m%d").replace(tzinfo=timezone.utc).timestamp()
+    names = [c for c, _ in COLUMNS]
+    for cols in read_range(root, t0, t1):
+        vals = [cols[c] for c in names]
+        for i in range(len(vals[0])):
+            if idx is not None and vals[1][i] != idx:
+                continue
+            yield {c: (None if isinstance(v[i], float) and math.isnan(v[i]) else v[i]) for c, v in zip(names, vals)}
+
+def start_recorder(cfg: Settings, default_index: Optional[int]) -> Optional[Recorder]:
+    """Recorder per RECORD_DIR / RECORD_INDICES (default: the traded index), or None when off."""
+    if not cfg.RECORD_DIR:
+        return None
+    indices = cfg.RECORD_INDICES or ([default_index] if default_index is not None else [])
+    if not indices:
+        return None
+    return Recorder(cfg.RECORD_DIR, indices).start()
@@ -0,0 +1,329 @@
+# registry.py
+import hashlib, json, os, tempfile, threading, time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import Settings
+from .info import AssetInfo, asset_from_entry, get_universe, parse_index, symbol_not_found
+
+def _host_tag(base_url: str) -> str:
+    return hashlib.sha256(base_url.rstrip("/").lower().encode()).hexdigest()[:16]
+
+def default_registry_path(base_url: str) -> str:
+    """One spotMeta cache per API host under the temp dir (mainnet and testnet never mix)."""
+    return os.path.join(tempfile.gettempdir(), f"mm_bot_spotmeta_{_host_tag(base_url)}.json")
+
+def default_steps_path(base_url: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"mm_bot_steps_{_host_tag(base_url)}.json")
+
+def _write_json(path: str, d: Dict, what: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(d, f, separators=(",", ":"))
+        os.replace(tmp, path)  # readers see the old or the new file, never half of one
+    except OSError as e:
+        print(f"[{what}] cannot write {path}: {e}", flush=True)
+
+def universe_hash(uni: list) -> str:
+    return hashlib.sha256(json.dumps(uni, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+class AssetRegistry:
+    """
+    The spotMeta universe, indexed by name, @index and asset id, persisted to `path` so that a
+    restart within `ttl` seconds resolves its symbols without a network call. A background thread
+    re-fetches once the copy is older than `ttl`; when the hash changes the indexes are rebuilt
+    and every AssetInfo handed out by resolve() gets its new tick/lot/decimals in place.
+    """
+
+    def __init__(self, path: Optional[str], ttl: float = 3600.0, base_url: str = "",
+                 fetch: Callable[[], list] = get_universe):
+        self.path = path
+        self.ttl = max(0.0, float(ttl))
+        self.base_url = base_url
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self.universe: list = []
+        self.hash = ""
+        self.fetched_at = 0.0
+        self.source = ""  # "disk" | "network" | "given"
+        self._by_name: Dict[str, int] = {}
+        self._resolved: Dict[str, Tuple[Settings, AssetInfo]] = {}  # SYMBOL -> (cfg, handed-out AssetInfo)
+        self.changes: List[str] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # metrics
+        self.fetches = 0
+        self.refresh_errors = 0
+
+    # ---------- Lookups (O(1)) ----------
+    def entry(self, idx: int) -> Optional[Dict]:
+        uni = self.universe
+        return uni[idx] if 0 <= idx < len(uni) else None
+
+    def index_of(self, name: str) -> Optional[int]:
+        return self._by_name.get(name.upper())
+
+    def by_asset_id(self, asset_id: int) -> Optional[Dict]:
+        return self.entry(asset_id - 10000)
+
+    def resolve(self, cfg: Settings) -> AssetInfo:
+        """Same result as info.resolve_asset_fields(cfg, universe); one AssetInfo object per SYMBOL."""
+        hit = self._resolved.get(cfg.SYMBOL)
+        if hit is not None:
+            return hit[1]
+        idx = parse_index(cfg.SYMBOL)
+        if idx is None:
+            idx = self.index_of(cfg.SYMBOL)
+            if idx is None and self.source == "disk":
+                self.refresh()  # listed after the cache was written?
+                idx = self.index_of(cfg.SYMBOL)
+            if idx is None:
+                raise symbol_not_found(cfg.SYMBOL, self.universe)
+        asset = asset_from_entry(cfg, self.entry(idx), idx)
+        with self._lock:
+            self._resolved[cfg.SYMBOL] = (cfg, asset)
+        return asset
+
+    # ---------- Loading ----------
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def _read_disk(self) -> Optional[Dict]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path) as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return None
+        uni = d.get("universe")
+        if d.get("base_url") != self.base_url or not isinstance(uni, list) or universe_hash(uni) != d.get("hash"):
+            return None
+        return d
+
+    def _write_disk(self):
+        if not self.path:
+            return
+        d = {"base_url": self.base_url, "ts": self.fetched_at, "hash": self.hash, "universe": self.universe}
+        _write_json(self.path, d, "registry")
+
+    def _install(self, uni: list, h: str, ts: float, source: str):
+        by_name = {a.get("name", "").upper(): i for i, a in enumerate(uni) if a.get("name")}
+        with self._lock:
+            self.universe, self._by_name, self.hash, self.fetched_at, self.source = uni, by_name, h, ts, source
+            resolved = list(self._resolved.values())
+        for cfg, asset in resolved:
+            if asset.index is None:
+                continue
+            new = asset_from_entry(cfg, self.entry(asset.index), asset.index)
+            for k in ("tick_sz", "lot_sz", "px_dec", "sz_dec"):
+                old = getattr(asset, k)
+                if getattr(new, k) != old:
+                    msg = f"{asset.name}: {k} {old} -> {getattr(new, k)}"
+                    self.changes.append(msg)
+                    print(f"[registry] {msg}", flush=True)
+                    setattr(asset, k, getattr(new, k))
+
+    def refresh(self) -> bool:
+        """Fetch spotMeta now; True if the universe changed."""
+        uni = self.fetch()
+        self.fetches += 1
+        h = universe_hash(uni)
+        if h == self.hash:
+            self.fetched_at, self.source = time.time(), "network"
+            self._write_disk()
+            return False
+        self._install(uni, h, time.time(), "network")
+        self._write_disk()
+        return True
+
+    def load(self, uni: Optional[list] = None) -> "AssetRegistry":
+        """
+        uni given: use it (and persist it). Otherwise the disk copy if younger than ttl, else a
+        fetch; an older disk copy is still used when the fetch fails.
+        """
+        if uni is not None:
+            self._install(uni, universe_hash(uni), time.time(), "given")
+            self._write_disk()
+            return self
+        d = self._read_disk()
+        if d is not None and time.time() - float(d.get("ts") or 0) < self.ttl:
+            self._install(d["universe"], d["hash"], float(d["ts"]), "disk")
+            return self
+        try:
+            self.refresh()
+        except Exception as e:
+            if d is None:
+                raise
+            print(f"[registry] spotMeta fetch failed ({e!r}); using cached copy from {self.path}", flush=True)
+            self._install(d["universe"], d["hash"], float(d["ts"]), "disk")
+        return self
+
+    # ---------- Background refresh ----------
+    def _loop(self):
+        wait = max(1.0, self.ttl - self.age())
+        while not self._stop.wait(wait):
+            try:
+                self.refresh()
+                wait = max(1.0, self.ttl)
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"[registry] refresh failed: {e!r}", flush=True)
+                wait = min(60.0, max(1.0, self.ttl))
+
+    def start(self) -> "AssetRegistry":
+        if self.ttl > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="asset-registry")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+def start_registry(cfg: Settings, uni: Optional[list] = None) -> AssetRegistry:
+    """AssetRegistry per ASSET_CACHE_FILE / ASSET_CACHE_TTL_SEC, loaded, refreshing in the background."""
+    path = cfg.ASSET_CACHE_FILE or default_registry_path(cfg.BASE_URL)
+    return AssetRegistry(path, cfg.ASSET_CACHE_TTL_SEC, cfg.BASE_URL).load(uni).start()
+
+class StepRegistry:
+    """
+    Tick / lot sizes learned from "Price must be divisible by tick size" / "invalid size" rejects,
+    per asset id, persisted to `path`. An entry is created once an order was accepted at the
+    learned step, and set on the AssetInfo objects in place (info.asset_from_entry applies it to
+    every asset resolved later, restarts included), so orders use it from the first attempt.
+    `conf` counts the orders accepted at it. An entry is dropped when an order placed at it is
+    rejected for that step, and expires `ttl` seconds after it was learned: the spotMeta step
+    comes back and is learned again if the exchange still refuses it.
+    """
+
+    def __init__(self, path: Optional[str], ttl: float = 86400.0, base_url: str = ""):
+        self.path = path
+        self.ttl = float(ttl)
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self.entries: Dict[int, Dict] = {}  # asset id -> {"name", "tick", "lot", "conf", "learned_at"}
+        self._base: Dict[int, Tuple[Decimal, Decimal]] = {}  # asset id -> spotMeta (tick, lot) we replaced
+        self._gone: set = set()  # asset ids dropped here: removed from the file on save
+        self._dirty = False
+        # metrics
+        self.learned = 0
+        self.dropped = 0
+
+    def _expired(self, e: Dict) -> bool:
+        return time.time() - float(e.get("learned_at") or 0) > self.ttl
+
+    def _read_disk(self) -> Dict[int, Dict]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path) as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if d.get("base_url") != self.base_url or not isinstance(d.get("steps"), dict):
+            return {}
+        out = {}
+        for aid, e in d["steps"].items():
+            try:
+                Decimal(e["tick"]), Decimal(e["lot"])
+                if not self._expired(e):
+                    out[int(aid)] = e
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                continue
+        return out
+
+    def load(self) -> "StepRegistry":
+        self.entries.update(self._read_disk())
+        return self
+
+    def save(self):
+        """Merged into the file: other processes (fleet workers) keep the entries of their own pairs."""
+        if not self.path:
+            return
+        steps = self._read_disk()
+        with self._lock:
+            for aid in self._gone:
+                steps.pop(aid, None)
+            steps.update((aid, dict(e)) for aid, e in self.entries.items())
+            self._dirty = False
+        _write_json(self.path, {"base_url": self.base_url, "steps": {str(k): v for k, v in steps.items()}}, "steps")
+
+    def apply(self, asset: AssetInfo) -> AssetInfo:
+        """Learned steps onto a freshly resolved AssetInfo (its own tick/lot are kept as the base)."""
+        e = self.entries.get(asset.asset_id)
+        if e is None or self._expired(e):
+            return asset
+        self._base[asset.asset_id] = (asset.tick_sz, asset.lot_sz)
+        asset.tick_sz, asset.lot_sz = Decimal(e["tick"]), Decimal(e["lot"])
+        return asset
+
+    def _drop(self, asset: AssetInfo, why: str, field: Optional[str] = None):
+        """Back to the spotMeta step for `field` ("tick" / "lot"; None = both); the entry goes once nothing learned is left."""
+        aid = asset.asset_id
+        base = self._base.get(aid, (asset.tick_sz, asset.lot_sz))
+        e = self.entries.get(aid)
+        if field in (None, "tick"):
+            asset.tick_sz = base[0]
+        if field in (None, "lot"):
+            asset.lot_sz = base[1]
+        if e is not None and (asset.tick_sz, asset.lot_sz) != base:
+            e["tick"], e["lot"] = str(asset.tick_sz), str(asset.lot_sz)
+        else:
+            self.entries.pop(aid, None)
+            self._base.pop(aid, None)
+            self._gone.add(aid)
+        self.dropped += 1
+        print(f"[steps] {asset.name}: learned {field or 'tick/lot'} {why}; now {asset.tick_sz}/{asset.lot_sz}", flush=True)
+
+    def on_accepted(self, asset: AssetInfo, tick: Decimal, lot: Decimal):
+        """An order was accepted at (tick, lot): learn them if they differ from the asset's, else confirm."""
+        aid = asset.asset_id
+        if tick == asset.tick_sz and lot == asset.lot_sz:
+            e = self.entries.get(aid)
+            if e is None:
+                return
+            with self._lock:
+                if not self._expired(e):
+                    e["conf"] = int(e.get("conf") or 0) + 1
+                    self._dirty = True  # written with the next change, or by close()
+                    return
+                self._drop(asset, "expired")
+        else:
+            with self._lock:
+                self._base.setdefault(aid, (asset.tick_sz, asset.lot_sz))
+                self._gone.discard(aid)
+                self.entries[aid] = {"name": asset.name, "tick": str(tick), "lot": str(lot), "conf": 1,
+                                     "learned_at": time.time()}
+                asset.tick_sz, asset.lot_sz = tick, lot
+                self.learned += 1
+            print(f"[steps] {asset.name}: learned tick {tick} lot {lot}", flush=True)
+        self.save()
+
+    def on_reject(self, asset: AssetInfo, reason: str, tick: Decimal, lot: Decimal):
+        """A tick_size (size) reject of an order placed at a learned tick (lot) drops that step."""
+        aid = asset.asset_id
+        base = self._base.get(aid)
+        if aid not in self.entries or base is None or (tick, lot) != (asset.tick_sz, asset.lot_sz):
+            return
+        field = {"tick_size": "tick", "size": "lot"}.get(reason)
+        if field is None or (tick if field == "tick" else lot) == base[0 if field == "tick" else 1]:
+            return  # not a learned step that was refused
+        with self._lock:
+            self._drop(asset, f"rejected ({reason})", field)
+        self.save()
+
+    def close(self):
+        """Persist confirmations counted since the last write."""
+        if self._dirty:
+            self.save()
+
+def start_steps(cfg: Settings) -> Optional[StepRegistry]:
+    """StepRegistry per STEPS_FILE / STEPS_TTL_SEC (None when STEPS_TTL_SEC <= 0: nothing is learned)."""
+    if cfg.STEPS_TTL_SEC <= 0:
+        return None
+    return StepRegistry(cfg.STEPS_FILE or default_steps_path(cfg.BASE_URL), cfg.STEPS_TTL_SEC, cfg.BASE_URL).load()
@@ -0,0 +1,112 @@
+# sched.py
+"""
+Deadline scheduling on a monotonic clock. Each Cadence keeps its own grid of slots
+(start + k * interval): a slow step delays the next run but never shifts the grid, and when the
+loop comes back late the slots it missed are handled by an explicit policy:
+
+- skip:     drop them, the due one included; run again at the next slot still ahead
+- coalesce: run once now for all of them, then continue on the grid
+- catchup:  run every missed slot back to back (a burst; what `next_ts += interval` did)
+
+How late each run started goes to mm_sched_lag_seconds{cadence}; dropped or merged slots to
+mm_sched_missed_slots_total{cadence}.
+"""
+import asyncio, threading
+from typing import Awaitable, Callable, List, Optional
+
+from .clock import Clock, WALL_CLOCK
+from .metrics import counter, histogram
+
+SKIP, COALESCE, CATCH_UP = "skip", "coalesce", "catchup"
+POLICIES = (SKIP, COALESCE, CATCH_UP)
+
+SCHED_LAG_SECONDS = histogram("mm_sched_lag_seconds", "How late each scheduled step started, by cadence", ("cadence",))
+MISSED_SLOTS = counter("mm_sched_missed_slots_total", "Slots dropped (skip) or merged (coalesce) because the loop was late", ("cadence",))
+
+class Cadence:
+    __slots__ = ("name", "interval", "policy", "fn", "next_at", "lag", "runs", "missed")
+
+    def __init__(self, name: str, interval: float, fn: Optional[Callable] = None, policy: str = COALESCE,
+                 start: float = 0.0):
+        if interval <= 0:
+            raise ValueError(f"cadence {name}: interval must be > 0, got {interval}")
+        if policy not in POLICIES:
+            raise ValueError(f"cadence {name}: policy must be one of {', '.join(POLICIES)}, got {policy!r}")
+        self.name = name
+        self.interval = float(interval)
+        self.policy = policy
+        self.fn = fn
+        self.next_at = float(start)  # monotonic deadline of the next slot
+        self.lag = 0.0               # how late the last run started
+        self.runs = 0
+        self.missed = 0
+
+    def take(self, now: float) -> bool:
+        """True if a step is due at `now` (run it); advances the deadline per the missed-slot policy."""
+        if now < self.next_at:
+            return False
+        late = now - self.next_at
+        behind = int(late // self.interval)  # further slots that are also already due
+        if not behind or self.policy == CATCH_UP:
+            self.next_at += self.interval
+        else:
+            self.next_at += (behind + 1) * self.interval
+            dropped = behind + 1 if self.policy == SKIP else behind
+            self.missed += dropped
+            MISSED_SLOTS.inc(self.name, n=dropped)
+            if self.policy == SKIP:
+                return False
+        self.lag = late
+        self.runs += 1
+        SCHED_LAG_SECONDS.observe(late, self.name)
+        return True
+
+    def defer(self, slots: int = 1):
+        """The step used `slots` more slots (e.g. a buy+sell pair counts as two orders)."""
+        self.next_at += slots * self.interval
+
+class Scheduler:
+    """Runs several cadences from one thread: each due step in turn, then sleeps until the next deadline."""
+
+    def __init__(self, clock: Optional[Clock] = None, max_sleep: float = 0.25):
+        self.clock = clock or WALL_CLOCK
+        self.max_sleep = float(max_sleep)
+        self.cadences: List[Cadence] = []
+
+    def add(self, name: str, interval: float, fn: Callable, policy: str = COALESCE,
+            start: Optional[float] = None) -> Cadence:
+        c = Cadence(name, interval, fn, policy, self.clock.monotonic() if start is None else start)
+        self.cadences.append(c)
+        return c
+
+    def run_due(self) -> int:
+        n = 0
+        for c in self.cadences:
+            if c.take(self.clock.monotonic()):
+                c.fn()
+                n += 1
+        return n
+
+    def next_deadline(self) -> Optional[float]:
+        return min((c.next_at for c in self.cadences), default=None)
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            self.run_due()
+            nxt = self.next_deadline()
+            if nxt is None:
+                return
+            delay = nxt - self.clock.monotonic()
+            if delay > 0:
+                self.clock.sleep(min(delay, self.max_sleep))
+
+async def run_cadence(c: Cadence, step: Callable[[], Awaitable], stop: threading.Event,
+                      clock: Optional[Clock] = None, max_sleep: float = 0.25):
+    """asyncio task body: await step() on every slot `c` says is due, until stop is set."""
+    clock = clock or WALL_CLOCK
+    while not stop.is_set():
+        now = clock.monotonic()
+        if c.take(now):
+            await step()
+        elif now < c.next_at:
+            await asyncio.sleep(min(max_sleep, c.next_at - now))
@@ -0,0 +1,70 @@
+# signer.py
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+from pybotters.helpers import hyperliquid as hlh
+
+from .config import Settings
+
+# Loaded once per worker by _init_worker (process pool: per process; thread pool: once for the pool).
+_WORKER_KEY: str | None = None
+_WORKER_MAINNET: bool = True
+
+def _init_worker(private_key: str, is_mainnet: bool):
+    global _WORKER_KEY, _WORKER_MAINNET
+    _WORKER_KEY, _WORKER_MAINNET = private_key, is_mainnet
+
+def sign_payload(private_key: str, is_mainnet: bool, action: Dict, nonce: int) -> Dict:
+    """msgpack + keccak phantom agent, then secp256k1 EIP-712 signature -> /exchange body."""
+    domain, types, message = hlh.construct_l1_action(action=action, nonce=nonce, is_mainnet=is_mainnet)
+    signature = hlh.sign_typed_data(private_key, domain, types, message)
+    return {"action": action, "nonce": nonce, "signature": signature}
+
+def _sign_in_worker(action: Dict, nonce: int) -> Dict:
+    return sign_payload(_WORKER_KEY, _WORKER_MAINNET, action, nonce)
+
+class SigningService:
+    """
+    Signs actions off the calling thread. kind="process" gives real parallelism (signing is
+    pure-Python ECDSA and holds the GIL); kind="thread" only moves the work off the caller.
+    """
+
+    def __init__(self, private_key: str, is_mainnet: bool, workers: int = 2, kind: str = "process"):
+        workers = max(1, int(workers))
+        pool_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        self.kind = kind
+        self.workers = workers
+        self._pool: Executor = pool_cls(max_workers=workers, initializer=_init_worker,
+                                        initargs=(private_key, is_mainnet))
+
+    def submit(self, action: Dict, nonce: int) -> Future:
+        """Future resolving to {"action", "nonce", "signature"}."""
+        return self._pool.submit(_sign_in_worker, action, nonce)
+
+    def sign(self, action: Dict, nonce: int) -> Dict:
+        return self.submit(action, nonce).result()
+
+    def sign_many(self, actions: List[tuple[Dict, int]]) -> List[Dict]:
+        """Sign several (action, nonce) pairs concurrently; results in input order."""
+        futs = [self.submit(a, n) for a, n in actions]
+        return [f.result() for f in futs]
+
+    def warm_up(self):
+        """Spawn every worker now (and load the key) instead of on the first order."""
+        self.sign_many([({"type": "scheduleCancel"}, i) for i in range(self.workers)])
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+def start_signer(cfg: Settings) -> SigningService | None:
+    """SigningService per SIGNER_WORKERS / SIGNER_KIND, or None to keep signing inline."""
+    if cfg.SIGNER_WORKERS <= 0:
+        return None
+    kind = cfg.SIGNER_KIND if cfg.SIGNER_KIND in ("process", "thread") else "process"
+    workers = cfg.SIGNER_WORKERS
+    if kind == "process":
+        workers = min(workers, os.cpu_count() or 1)
+    svc = SigningService(cfg.PRIVATE_KEY, cfg.IS_MAINNET, workers=workers, kind=kind)
+    svc.warm_up()
+    return svc
@@ -0,0 +1,702 @@
+# sim.py
+"""
+Local spot exchange simulator (the /info, /exchange and /ws subset this package uses):
+
+    python -m mm_bot.sim --port 8080 --delay-ms 50
+    BASE_URL=http://127.0.0.1:8080 SYMBOL=@223 IS_MAINNET=false python -m mm_bot.main
+
+One price-time priority book per market, with background liquidity ("house" levels around a
+random-walk fair value) and random taker flow. Every signed action is treated as coming from a
+single account ("user"): signatures are not verified, nonces are (duplicates / too old are rejected),
+and balances are tracked but not enforced.
+"""
+import argparse, asyncio, heapq, json, math, random, threading, time
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web, WSMsgType
+
+from .clock import Clock, WALL_CLOCK
+from .fixed import fixed_step
+
+USER, HOUSE, FLOW = "user", "house", "flow"
+NONCE_WINDOW = 100  # like the exchange: a nonce must beat the smallest of the last 100 used
+USER_CHANNELS = ("orderUpdates", "userFills")
+
+class SimOrder:
+    __slots__ = ("oid", "cloid", "owner", "asset", "is_buy", "px", "sz", "orig_sz", "ts")
+
+    def __init__(self, oid: int, owner: str, asset: int, is_buy: bool, px: Optional[int], sz: int,
+                 cloid: Optional[str] = None):
+        self.oid = oid
+        self.cloid = cloid
+        self.owner = owner
+        self.asset = asset
+        self.is_buy = is_buy
+        self.px = px          # price units (None = market)
+        self.sz = sz          # remaining size units
+        self.orig_sz = sz
+        self.ts = 0           # placement time, ms
+
+class SimBook:
+    """Price-time priority: price units -> FIFO of resting orders; sorted price list per side."""
+
+    def __init__(self):
+        self.bids: Dict[int, deque] = {}
+        self.asks: Dict[int, deque] = {}
+        self._bid_px: List[int] = []  # ascending, best = last
+        self._ask_px: List[int] = []  # ascending, best = first
+        self.version = 0
+
+    def _side(self, is_buy: bool):
+        return (self.bids, self._bid_px) if is_buy else (self.asks, self._ask_px)
+
+    def best(self, is_buy: bool) -> Optional[int]:
+        if is_buy:
+            return self._bid_px[-1] if self._bid_px else None
+        return self._ask_px[0] if self._ask_px else None
+
+    def queue(self, is_buy: bool, px: int):
+        """Resting orders at px, front of the queue first (empty if no level)."""
+        return self._side(is_buy)[0].get(px) or ()
+
+    def crosses(self, is_buy: bool, px: Optional[int]) -> bool:
+        opp = self.best(not is_buy)
+        return opp is not None and (px is None or (px >= opp if is_buy else px <= opp))
+
+    def add(self, o: SimOrder):
+        side, pxs = self._side(o.is_buy)
+        q = side.get(o.px)
+        if q is None:
+            q = side[o.px] = deque()
+            insort(pxs, o.px)
+        q.append(o)
+        self.version += 1
+
+    def _drop_level(self, side, pxs, px: int):
+        del side[px]
+        del pxs[bisect_left(pxs, px)]
+
+    def remove(self, o: SimOrder) -> bool:
+        side, pxs = self._side(o.is_buy)
+        q = side.get(o.px)
+        if q is None:
+            return False
+        try:
+            q.remove(o)
+        except ValueError:
+            return False
+        if not q:
+            self._drop_level(side, pxs, o.px)
+        self.version += 1
+        return True
+
+    def match(self, taker: SimOrder, limit: Optional[int]) -> Tuple[List[Tuple[SimOrder, int, int]], List[SimOrder]]:
+        """
+        Fill taker.sz against the opposite side, best price first, FIFO within a level, up to
+        `limit` (None = any price). Returns ([(maker, sz, px)], makers expired by self-trade).
+        """
+        side, pxs = self._side(not taker.is_buy)
+        fills, expired = [], []
+        while taker.sz > 0 and pxs:
+            px = pxs[0] if taker.is_buy else pxs[-1]
+            if limit is not None and (px > limit if taker.is_buy else px < limit):
+                break
+            q = side[px]
+            while q and taker.sz > 0:
+                m = q[0]
+                if m.owner == taker.owner:  # self-trade prevention: the resting order is cancelled
+                    q.popleft()
+                    expired.append(m)
+                    continue
+                sz = min(m.sz, taker.sz)
+                m.sz -= sz
+                taker.sz -= sz
+                fills.append((m, sz, px))
+                if m.sz == 0:
+                    q.popleft()
+            if not q:
+                self._drop_level(side, pxs, px)
+        if fills or expired:
+            self.version += 1
+        return fills, expired
+
+    def levels(self, n: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]]:
+        """Top n (px, total size, order count) per side, best first."""
+        bids = [(px, sum(o.sz for o in self.bids[px]), len(self.bids[px])) for px in reversed(self._bid_px[-n:])]
+        asks = [(px, sum(o.sz for o in self.asks[px]), len(self.asks[px])) for px in self._ask_px[:n]]
+        return bids, asks
+
+class SimMarket:
+    def __init__(self, index: int, name: str, tick: Decimal, lot: Decimal, mid: Decimal,
+                 px_dec: int = 6, sz_dec: int = 0):
+        self.index = index
+        self.asset_id = 10000 + index
+        self.name = name
+        self.base = name.split("/")[0]
+        self.quote = name.split("/")[1] if "/" in name else "USDC"
+        self.px_dec, self.sz_dec = px_dec, sz_dec
+        self.tick, self.lot = tick, lot
+        self.px = fixed_step(tick)
+        self.sz = fixed_step(lot)
+        self.book = SimBook()
+        self.fair = self.px.snap_down(self.px.units(mid))
+        self.house: Dict[Tuple[bool, int], SimOrder] = {}
+        self.published = -1
+
+    @property
+    def coin(self) -> str:
+        return f"@{self.index}"
+
+    def mid_str(self) -> str:
+        b, a = self.book.best(True), self.book.best(False)
+        if b is None or a is None:
+            return self.px.wire(self.fair)
+        return format(((self.px.to_decimal(b) + self.px.to_decimal(a)) / 2).normalize(), "f")
+
+    def bbo_str(self) -> str:
+        b, a = self.book.best(True), self.book.best(False)
+        return f"{self.px.wire(b) if b is not None else 'None'}@{self.px.wire(a) if a is not None else 'None'}"
+
+class SimExchange:
+    """
+    Matching engine + aiohttp app. All state lives on the simulator's event loop thread:
+    start() runs it on a daemon thread (tests, benchmarks), main() in the foreground (CLI).
+    """
+
+    def __init__(self, markets: List[SimMarket], delay_ms: float = 0.0, jitter_ms: float = 0.0,
+                 depth: int = 5, house_sz: Decimal = Decimal(2000), taker_rate: float = 2.0,
+                 taker_sz: Decimal = Decimal(1500), vol_ticks: float = 1.0, step_ms: float = 100.0,
+                 min_notional: Decimal = Decimal(10), balances: Optional[Dict[str, Decimal]] = None,
+                 seed: int = 7, clock: Optional[Clock] = None):
+        self.clock = clock or WALL_CLOCK
+        self.markets: Dict[int, SimMarket] = {m.asset_id: m for m in markets}
+        self.by_coin: Dict[str, SimMarket] = {m.coin: m for m in markets}
+        self.delay_ms, self.jitter_ms = float(delay_ms), float(jitter_ms)
+        self.depth, self.house_sz = int(depth), house_sz
+        self.taker_rate, self.taker_sz = float(taker_rate), taker_sz
+        self.vol_ticks, self.step_ms = float(vol_ticks), float(step_ms)
+        self.min_notional = min_notional
+        self.balances: Dict[str, Decimal] = dict(balances or {})
+        self.orders: Dict[int, SimOrder] = {}                    # resting user orders by oid
+        self.cloids: Dict[Tuple[int, str], SimOrder] = {}        # (asset, cloid) -> resting user order
+        self.fills: deque = deque(maxlen=10000)                  # user fills, newest last
+        self.events: deque = deque(maxlen=10000)                 # (channel, item) for orderUpdates / userFills subscribers
+        self.counters = Counter()
+        self.schedule_at: Optional[int] = None
+        self._oid = 0
+        self._tid = 0
+        self._nonces: List[int] = []
+        self._nonce_set = set()
+        self._rnd = random.Random(seed)
+        self._subs: Dict[web.WebSocketResponse, set] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.port: Optional[int] = None
+        self._stepper_task: Optional[asyncio.Task] = None
+
+    # ---------- Orders ----------
+    def _next_oid(self) -> int:
+        self._oid += 1
+        return self._oid
+
+    def _order_update(self, m: SimMarket, o: SimOrder, status: str):
+        self.events.append(("orderUpdates", {
+            "order": {"coin": m.coin, "side": "B" if o.is_buy else "A", "limitPx": m.px.wire(o.px),
+                      "sz": m.sz.wire(o.sz), "oid": o.oid, "timestamp": o.ts, "origSz": m.sz.wire(o.orig_sz),
+                      "cloid": o.cloid},
+            "status": status, "statusTimestamp": int(self.clock.time() * 1000)}))
+
+    def _unindex(self, o: SimOrder):
+        self.orders.pop(o.oid, None)
+        if o.cloid:
+            self.cloids.pop((o.asset, o.cloid), None)
+
+    def _apply_fills(self, m: SimMarket, taker: SimOrder, fills, expired):
+        for o in expired:
+            if o.owner == USER:
+                self._unindex(o)
+                self._order_update(m, o, "selfTradeCanceled")
+                self.counters["self_trade_cancels"] += 1
+        for maker, sz, px in fills:
+            for o, crossed in ((maker, False), (taker, True)):
+                if o.owner != USER:
+                    continue
+                qty, notional = m.sz.to_decimal(sz), m.px.to_decimal(px) * m.sz.to_decimal(sz)
+                sign = 1 if o.is_buy else -1
+                self.balances[m.base] = self.balances.get(m.base, Decimal(0)) + sign * qty
+                self.balances[m.quote] = self.balances.get(m.quote, Decimal(0)) - sign * notional
+                self._tid += 1
+                fill = {"coin": m.coin, "px": m.px.wire(px), "sz": m.sz.wire(sz),
+                        "side": "B" if o.is_buy else "A", "time": int(self.clock.time() * 1000),
+                        "oid": o.oid, "tid": self._tid, "cloid": o.cloid, "crossed": crossed}
+                self.fills.append(fill)
+                self.events.append(("userFills", fill))
+                self.counters["fills"] += 1
+            if maker.owner == USER and maker.sz == 0:
+                self._unindex(maker)
+                self._order_update(m, maker, "filled")
+
+    def _fill_status(self, m: SimMarket, o: SimOrder, fills) -> Dict:
+        qty = sum(sz for _, sz, _ in fills)
+        avg = sum(m.px.to_decimal(px) * sz for _, sz, px in fills) / qty
+        return {"filled": {"totalSz": m.sz.wire(qty), "avgPx": format(avg.normalize(), "f"), "oid": o.oid}}
+
+    def place(self, w: Dict, owner: str = USER) -> Dict:
+        """One order wire ({"a","b","p","s","r","t","c"}) -> exchange status entry."""
+        m = self.markets.get(w.get("a"))
+        if m is None:
+            return {"error": f"Invalid asset {w.get('a')}"}
+        tag = f" asset={m.asset_id}"
+        is_buy = bool(w.get("b"))
+        t = w.get("t") or {}
+        try:
+            sz_d = Decimal(str(w.get("s")))
+            px_d = None if "market" in t else Decimal(str(w.get("p")))
+        except (InvalidOperation, TypeError):
+            return {"error": "Order has invalid size or price." + tag}
+
+        su = m.sz.units(sz_d) if sz_d > 0 else 0
+        if su <= 0 or m.sz.to_decimal(su) != sz_d or su % m.sz.step_units:
+            return {"error": "Order has invalid size." + tag}
+        if px_d is None:
+            tif, pu = "Ioc", None
+        else:
+            tif = (t.get("limit") or {}).get("tif", "Gtc")
+            pu = m.px.units(px_d) if px_d > 0 else 0
+            if pu <= 0 or m.px.to_decimal(pu) != px_d or pu % m.px.step_units:
+                return {"error": "Price must be divisible by tick size." + tag}
+        ref = m.px.to_decimal(pu if pu is not None else m.fair)
+        if owner == USER and ref * sz_d < self.min_notional:
+            return {"error": f"Order must have minimum value of ${self.min_notional}." + tag}
+
+        cloid = w.get("c")
+        if cloid and (m.asset_id, cloid) in self.cloids:
+            return {"error": "Duplicate cloid." + tag}
+        if tif == "Alo" and m.book.crosses(is_buy, pu):
+            return {"error": f"Post only order would have immediately matched, bbo was {m.bbo_str()}.{tag}"}
+
+        o = SimOrder(self._next_oid(), owner, m.asset_id, is_buy, pu, su, cloid)
+        o.ts = int(self.clock.time() * 1000)
+        fills, expired = m.book.match(o, pu)
+        self._apply_fills(m, o, fills, expired)
+
+        if tif == "Ioc" or o.sz == 0:
+            if not fills:
+                return {"error": "Order could not immediately match against any resting orders." + tag}
+            return self._fill_status(m, o, fills)
+        m.book.add(o)
+        if owner == USER:
+            self.orders[o.oid] = o
+            if cloid:
+                self.cloids[(m.asset_id, cloid)] = o
+            self._order_update(m, o, "open")
+        resting = {"oid": o.oid}
+        if cloid:
+            resting["cloid"] = cloid
+        return {"resting": resting}
+
+    def cancel(self, o: Optional[SimOrder], asset: int) -> object:
+        m = self.markets.get(asset)
+        if o is None or m is None or not m.book.remove(o):
+            return {"error": f"Order was never placed, already canceled, or filled. asset={asset}"}
+        self._unindex(o)
+        self._order_update(m, o, "canceled")
+        self.counters["cancels"] += 1
+        return "success"
+
+    def modify(self, ref, w: Dict) -> Dict:
+        """
+        One batchModify entry: the resting order `ref` (oid or cloid) replaced by wire w (new oid,
+        back of the queue at its price). Status as for place(); if w is rejected the old order is gone too.
+        """
+        a = w.get("a")
+        o = self.cloids.get((a, ref)) if isinstance(ref, str) else self.orders.get(ref)
+        m = self.markets.get(a)
+        if o is None or m is None or o.asset != a:
+            return {"error": f"Cannot modify canceled or filled order. asset={a}"}
+        m.book.remove(o)
+        self._unindex(o)
+        st = self.place(w)
+        if "error" in st:
+            self._order_update(m, o, "canceled")
+        self.counters["modifies"] += 1
+        return st
+
+    def take(self, m: SimMarket, is_buy: bool, limit: Optional[int], sz: int, owner: str = FLOW) -> int:
+        """Aggressive order from outside the account (IOC up to limit); returns the size filled."""
+        o = SimOrder(self._next_oid(), owner, m.asset_id, is_buy, limit, sz)
+        fills, expired = m.book.match(o, limit)
+        self._apply_fills(m, o, fills, expired)
+        return sz - o.sz
+
+    def rest(self, m: SimMarket, is_buy: bool, px: int, sz: int, owner: str = HOUSE) -> Optional[SimOrder]:
+        """Outside liquidity at px (trades first if it crosses); the resting remainder or None."""
+        o = SimOrder(self._next_oid(), owner, m.asset_id, is_buy, px, sz)
+        fills, expired = m.book.match(o, px)
+        self._apply_fills(m, o, fills, expired)
+        if not o.sz:
+            return None
+        m.book.add(o)
+        return o
+
+    def cancel_all_user(self):
+        for o in list(self.orders.values()):
+            self.cancel(o, o.asset)
+
+    # ---------- Actions ----------
+    def _check_nonce(self, nonce) -> Optional[str]:
+        if not isinstance(nonce, int):
+            return "Invalid nonce: missing"
+        if nonce in self._nonce_set:
+            return f"Invalid nonce: duplicate nonce {nonce}"
+        if len(self._nonces) >= NONCE_WINDOW and nonce <= self._nonces[0]:
+            return f"Invalid nonce: {nonce} is lower than the smallest of the last {NONCE_WINDOW}"
+        heapq.heappush(self._nonces, nonce)
+        self._nonce_set.add(nonce)
+        if len(self._nonces) > NONCE_WINDOW:
+            self._nonce_set.discard(heapq.heappop(self._nonces))
+        return None
+
+    def handle_action(self, body: Dict) -> Dict:
+        self._run_schedule()
+        action = body.get("action") or {}
+        t = action.get("type")
+        self.counters["actions"] += 1
+        self.counters[f"action:{t}"] += 1
+        err = self._check_nonce(body.get("nonce"))
+        if err:
+            self.counters["nonce_rejects"] += 1
+            return {"status": "err", "response": err}
+
+        if t == "order":
+            sts = [self.place(w) for w in action.get("orders", [])]
+            self.counters["orders"] += len(sts)
+            for st in sts:
+                if isinstance(st, dict) and "error" in st:
+                    self.counters["rejects"] += 1
+                    self.counters["reject:" + st["error"].split(" asset=")[0].split(",")[0]] += 1
+            return {"status": "ok", "response": {"type": "order", "data": {"statuses": sts}}}
+        if t == "batchModify":
+            sts = [self.modify(e.get("oid"), e.get("order") or {}) for e in action.get("modifies", [])]
+            for st in sts:
+                if "error" in st:
+                    self.counters["rejects"] += 1
+                    self.counters["reject:" + st["error"].split(" asset=")[0].split(",")[0]] += 1
+            return {"status": "ok", "response": {"type": "order", "data": {"statuses": sts}}}
+        if t == "cancelByCloid":
+            sts = [self.cancel(self.cloids.get((c.get("asset"), c.get("cloid"))), c.get("asset"))
+                   for c in action.get("cancels", [])]
+            return {"status": "ok", "response": {"type": "cancel", "data": {"statuses": sts}}}
+        if t == "cancel":
+            sts = []
+            for c in action.get("cancels", []):
+                o = self.orders.get(c.get("o"))
+                sts.append(self.cancel(o if o is not None and o.asset == c.get("a") else None, c.get("a")))
+            return {"status": "ok", "response": {"type": "cancel", "data": {"statuses": sts}}}
+        if t == "scheduleCancel":
+            at = action.get("time")
+            if at is None:
+                self.schedule_at = None
+            elif at < int(self.clock.time() * 1000) + 5000:
+                return {"status": "err", "response": "Scheduled cancel time too early, must be at least 5 seconds after current time."}
+            else:
+                self.schedule_at = int(at)
+            return {"status": "ok", "response": {"type": "default"}}
+        return {"status": "err", "response": f"Unsupported action type: {t}"}
+
+    def _run_schedule(self):
+        if self.schedule_at is not None and int(self.clock.time() * 1000) >= self.schedule_at:
+            self.schedule_at = None
+            self.cancel_all_user()
+
+    # ---------- Info ----------
+    def handle_info(self, body: Dict):
+        t = body.get("type")
+        self.counters[f"info:{t}"] += 1
+        if t == "allMids":
+            return {m.coin: m.mid_str() for m in self.markets.values()}
+        if t == "spotMeta":
+            known = {m.index: m for m in self.markets.values()}
+            uni = []
+            for i in range(max(known) + 1):
+                m = known.get(i)
+                if m is None:
+                    uni.append({"name": f"@{i}", "index": i, "tokens": [0, 0], "szDecimals": 0, "pxDecimals": 6})
+                else:
+                    uni.append({"name": m.name, "index": i, "tokens": [i + 1, 0], "szDecimals": m.sz_dec,
+                                "pxDecimals": m.px_dec, "tickSz": str(m.tick), "lotSz": str(m.lot)})
+            tokens = [{"name": "USDC", "index": 0, "szDecimals": 8}] + [
+                {"name": m.base, "index": m.index + 1, "szDecimals": m.sz_dec} for m in known.values()]
+            return {"universe": uni, "tokens": tokens}
+        if t == "openOrders":
+            out = []
+            for o in self.orders.values():
+                m = self.markets[o.asset]
+                out.append({"coin": m.coin, "side": "B" if o.is_buy else "A", "limitPx": m.px.wire(o.px),
+                            "sz": m.sz.wire(o.sz), "oid": o.oid, "timestamp": o.ts,
+                            "origSz": m.sz.wire(o.orig_sz), "cloid": o.cloid})
+            return out
+        if t == "userFillsByTime":
+            start, end = int(body.get("startTime") or 0), body.get("endTime")
+            out = []
+            for f in reversed(self.fills):  # newest first: stop at the first one before startTime
+                if f["time"] < start:
+                    break
+                if end is None or f["time"] <= int(end):
+                    out.append(f)
+            return out[:2000][::-1]
+        if t == "l2Book":
+            m = self.by_coin.get(body.get("coin"))
+            if m is None:
+                return None
+            bids, asks = m.book.levels(20)
+            lv = lambda side: [{"px": m.px.wire(px), "sz": m.sz.wire(sz), "n": n} for px, sz, n in side]
+            return {"coin": m.coin, "time": int(self.clock.time() * 1000), "levels": [lv(bids), lv(asks)]}
+        if t == "spotUserBalances":
+            return [{"token": k, "total": format(v, "f"), "available": format(v, "f")}
+                    for k, v in self.balances.items()]
+        return None
+
+    # ---------- Market simulation ----------
+    def _house_levels(self, m: SimMarket):
+        step = m.px.step_units
+        want = {(True, m.fair - k * step) for k in range(1, self.depth + 1)}
+        want |= {(False, m.fair + k * step) for k in range(1, self.depth + 1)}
+        for key, o in list(m.house.items()):
+            if o.sz == 0 or key not in want:
+                if o.sz:
+                    m.book.remove(o)
+                del m.house[key]
+        hs = m.sz.snap_down(m.sz.units(self.house_sz))
+        for is_buy, px in sorted(want - m.house.keys()):
+            if px <= 0:
+                continue
+            o = self.rest(m, is_buy, px, hs)
+            if o is not None:
+                m.house[(is_buy, px)] = o
+
+    def _taker_flow(self, m: SimMarket, dt: float):
+        if self.taker_rate <= 0:
+            return
+        t = self._rnd.expovariate(self.taker_rate)
+        while t < dt:
+            sz = m.sz.snap_down(m.sz.units(self.taker_sz * Decimal(str(round(self._rnd.uniform(0.1, 1.0), 3)))))
+            if sz > 0:
+                self.take(m, self._rnd.random() < 0.5, None, sz)
+            t += self._rnd.expovariate(self.taker_rate)
+
+    def step(self, dt: float):
+        self._run_schedule()
+        for m in self.markets.values():
+            if self.vol_ticks > 0:
+                move = round(self._rnd.gauss(0.0, self.vol_ticks * math.sqrt(dt)))
+                m.fair = max(m.px.step_units, m.fair + move * m.px.step_units)
+            self._house_levels(m)
+            self._taker_flow(m, dt)
+
+    # ---------- WebSocket ----------
+    def _ws_msg(self, key: tuple) -> Optional[Dict]:
+        if key[0] == "allMids":
+            return {"channel": "allMids", "data": {"mids": {m.coin: m.mid_str() for m in self.markets.values()}}}
+        if key[0] == "userFills":
+            return {"channel": "userFills", "data": {"isSnapshot": True, "user": USER, "fills": list(self.fills)[-100:]}}
+        if key[0] == "orderUpdates":
+            return None
+        m = self.by_coin.get(key[1])
+        if m is None:
+            return None
+        now = int(self.clock.time() * 1000)
+        bids, asks = m.book.levels(20 if key[0] == "l2Book" else 1)
+        lv = lambda side: [{"px": m.px.wire(px), "sz": m.sz.wire(sz), "n": n} for px, sz, n in side]
+        if key[0] == "l2Book":
+            return {"channel": "l2Book", "data": {"coin": m.coin, "time": now, "levels": [lv(bids), lv(asks)]}}
+        b, a = lv(bids), lv(asks)
+        return {"channel": "bbo", "data": {"coin": m.coin, "time": now, "bbo": [b[0] if b else None, a[0] if a else None]}}
+
+    def _user_msgs(self) -> Dict[tuple, str]:
+        fills, updates = [], []
+        while self.events:
+            ch, item = self.events.popleft()
+            (fills if ch == "userFills" else updates).append(item)
+        out = {}
+        if fills:
+            out[("userFills",)] = json.dumps({"channel": "userFills", "data": {"user": USER, "fills": fills}})
+        if updates:
+            out[("orderUpdates",)] = json.dumps({"channel": "orderUpdates", "data": updates})
+        return out
+
+    async def _publish(self, force: bool = False):
+        changed = {m.coin for m in self.markets.values() if force or m.book.version != m.published}
+        for m in self.markets.values():
+            m.published = m.book.version
+        cache: Dict[tuple, str] = self._user_msgs()
+        for ws, keys in list(self._subs.items()):
+            for key in keys:
+                if key[0] in USER_CHANNELS:
+                    if key not in cache:
+                        continue
+                elif key[0] != "allMids" and key[1] not in changed:
+                    continue
+                if key not in cache:
+                    msg = self._ws_msg(key)
+                    cache[key] = json.dumps(msg) if msg else ""
+                if cache[key]:
+                    try:
+                        await ws.send_str(cache[key])
+                    except Exception:
+                        self._subs.pop(ws, None)
+                        break
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._subs[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    req = json.loads(msg.data)
+                except Exception:
+                    continue
+                if req.get("method") == "ping":
+                    await ws.send_str(json.dumps({"channel": "pong"}))
+                    continue
+                sub = req.get("subscription") or {}
+                typ = sub.get("type")
+                key = (typ,) if typ == "allMids" or typ in USER_CHANNELS else (typ, sub.get("coin"))
+                if req.get("method") == "unsubscribe":
+                    self._subs.get(ws, set()).discard(key)
+                    continue
+                if key[0] not in ("allMids", "bbo", "l2Book") + USER_CHANNELS:
+                    await ws.send_str(json.dumps({"channel": "error", "data": f"Unsupported subscription: {sub}"}))
+                    continue
+                self._subs[ws].add(key)
+                await ws.send_str(json.dumps({"channel": "subscriptionResponse", "data": req}))
+                first = self._ws_msg(key)
+                if first:
+                    await ws.send_str(json.dumps(first))
+        finally:
+            self._subs.pop(ws, None)
+        return ws
+
+    # ---------- HTTP ----------
+    async def _delay(self):
+        d = self.delay_ms + (self._rnd.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if d > 0:
+            await asyncio.sleep(d / 1000.0)
+
+    async def _info(self, request):
+        body = json.loads(await request.read())
+        await self._delay()
+        res = self.handle_info(body)
+        if res is None:
+            return web.json_response({"error": f"unsupported info type {body.get('type')}"}, status=422)
+        return web.json_response(res)
+
+    async def _exchange(self, request):
+        body = json.loads(await request.read())
+        await self._delay()
+        return web.json_response(self.handle_action(body))
+
+    async def _stats(self, request):
+        return web.json_response({"counters": dict(self.counters), "resting": len(self.orders),
+                                  "balances": {k: format(v, "f") for k, v in self.balances.items()}})
+
+    async def _head(self, request):
+        return web.Response(status=404)
+
+    async def _stepper(self):
+        dt = self.step_ms / 1000.0
+        last_full = 0.0
+        while True:
+            self.step(dt)
+            now = time.monotonic()
+            force = now - last_full >= 1.0  # resend books at least once a second, like a heartbeat
+            if force:
+                last_full = now
+            await self._publish(force)
+            await asyncio.sleep(dt)
+
+    def app(self) -> web.Application:
+        async def _on_startup(app):
+            self.loop = asyncio.get_running_loop()
+            self.step(0.0)
+            self._stepper_task = asyncio.create_task(self._stepper())
+
+        async def _on_cleanup(app):
+            self._stepper_task.cancel()
+
+        app = web.Application()
+        app.router.add_post("/info", self._info)
+        app.router.add_post("/exchange", self._exchange)
+        app.router.add_get("/ws", self._ws)
+        app.router.add_get("/sim/stats", self._stats)
+        app.router.add_route("HEAD", "/", self._head)
+        app.on_startup.append(_on_startup)
+        app.on_cleanup.append(_on_cleanup)
+        return app
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the simulator loop (state is not thread-safe) and return its result."""
+        async def _call():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(_call(), self.loop).result(10)
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a daemon thread; returns the base URL."""
+        ready = threading.Event()
+
+        def _run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.app(), access_log=None)
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, host, port)
+            loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=_run, daemon=True, name="sim-exchange").start()
+        ready.wait(5)
+        return f"http://{host}:{self.port}"
+
+def main():
+    ap = argparse.ArgumentParser(description="Local spot exchange simulator")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--index", type=int, default=223, help="spot index (asset id = 10000 + index)")
+    ap.add_argument("--name", default="SIM/USDC")
+    ap.add_argument("--mid", default="0.126985")
+    ap.add_argument("--tick", default="0.000001")
+    ap.add_argument("--lot", default="1")
+    ap.add_argument("--delay-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--depth", type=int, default=5, help="house levels per side")
+    ap.add_argument("--house-sz", default="2000")
+    ap.add_argument("--taker-rate", type=float, default=2.0, help="taker orders per second")
+    ap.add_argument("--taker-sz", default="1500")
+    ap.add_argument("--vol-ticks", type=float, default=1.0, help="fair value stdev per second, in ticks")
+    ap.add_argument("--step-ms", type=float, default=100.0)
+    ap.add_argument("--min-notional", default="10")
+    ap.add_argument("--base-balance", default="0")
+    ap.add_argument("--quote-balance", default="100000")
+    ap.add_argument("--seed", type=int, default=7)
+    a = ap.parse_args()
+
+    tick = Decimal(a.tick)
+    lot = Decimal(a.lot)
+    m = SimMarket(a.index, a.name, tick, lot, Decimal(a.mid),
+                  px_dec=max(0, -tick.as_tuple().exponent), sz_dec=max(0, -lot.as_tuple().exponent))
+    sim = SimExchange([m], delay_ms=a.delay_ms, jitter_ms=a.jitter_ms, depth=a.depth,
+                      house_sz=Decimal(a.house_sz), taker_rate=a.taker_rate, taker_sz=Decimal(a.taker_sz),
+                      vol_ticks=a.vol_ticks, step_ms=a.step_ms, min_notional=Decimal(a.min_notional),
+                      balances={m.base: Decimal(a.base_balance), m.quote: Decimal(a.quote_balance)}, seed=a.seed)
+    print(f"Simulating {m.name} ({m.coin}, asset {m.asset_id}) on http://{a.host}:{a.port}")
+    web.run_app(sim.app(), host=a.host, port=a.port, access_log=None, print=None)
+
+if __name__ == "__main__":
+    main()
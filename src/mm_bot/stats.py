@@ -1,9 +1,12 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, make_dataclass
 from decimal import Decimal
 import time
 
 @dataclass
 class Stats:
+    # total_*: orders the exchange accepted; *_this_min: orders sent (minute budget);
+    # vol_base_* / notional_* / fills: actual fills of quotes (orders.OrderManager);
+    # *_close: fills of close-position IOCs, kept out of the maker figures
     started_at: float = field(default_factory=lambda: time.time())
     total_buy: int = 0
     total_sell: int = 0
@@ -11,11 +14,37 @@ class Stats:
     vol_base_sell: Decimal = Decimal(0)
     notional_buy: Decimal = Decimal(0)
     notional_sell: Decimal = Decimal(0)
+    fills: int = 0
+    rejected: int = 0
     cancels: int = 0
     closes: int = 0
+    close_fills: int = 0
+    vol_base_close: Decimal = Decimal(0)
+    notional_close: Decimal = Decimal(0)
+    range_trips: int = 0
     errors: int = 0
     minute_key: int = field(default_factory=lambda: int(time.time() // 60))
     buys_this_min: int = 0
     sells_this_min: int = 0
     last_mid: Decimal | None = None
-    last_action: str = ""
\ No newline at end of file
+    last_action: str = ""
+
+    def snapshot(self) -> "StatsSnapshot":
+        """Frozen point-in-time copy for readers on other threads (panel, metrics)."""
+        d = dict(self.__dict__)
+        return StatsSnapshot(**{k: d[k] for k in _FIELDS})
+
+_FIELDS = tuple(f.name for f in fields(Stats))
+StatsSnapshot = make_dataclass("StatsSnapshot", [(f.name, f.type) for f in fields(Stats)], frozen=True)
+_SUMMED = ("total_buy", "total_sell", "vol_base_buy", "vol_base_sell", "notional_buy", "notional_sell",
+           "fills", "rejected", "cancels", "closes", "close_fills", "vol_base_close", "notional_close",
+           "range_trips", "errors", "buys_this_min", "sells_this_min")
+
+def sum_stats(snaps) -> Stats:
+    """Totals over several Stats/snapshots (fleet): counters and volumes summed, earliest start."""
+    snaps = list(snaps)
+    out = Stats(started_at=min((s.started_at for s in snaps), default=time.time()))
+    for s in snaps:
+        for k in _SUMMED:
+            setattr(out, k, getattr(out, k) + getattr(s, k))
+    return out
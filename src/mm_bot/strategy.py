@@ -1,34 +1,57 @@
-import time
+import threading
+from collections import deque
 from uuid import uuid4
 from decimal import Decimal
-from typing import Optional, List, Dict
+from typing import Dict, Optional, List
 
 from pybotters.helpers import hyperliquid as hlh
 
+from . import info
 from .config import Settings
+from .clock import Clock, WALL_CLOCK
 from .stats import Stats
-from .panel import render_panel
+from .panel import PanelRenderer
 from .utils import to_decimal_safe
-from .info import get_mid_by_index, user_spot_balances
+from .info import get_mid_by_index, get_book_by_index, user_spot_balances
+from .fixed import fixed_step
+from .metrics import LOOP_LAG_SECONDS, add_collector, remove_collector
+from .profiling import spanned
+from .orders import CLOSE_CLOID_PREFIX, OrderManager, REJECTED, is_close_cloid
+from .sched import Cadence, Scheduler
 from .exchange import (
+    OrderSpec,
+    place_spot_limit_orders,
     smart_submit,
     schedule_cancel_all,
     place_market_ioc,
-    cancel_by_cloid,
+    cancel_by_cloids,
+    clamp_post_only,
+    modify_orders,
 )
 
+SCHEDULE_CANCEL_MIN_SEC = 30.0  # cancel_all's scheduleCancel fallback: at most this often
+
 
 class MakerBot:
-    def __init__(self, cfg: Settings, asset):
+    def __init__(self, cfg: Settings, asset, clock: Optional[Clock] = None):
         self.cfg = cfg
         self.asset = asset
-        self.stats = Stats()
+        self.clock = clock or WALL_CLOCK
+        now = self.clock.time()
+        self.stats = Stats(started_at=now, minute_key=int(now // 60))
 
         self.anchor_mid: Optional[Decimal] = None
         self.range_lo: Optional[Decimal] = cfg.RANGE_LOWER
         self.range_hi: Optional[Decimal] = cfg.RANGE_UPPER
 
-        self.live: Dict[str, float] = {}
+        self.orders = OrderManager(self.stats, asset, self.clock, cfg.USER_ADDR, ttl=cfg.ORDER_TTL_SEC)
+        self.book = None  # book.L2Book from the feed, refreshed by compute_band
+        self._sched_cancel_at: Optional[float] = None  # monotonic time of the last scheduleCancel fallback
+        self._parked: Dict[bool, deque] = {True: deque(), False: deque()}  # REQUOTE: expired (cloid, since) per side
+        self.mid_ts = 0.0  # clock.monotonic() of the last mid refresh
+        self._md: Optional[Cadence] = None
+        self._quote: Optional[Cadence] = None
+        self._minute: Optional[Cadence] = None
 
         self._last_side = True if cfg.START_SIDE == "sell" else False
         if cfg.START_SIDE == "sell":
@@ -36,11 +59,28 @@ class MakerBot:
         else:
             self._last_side = False
 
+        self._stop = threading.Event()
+        self.renderer = PanelRenderer(cfg, asset, self.stats, fps=cfg.PANEL_FPS)
+
+    def stop(self):
+        """Ask run() to return after the current iteration."""
+        self._stop.set()
+
+    def _book_mid(self) -> Optional[Decimal]:
+        """Refresh self.book from the feed; its mid, if it has both sides."""
+        self.book = get_book_by_index(self.asset.index)
+        return self.book.mid_decimal() if self.book is not None else None
+
+    @spanned("compute_band")
     def compute_band(self) -> Optional[Decimal]:
         if self.asset.index is None:
             return None
-        mid = get_mid_by_index(self.asset.index)
+        mid = self._book_mid() or get_mid_by_index(self.asset.index)
+        return self._set_mid(mid)
+
+    def _set_mid(self, mid: Decimal) -> Decimal:
         self.stats.last_mid = mid
+        self.mid_ts = self.clock.monotonic()
 
         if self.anchor_mid is None:
             self.anchor_mid = mid
@@ -49,6 +89,13 @@ class MakerBot:
                 self.range_hi = self.anchor_mid * (Decimal(1) + self.cfg.RANGE_PCT)
         return mid
 
+    def _fresh_mid(self) -> Optional[Decimal]:
+        """Last mid if the market-data cadence refreshed it recently enough to quote on."""
+        max_age = max(2 * self.cfg.MD_INTERVAL_SEC, 1.0)
+        if self.stats.last_mid is None or self.clock.monotonic() - self.mid_ts > max_age:
+            return None
+        return self.stats.last_mid
+
     def in_range(self, price: Decimal) -> bool:
         if self.range_lo is not None and price < self.range_lo:
             return False
@@ -56,27 +103,47 @@ class MakerBot:
             return False
         return True
 
-    def _bump_stats_after_submit(self, is_buy: bool, mid_used: Decimal):
+    def _use_quota(self, is_buy: bool, n: int = 1):
+        """Minute budget counts orders sent; n=-1 gives one back (async engine reserves before the submit completes)."""
         if is_buy:
-            self.stats.total_buy += 1
-            self.stats.vol_base_buy += self.cfg.SIZE
-            self.stats.notional_buy += (mid_used * self.cfg.SIZE)
-            self.stats.buys_this_min += 1
+            self.stats.buys_this_min += n
         else:
-            self.stats.total_sell += 1
-            self.stats.vol_base_sell += self.cfg.SIZE
-            self.stats.notional_sell += (mid_used * self.cfg.SIZE)
-            self.stats.sells_this_min += 1
+            self.stats.sells_this_min += n
+
+    def _note_submit(self, cloid: str, is_buy: bool, px: Decimal, mid: Decimal, res):
+        o = self.orders.on_submit(cloid, is_buy, px, self.cfg.SIZE, res)
+        side_txt = "BUY " if is_buy else "SELL"
+        if o.state == REJECTED:
+            self.stats.last_action = f"{side_txt} rejected: {o.error[:60]}"
+        else:
+            self.stats.last_action = f"{side_txt}{self.cfg.SIZE} @~{mid:.6f} (±{self.cfg.QUOTE_OFFSET_TICKS} ticks)"
 
     def _gen_cloid(self) -> str:
         """Generate 0x + 32 hex (16 bytes) CLOID per order."""
-        return "0x" + uuid4().hex[:32]
-
+        while True:
+            cloid = "0x" + uuid4().hex[:32]
+            if not is_close_cloid(cloid):  # that prefix marks close-position IOCs
+                return cloid
+
+    def _gen_close_cloid(self) -> str:
+        return CLOSE_CLOID_PREFIX + uuid4().hex[:34 - len(CLOSE_CLOID_PREFIX)]
+
+    def _quote_px(self, is_buy: bool, mid: Decimal) -> Decimal:
+        """
+        mid ∓ QUOTE_OFFSET_TICKS ticks, in integer tick units, kept on its own side of the newest
+        known BBO (buy < ask, sell > bid; see clamp_post_only); exchange snaps it onto the grid.
+        """
+        tick = fixed_step(self.asset.tick_sz)
+        n = self.cfg.QUOTE_OFFSET_TICKS
+        px_u = tick.units(mid) + tick.steps(-n if is_buy else n)
+        return clamp_post_only(self.asset, is_buy, tick.to_decimal(px_u))
+
+    @spanned("place_one")
     def place_one(self, is_buy: bool, mid: Decimal):
-        px = mid + (self.asset.tick_sz * (Decimal(3) if not is_buy else Decimal(-3)))
+        px = self._quote_px(is_buy, mid)
         try:
             cloid = self._gen_cloid()
-            smart_submit(
+            res = smart_submit(
                 self.cfg,
                 self.asset,
                 is_buy,
@@ -87,21 +154,133 @@ class MakerBot:
                 self.cfg.RETRIES,
                 cloid=cloid,
             )
-            self._bump_stats_after_submit(is_buy, mid)
-            side_txt = "BUY " if is_buy else "SELL"
-            self.stats.last_action = f"{side_txt}{self.cfg.SIZE} @~{mid:.6f} (±3 ticks)"
-            self.live[cloid] = time.time()
         except Exception:
             self.stats.last_action = "place: failed/retried"
+            return
+        self._use_quota(is_buy)
+        self._note_submit(cloid, is_buy, px, mid, res)
+
+    @spanned("place_pair")
+    def place_pair(self, mid: Decimal):
+        """Buy + sell in one signed action; a rejected leg continues through smart_submit's retries."""
+        specs = [
+            OrderSpec(is_buy, self._quote_px(is_buy, mid), self.cfg.SIZE, self.cfg.TIF,
+                      self.cfg.POST_ONLY, cloid=self._gen_cloid())
+            for is_buy in (True, False)
+        ]
+        try:
+            results = place_spot_limit_orders(self.cfg, self.asset, specs)
+        except Exception:
+            self.stats.last_action = "pair: failed"
+            return
+        for sp, res in zip(specs, results):
+            try:
+                # also for accepted legs: smart_submit returns first_res as is and counts the order
+                res = smart_submit(self.cfg, self.asset, sp.is_buy, sp.px, sp.sz, sp.tif, sp.post_only,
+                                   self.cfg.RETRIES, cloid=sp.cloid, first_res=res)
+            except Exception:
+                continue
+            self._use_quota(sp.is_buy)
+            self.orders.on_submit(sp.cloid, sp.is_buy, sp.px, sp.sz, res)
+        self.stats.last_action = f"PAIR {self.cfg.SIZE} @~{mid:.6f} (±{self.cfg.QUOTE_OFFSET_TICKS} ticks)"
+
+    def _park(self, expired: List[str]) -> List[str]:
+        """
+        REQUOTE: expired orders wait for the next quote on their side to move them (see requote);
+        those still waiting after two of that side's quote slots are returned to be cancelled.
+        """
+        now = self.clock.monotonic()
+        for c in expired:
+            o = self.orders.open.get(c)
+            if o is not None:
+                self._parked[o.is_buy].append((c, now))
+        out = []
+        for is_buy, q in self._parked.items():
+            grace = 120.0 / max(1, self.cfg.BUY_PER_MIN if is_buy else self.cfg.SELL_PER_MIN)
+            while q and q[0][1] + grace < now:
+                c = q.popleft()[0]
+                if c in self.orders.open:
+                    out.append(c)
+        return out
+
+    def _take_parked(self, is_buy: bool) -> Optional[str]:
+        q = self._parked[is_buy]
+        while q:
+            c = q.popleft()[0]
+            if c in self.orders.open:
+                return c
+        return None
+
+    @spanned("requote")
+    def requote(self, sides: List[bool], mid: Decimal):
+        """
+        REQUOTE: each side's quote moves that side's oldest expired order to the new price (all sides in
+        one batchModify) instead of placing a new order and cancelling the old one. A partially filled order
+        moves with only its unfilled size. A side with nothing parked gets a new order, and so does a side
+        whose modify failed (after a cancel if the order may still rest).
+        """
+        moves: List[OrderSpec] = []
+        fresh: List[bool] = []
+        for is_buy in sides:
+            cloid = self._take_parked(is_buy)
+            left = self.orders.remaining(cloid) if cloid is not None else Decimal(0)
+            if left <= 0:
+                fresh.append(is_buy)
+            else:
+                moves.append(OrderSpec(is_buy, self._quote_px(is_buy, mid), left, self.cfg.TIF,
+                                       self.cfg.POST_ONLY, cloid=cloid))
+        failed = []
+        if moves:
+            try:
+                results = modify_orders(self.cfg, self.asset, moves)
+            except Exception:
+                results = [None] * len(moves)  # may have landed: the fallback cancel is by cloid
+            for sp, res in zip(moves, results):
+                if self.orders.on_modify(sp.cloid, sp.px, sp.sz, res) is None:
+                    failed.append(sp)
+                else:
+                    self._use_quota(sp.is_buy)
+        resting = [sp.cloid for sp in failed if sp.cloid in self.orders.open]
+        if resting:
+            ok, _ = self._cancel_cloids(resting)
+            self.stats.cancels += ok
+        for is_buy in fresh + [sp.is_buy for sp in failed]:
+            self.place_one(is_buy, mid)
+        self.stats.last_action = (f"REQUOTE {len(moves) - len(failed)} moved, {len(fresh) + len(failed)} new"
+                                  f" @~{mid:.6f} (±{self.cfg.QUOTE_OFFSET_TICKS} ticks)")
+
+    def _cancel_cloids(self, cloids: List[str]) -> tuple[int, int]:
+        """Bulk-cancel (one request per chunk); returns (cancelled, unresolved) counts (see OrderManager.on_cancel_results)."""
+        results = cancel_by_cloids(self.cfg, [(self.asset.asset_id, c) for c in cloids])
+        return self.orders.on_cancel_results(cloids, results)
 
     def cancel_all(self):
+        """
+        Range guard: bulk-cancel the open orders. With a single pair, scheduleCancel covers untracked
+        ones or a failed batch (at most every SCHEDULE_CANCEL_MIN_SEC); it cancels every order on the
+        wallet, so with several SYMBOLS sharing it the failed cloids are only retried by the next pass.
+        """
+        cloids = self.orders.take_all()
+        failed = 0
+        if cloids:
+            ok, failed = self._cancel_cloids(cloids)
+            self.stats.cancels += ok
+            self.stats.last_action = f"Cancel-all: {ok}/{len(cloids)} cancelled"
+            if not failed:
+                return
+        if len(self.cfg.SYMBOLS) > 1:
+            return
+        now = self.clock.monotonic()
+        if self._sched_cancel_at is not None and now - self._sched_cancel_at < SCHEDULE_CANCEL_MIN_SEC:
+            return
+        self._sched_cancel_at = now
         try:
             schedule_cancel_all(self.cfg, at_ms=hlh.get_timestamp_ms())
+            self.orders.drop_open()
             self.stats.cancels += 1
             self.stats.last_action = "Scheduled cancel-all"
         except Exception:
             self.stats.last_action = "cancel-all: attempted"
-        self.live.clear()
 
     def close_position(self):
         if not self.cfg.USER_ADDR:
@@ -124,41 +303,68 @@ class MakerBot:
             self.stats.last_action = "No base position to close."
             return
 
+        px_note = ""
+        if self.book is not None:
+            bid = self.book.best_bid()
+            if bid is None:
+                self.stats.last_action = "Close skipped: no bids on book."
+                return
+            px_note = f" @~{bid[0]:.6f}"
+
         try:
-            place_market_ioc(self.cfg, self.asset, side_buy=False, sz=qty)
+            place_market_ioc(self.cfg, self.asset, side_buy=False, sz=qty, cloid=self._gen_close_cloid())
             self.stats.closes += 1
-            self.stats.last_action = f"Close position IOC sell {qty}"
+            self.stats.last_action = f"Close position IOC sell {qty}{px_note}"
         except Exception:
             self.stats.last_action = "close position: attempted"
 
-    def prune_stale(self):
-        """Auto-cancel open orders whose age > ORDER_TTL_SEC (per-cloid)."""
-        if not self.live:
-            return
-        ttl = int(getattr(self.cfg, "ORDER_TTL_SEC", 0) or 0)
-        if ttl <= 0:
-            return
+    def _take_expired(self) -> List[str]:
+        """Cloids of open (not filled / cancelled) orders older than ORDER_TTL_SEC."""
+        deadline = self.orders.next_deadline()
+        if deadline is None or deadline >= self.clock.time():
+            return []
+        return self.orders.take_expired()
 
-        now = time.time()
-        cutoff = now - ttl
-        expired = [c for c, ts in list(self.live.items()) if ts < cutoff]
+    @spanned("prune_stale")
+    def prune_stale(self):
+        """
+        Auto-cancel open orders whose age > ORDER_TTL_SEC (per-cloid); reconciles first without a live WS.
+        With REQUOTE only those the quote loop did not move in time (see _park).
+        """
+        self.orders.maybe_sync(self.cfg.ORDER_SYNC_SEC)
+        expired = self._take_expired()
+        if self.cfg.REQUOTE:
+            expired = self._park(expired)
         if not expired:
             return
 
-        canceled = 0
-        for c in expired:
-            try:
-                cancel_by_cloid(self.cfg, self.asset.asset_id, c)
-                canceled += 1
-            except Exception:
-                pass
-            finally:
-                self.live.pop(c, None)
+        canceled, _ = self._cancel_cloids(expired)
 
         if canceled:
             self.stats.cancels += canceled
             self.stats.last_action = f"Auto-cancel {canceled} stale order(s)"
 
+    def _quote_interval(self) -> float:
+        return 60.0 / max(1, self.cfg.ORDERS_PER_MINUTE)
+
+    def _start_minute(self):
+        """Minute budgets reset every 60 s of monotonic time from the start of the loop."""
+        self._minute = Cadence("minute", 60.0, start=self.clock.monotonic() + 60.0)
+
+    def _maybe_roll_minute(self):
+        if self._minute.take(self.clock.monotonic()):
+            self._roll_minute(int(self.clock.time() // 60))
+
+    def _roll_minute(self, minute_key: int):
+        self.stats.minute_key = minute_key
+        self.stats.buys_this_min = 0
+        self.stats.sells_this_min = 0
+        self._last_side = True if self.cfg.START_SIDE == "sell" else False
+
+    def _pair_ok(self) -> bool:
+        return (self.stats.buys_this_min < self.cfg.BUY_PER_MIN
+                and self.stats.sells_this_min < self.cfg.SELL_PER_MIN)
+
     def _choose_side(self) -> bool | None:
         """True=buy, False=sell, None=done for this minute."""
         buy_rem = max(0, self.cfg.BUY_PER_MIN - self.stats.buys_this_min)
@@ -177,58 +383,80 @@ class MakerBot:
 
         return not self._last_side
 
+    def metric_samples(self) -> list:
+        """Gauges and Stats counters for /metrics, read at scrape time (metrics.add_collector)."""
+        st, lb = self.stats, {"symbol": self.asset.name}
+        return [
+            ("mm_mid", "gauge", "Last mid used for quoting", lb, st.last_mid),
+            ("mm_range_lower", "gauge", "Range guard lower bound", lb, self.range_lo),
+            ("mm_range_upper", "gauge", "Range guard upper bound", lb, self.range_hi),
+            ("mm_live_orders", "gauge", "Orders resting on the book (not filled, cancelled or rejected)", lb, len(self.orders.open)),
+            ("mm_fills_total", "counter", "Fills of this bot's quotes", lb, st.fills),
+            ("mm_close_fills_total", "counter", "Fills of close-position IOCs", lb, st.close_fills),
+            ("mm_cancels_total", "counter", "Orders cancelled (TTL expiry, cancel-all)", lb, st.cancels),
+            ("mm_closes_total", "counter", "Position closes after a range trip", lb, st.closes),
+            ("mm_errors_total", "counter", "Market-data and loop errors", lb, st.errors),
+            ("mm_range_trips_total", "counter", "Mid left the range guard", lb, st.range_trips),
+        ]
+
     def run(self):
         assert (
             self.cfg.BUY_PER_MIN + self.cfg.SELL_PER_MIN == self.cfg.ORDERS_PER_MINUTE
         ), "BUY_PER_MIN + SELL_PER_MIN must equal ORDERS_PER_MINUTE"
 
-        interval = 60.0 / max(1, self.cfg.ORDERS_PER_MINUTE)
-        current_min = int(time.time() // 60)
-        next_ts = time.time()
-
-        while True:
-            now = time.time()
-            if now < next_ts:
-                self.prune_stale()
-                render_panel(self.cfg, self.asset, self.stats)
-                time.sleep(max(0.0, min(0.25, next_ts - now)))
-                continue
-
-            minute_now = int(time.time() // 60)
-            if minute_now != current_min:
-                current_min = minute_now
-                self.stats.minute_key = current_min
-                self.stats.buys_this_min = 0
-                self.stats.sells_this_min = 0
-                self._last_side = True if self.cfg.START_SIDE == "sell" else False
-
-            mid = self.compute_band()
-            if mid is None:
-                self.stats.last_action = "Waiting for mid..."
-                render_panel(self.cfg, self.asset, self.stats)
-                next_ts += interval
-                continue
+        self.renderer.start()
+        add_collector(self.metric_samples)
+        try:
+            self._run_loop()
+        finally:
+            remove_collector(self.metric_samples)
+            self.renderer.stop()
+
+    def _run_loop(self):
+        """
+        Cadences on one thread: quoting, TTL pruning every 0.25 s and, with a feed, market data
+        every MD_INTERVAL_SEC (without one the quote step fetches the mid itself, as before).
+        """
+        self._start_minute()
+        sched = Scheduler(self.clock)
+        if info.FEED is not None:
+            self._md = sched.add("md", self.cfg.MD_INTERVAL_SEC, self.compute_band)
+        self._quote = sched.add("quote", self._quote_interval(), self._quote_step, self.cfg.QUOTE_MISSED_SLOTS)
+        sched.add("prune", 0.25, self.prune_stale, start=self.clock.monotonic() + 0.25)
+        sched.run(self._stop)
+
+    def _quote_step(self):
+        LOOP_LAG_SECONDS.observe(self._quote.lag, "sync")
+        self._maybe_roll_minute()
+
+        mid = (self._fresh_mid() if self._md is not None else None) or self.compute_band()
+        if mid is None:
+            self.stats.last_action = "Waiting for mid..."
+            return
 
-            if not self.in_range(mid):
-                self.stats.last_action = (
-                    f"⛔ Mid {mid:.6f} out of range [{self.range_lo}, {self.range_hi}] → cancel+close"
-                )
-                render_panel(self.cfg, self.asset, self.stats)
-                self.cancel_all()
-                self.close_position()
-                next_ts += interval
-                continue
+        if not self.in_range(mid):
+            self.stats.last_action = (
+                f"⛔ Mid {mid:.6f} out of range [{self.range_lo}, {self.range_hi}] → cancel+close"
+            )
+            self.stats.range_trips += 1
+            self.cancel_all()
+            self.close_position()
+            return
 
-            side = self._choose_side()
-            if side is None:
-                self.stats.last_action = "Minute quotas reached"
-                render_panel(self.cfg, self.asset, self.stats)
-                next_ts += interval
-                continue
+        side = self._choose_side()
+        if side is None:
+            self.stats.last_action = "Minute quotas reached"
+            return
 
-            self.place_one(side, mid)
-            self.prune_stale()
+        if self.cfg.PAIR_QUOTES and self._pair_ok():
+            if self.cfg.REQUOTE:
+                self.requote([True, False], mid)
+            else:
+                self.place_pair(mid)
+            self._quote.defer(1)  # two order slots used
+        else:
+            if self.cfg.REQUOTE:
+                self.requote([side], mid)
+            else:
+                self.place_one(side, mid)
             self._last_side = side
-
-            render_panel(self.cfg, self.asset, self.stats)
-            next_ts += interval
\ No newline at end of file
@@ -0,0 +1,254 @@
+# transport.py
+import asyncio, json, threading, time
+from dataclasses import dataclass, asdict
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config import Settings
+from .metrics import HTTP_SECONDS
+
+# ---------- Connection timing (TCP+TLS handshake per thread) ----------
+_tls = threading.local()
+
+def _add_connect_time(dt: float):
+    _tls.connect_s = getattr(_tls, "connect_s", 0.0) + dt
+    _tls.new_conns = getattr(_tls, "new_conns", 0) + 1
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        _add_connect_time(time.perf_counter() - t0)
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        _add_connect_time(time.perf_counter() - t0)
+
+class _TimedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPPool, "https": _TimedHTTPSPool}
+
+# ---------- Per-endpoint timings ----------
+@dataclass
+class EndpointTiming:
+    count: int = 0
+    errors: int = 0
+    new_conns: int = 0
+    connect_s: float = 0.0
+    ttfb_s: float = 0.0
+    total_s: float = 0.0
+    last_total_s: float = 0.0
+    max_total_s: float = 0.0
+
+_timings: Dict[str, EndpointTiming] = {}
+_timings_lock = threading.Lock()
+
+def _endpoint_key(url: str) -> str:
+    u = urlsplit(url)
+    return f"{u.netloc}{u.path or '/'}"
+
+def _record(key: str, connect_s: float, new_conns: int, ttfb_s: float, total_s: float, ok: bool):
+    HTTP_SECONDS.observe(total_s, key)
+    with _timings_lock:
+        t = _timings.get(key)
+        if t is None:
+            t = _timings[key] = EndpointTiming()
+        t.count += 1
+        t.errors += 0 if ok else 1
+        t.new_conns += new_conns
+        t.connect_s += connect_s
+        t.ttfb_s += ttfb_s
+        t.total_s += total_s
+        t.last_total_s = total_s
+        t.max_total_s = max(t.max_total_s, total_s)
+
+def timings() -> Dict[str, Dict]:
+    """Snapshot of per-endpoint timings; *_avg_ms are per request (ttfb includes connect)."""
+    with _timings_lock:
+        snap = {k: asdict(v) for k, v in _timings.items()}
+    for v in snap.values():
+        n = max(1, v["count"])
+        v["connect_avg_ms"] = v["connect_s"] * 1000 / n
+        v["ttfb_avg_ms"] = v["ttfb_s"] * 1000 / n
+        v["total_avg_ms"] = v["total_s"] * 1000 / n
+    return snap
+
+def reset_timings():
+    with _timings_lock:
+        _timings.clear()
+
+# ---------- Session pool ----------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_pool_size = 8
+_last_used: Dict[str, float] = {}      # "scheme://host" -> monotonic ts
+_keepalive_thread: Optional[threading.Thread] = None
+_keepalive_stop = threading.Event()
+
+def _origin(url: str) -> str:
+    u = urlsplit(url)
+    return f"{u.scheme}://{u.netloc}"
+
+def session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = _TimedAdapter(pool_connections=4, pool_maxsize=_pool_size)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+                _session = s
+    return _session
+
+def init_transport(cfg: Settings):
+    """Call once at startup (see main.py); safe to call again on bot restart."""
+    global _pool_size, _session
+    size = max(1, int(cfg.HTTP_POOL_SIZE))
+    if size != _pool_size:
+        with _session_lock:
+            _pool_size = size
+            if _session is not None:
+                _session.close()
+                _session = None
+    session()
+
+def post(url: str, body: Dict, timeout: float = 15) -> requests.Response:
+    """POST json over the pooled session, recording connect/TTFB/total timings."""
+    key = _endpoint_key(url)
+    _tls.connect_s, _tls.new_conns = 0.0, 0
+    t0 = time.perf_counter()
+    try:
+        r = session().post(url, data=json.dumps(body), timeout=timeout)
+        _ = r.content  # body fully read -> total
+    except Exception:
+        _record(key, _tls.connect_s, _tls.new_conns, 0.0, time.perf_counter() - t0, ok=False)
+        raise
+    total = time.perf_counter() - t0
+    _last_used[_origin(url)] = time.monotonic()
+    _record(key, _tls.connect_s, _tls.new_conns, r.elapsed.total_seconds(), total, ok=r.status_code == 200)
+    return r
+
+def post_json(url: str, body: Dict, timeout: float = 15) -> Dict:
+    r = post(url, body, timeout=timeout)
+    try:
+        data = r.json()
+    except Exception:
+        raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
+    if r.status_code != 200:
+        raise RuntimeError(f"HTTP {r.status_code}: {data}")
+    return data
+
+def _touch(origin: str, timeout: float = 5):
+    # Any response keeps the TLS connection in the pool; status is irrelevant.
+    try:
+        session().head(origin + "/", timeout=timeout)
+        _last_used[origin] = time.monotonic()
+    except Exception:
+        pass
+
+def prewarm(urls: Iterable[str], conns_per_host: int = 1):
+    """Open TCP+TLS connections ahead of the first real request."""
+    origins = sorted({_origin(u) for u in urls if u})
+    n = max(1, min(int(conns_per_host), _pool_size))
+    for o in origins:
+        if n == 1:
+            _touch(o)
+            continue
+        ts = [threading.Thread(target=_touch, args=(o,), daemon=True) for _ in range(n)]
+        for t in ts: t.start()
+        for t in ts: t.join()
+
+def _keepalive_loop(origins: list, interval: float):
+    while not _keepalive_stop.wait(max(0.5, interval / 2)):
+        now = time.monotonic()
+        for o in origins:
+            if now - _last_used.get(o, 0.0) >= interval:
+                _touch(o)
+
+def start_keepalive(urls: Iterable[str], interval: float):
+    """Background ping for origins idle longer than `interval` seconds (<=0 disables)."""
+    global _keepalive_thread
+    if interval <= 0 or (_keepalive_thread is not None and _keepalive_thread.is_alive()):
+        return
+    origins = sorted({_origin(u) for u in urls if u})
+    _keepalive_stop.clear()
+    _keepalive_thread = threading.Thread(target=_keepalive_loop, args=(origins, float(interval)), daemon=True, name="http-keepalive")
+    _keepalive_thread.start()
+
+def stop_keepalive():
+    _keepalive_stop.set()
+
+# ---------- Async (aiohttp) side, one keep-alive session per event loop ----------
+_asessions: Dict[int, aiohttp.ClientSession] = {}
+
+async def _on_conn_start(_s, tctx, _p):
+    if tctx.trace_request_ctx is not None:
+        tctx.trace_request_ctx.conn_t0 = time.perf_counter()
+
+async def _on_conn_end(_s, tctx, _p):
+    ctx = tctx.trace_request_ctx
+    if ctx is not None:
+        ctx.connect_s += time.perf_counter() - ctx.conn_t0
+        ctx.new_conns += 1
+
+def async_session() -> aiohttp.ClientSession:
+    """Pooled aiohttp session bound to the running loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    s = _asessions.get(id(loop))
+    if s is None or s.closed:
+        tc = aiohttp.TraceConfig()
+        tc.on_connection_create_start.append(_on_conn_start)
+        tc.on_connection_create_end.append(_on_conn_end)
+        conn = aiohttp.TCPConnector(limit=_pool_size, keepalive_timeout=60)
+        s = aiohttp.ClientSession(connector=conn, trace_configs=[tc],
+                                  headers={"Content-Type": "application/json"})
+        _asessions[id(loop)] = s
+    return s
+
+async def close_async_session():
+    s = _asessions.pop(id(asyncio.get_running_loop()), None)
+    if s is not None and not s.closed:
+        await s.close()
+
+async def apost_json(url: str, body: Dict, timeout: float = 15) -> Dict:
+    """Async post_json (same errors), recorded into the same per-endpoint timings."""
+    key = _endpoint_key(url)
+    ctx = SimpleNamespace(connect_s=0.0, new_conns=0, conn_t0=0.0)
+    t0 = time.perf_counter()
+    ttfb = 0.0
+    try:
+        async with async_session().post(url, data=json.dumps(body), timeout=aiohttp.ClientTimeout(total=timeout),
+                                        trace_request_ctx=ctx) as r:
+            ttfb = time.perf_counter() - t0
+            status = r.status
+            text = await r.text()
+    except Exception:
+        _record(key, ctx.connect_s, ctx.new_conns, ttfb, time.perf_counter() - t0, ok=False)
+        raise
+    _last_used[_origin(url)] = time.monotonic()
+    _record(key, ctx.connect_s, ctx.new_conns, ttfb, time.perf_counter() - t0, ok=status == 200)
+    try:
+        data = json.loads(text)
+    except Exception:
+        raise RuntimeError(f"HTTP {status}: {text}")
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}: {data}")
+    return data
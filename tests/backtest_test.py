@@ -0,0 +1,50 @@
+# Replay backtester: queue-position fills and a short virtual-clock session.
+#   PYTHONPATH=src python -m pytest -q tests/backtest_test.py
+from decimal import Decimal
+
+from mm_bot.backtest import Backtest, ReplayMarket, Tick
+from mm_bot.config import Settings
+from mm_bot.sim import SimExchange, SimMarket
+from conftest import make_cfg
+
+def _cfg(**kw) -> Settings:
+    return make_cfg(BASE_URL="http://replay", RANGE_PCT=Decimal("0.01"), **kw)
+
+def _bbo(ts, bid, ask, bid_sz=1000, ask_sz=1000) -> Tick:
+    return Tick(ts, bid=Decimal(bid), ask=Decimal(ask), bid_sz=Decimal(bid_sz), ask_sz=Decimal(ask_sz))
+
+def test_queue_position_fifo():
+    m = SimMarket(223, "REPLAY/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))
+    sim = SimExchange([m], depth=0, taker_rate=0.0, vol_ticks=0.0)
+    rp = ReplayMarket(sim, m, "fifo")
+    rp.apply(_bbo(0, "0.126984", "0.126986", bid_sz=500))
+    st = sim.place({"a": 10223, "b": True, "p": "0.126984", "s": "100", "r": False, "t": {"limit": {"tif": "Alo"}}})
+    oid = st["resting"]["oid"]
+    rp.apply(_bbo(1, "0.126984", "0.126986", bid_sz=900))  # +400 joins behind us
+    rp.apply(_bbo(2, "0.126984", "0.126986", bid_sz=550))  # 350 traded: still 150 ahead
+    assert sim.orders[oid].sz == 100
+    rp.apply(_bbo(3, "0.126984", "0.126986", bid_sz=300))  # 250 traded: 150 ahead + 100 of ours
+    assert oid not in sim.orders and sim.balances["REPLAY"] == Decimal(100)
+
+    back = SimExchange([SimMarket(1, "B/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                       depth=0, taker_rate=0.0, vol_ticks=0.0)
+    mb = back.markets[10001]
+    rb = ReplayMarket(back, mb, "back")
+    rb.apply(_bbo(0, "0.126984", "0.126986", bid_sz=500))
+    oid = back.place({"a": 10001, "b": True, "p": "0.126984", "s": "100", "r": False, "t": {"limit": {"tif": "Alo"}}})["resting"]["oid"]
+    rb.apply(_bbo(1, "0.126984", "0.126986", bid_sz=0))
+    assert back.orders[oid].sz == 100  # withdrawn liquidity never fills us
+    rb.apply(_bbo(2, "0.126980", "0.126983"))  # traded through
+    assert oid not in back.orders
+
+def test_replay_session_with_range_guard():
+    # 2h of 1 s mids: flat, then a 2% drop that trips the 1% range guard.
+    ticks = []
+    for i in range(7200):
+        u = 126985 + (i % 7) - 3 - (2540 if i >= 5400 else 0)
+        ticks.append(Tick(1_700_000_000 + i, mid=Decimal(u) / 10**6))
+    rep = Backtest(_cfg(), ticks).run()
+    assert rep["ticks"] == 7200 and rep["span_sec"] == 7199
+    assert rep["orders"] > 5000 and rep["fills"]["count"] > 0
+    assert rep["range_trips"] > 0
+    assert rep["speedup"] > 50
@@ -0,0 +1,83 @@
+# Batched order and cancel actions against the simulator: N entries per signed action, statuses mapped back.
+#   PYTHONPATH=src python -m pytest -q tests/batch_test.py
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import exchange
+from mm_bot.clock import VirtualClock
+from mm_bot.exchange import OrderSpec, entry_ok, first_error, place_spot_limit_orders
+from mm_bot.info import AssetInfo
+from mm_bot.sim import SimExchange, SimMarket
+from mm_bot.strategy import MakerBot
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+@pytest.fixture
+def sim():
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                      taker_rate=0.0, vol_ticks=0.0)
+    sim.step(0.0)  # house levels: bbo 0.126984@0.126986
+    nonce = iter(range(1, 10**6))
+    exchange.attach_venue(lambda action: sim.handle_action({"action": action, "nonce": next(nonce)}))
+    yield sim
+    exchange.attach_venue(None)
+
+def test_batch_maps_each_status_to_its_order(sim):
+    specs = [OrderSpec(True, Decimal("0.12698"), Decimal(100), "Gtc", True, cloid="0x" + "a" * 32),
+             OrderSpec(False, Decimal("0.12698"), Decimal(100), "Gtc", True, cloid="0x" + "b" * 32),  # crosses the bid
+             OrderSpec(False, Decimal("0.12699"), Decimal(90), "Gtc", True, cloid="0x" + "c" * 32)]
+    results = place_spot_limit_orders(make_cfg(), ASSET, specs)
+    assert sim.counters["action:order"] == 1 and len(results) == 3
+    assert [entry_ok(r) for r in results] == [True, False, True]
+    assert "Post only" in first_error(results[1])
+    assert all(len(r["response"]["data"]["statuses"]) == 1 for r in results)
+    resting = {o.cloid: (o.is_buy, o.sz) for o in sim.orders.values() if o.cloid}
+    assert resting == {"0x" + "a" * 32: (True, 100), "0x" + "c" * 32: (False, 90)}
+    assert place_spot_limit_orders(make_cfg(), ASSET, []) == [] and sim.counters["action:order"] == 1
+
+def test_whole_action_failure_reaches_every_entry():
+    exchange.attach_venue(lambda action: {"status": "err", "response": "User or API Wallet does not exist."})
+    try:
+        specs = [OrderSpec(is_buy, Decimal("0.1"), Decimal(100)) for is_buy in (True, False)]
+        assert place_spot_limit_orders(make_cfg(), ASSET, specs) == \
+            [{"status": "err", "response": "User or API Wallet does not exist."}] * 2
+    finally:
+        exchange.attach_venue(None)
+
+def test_place_pair_sends_both_sides_in_one_action(sim):
+    bot = MakerBot(make_cfg(PAIR_QUOTES=True), ASSET, VirtualClock(1000.0))
+    bot.place_pair(Decimal("0.126985"))
+    assert sim.counters["action:order"] == 1
+    assert sorted(o.is_buy for o in bot.orders.open.values()) == [False, True]
+    assert (bot.stats.total_buy, bot.stats.total_sell, bot.stats.buys_this_min, bot.stats.sells_this_min) == (1, 1, 1, 1)
+
+def _rest_bids(cfg, n):
+    specs = [OrderSpec(True, Decimal("0.12697") - Decimal("0.00001") * i, Decimal(100), cloid=f"0x{i:032x}") for i in range(n)]
+    results = place_spot_limit_orders(cfg, ASSET, specs)
+    return [sp.cloid for sp in specs], [r["response"]["data"]["statuses"][0]["resting"]["oid"] for r in results]
+
+def test_bulk_cancel_chunks_and_per_entry_results(sim):
+    cfg = make_cfg()
+    cloids, _ = _rest_bids(cfg, 5)
+    before = sim.counters["action:cancelByCloid"]
+    results = exchange.cancel_by_cloids(cfg, [(ASSET.asset_id, c) for c in cloids + ["0x" + "f" * 32]], chunk_size=2)
+    assert sim.counters["action:cancelByCloid"] - before == 3
+    assert [entry_ok(r) for r in results] == [True] * 5 + [False]
+    assert not any(o.cloid in cloids for o in sim.orders.values())
+
+    _, oids = _rest_bids(cfg, 3)
+    results = exchange.cancel_by_oids(cfg, [(ASSET.asset_id, o) for o in oids] + [(ASSET.asset_id, 10**9)])
+    assert sim.counters["action:cancel"] == 1 and [entry_ok(r) for r in results] == [True, True, True, False]
+
+def test_prune_stale_cancels_expired_orders_in_one_action(sim):
+    clock = VirtualClock(1000.0)
+    bot = MakerBot(make_cfg(ORDER_TTL_SEC=20), ASSET, clock)
+    for i in range(4):
+        bot.place_one(i % 2 == 0, Decimal("0.126985"))
+    assert len(bot.orders.open) == 4
+    clock.now += 21
+    bot.prune_stale()
+    assert sim.counters["action:cancelByCloid"] == 1
+    assert bot.stats.cancels == 4 and not bot.orders.open
@@ -0,0 +1,108 @@
+# Offline checks for mm_bot.book.L2Book.
+#   PYTHONPATH=src python -m pytest -q tests/book_test.py
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import strategy
+from mm_bot.book import L2Book, px_to_decimal
+from mm_bot.clock import VirtualClock
+from mm_bot.info import AssetInfo
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+SNAP = [
+    [{"px": "0.12698", "sz": "500", "n": 1}, {"px": "0.12697", "sz": "200", "n": 1}],
+    [{"px": "0.12700", "sz": "100", "n": 1}, {"px": "0.12702", "sz": "300", "n": 2}],
+]
+
+def test_snapshot_top_and_depth():
+    b = L2Book("@223")
+    b.apply_snapshot(SNAP, 1)
+    assert b.best_bid() == (0.12698, 500.0)
+    assert b.best_ask() == (0.127, 100.0)
+    assert b.level(False, 1) == (0.12702, 300.0)
+    assert b.level(True, 2) is None
+    assert b.depth_sum(True, 2) == 700.0
+    assert px_to_decimal(b.mid()) == Decimal("0.12699")
+    # more bid size -> microprice above mid
+    assert b.microprice() > b.mid()
+
+@pytest.mark.parametrize("bid, ask", [("0.126983", "0.126985"),   # float mid 0.12698399999999999
+                                      ("0.126983", "0.126984"),   # mid on a half tick
+                                      ("0.12698", "0.127")])
+def test_quotes_off_the_book_mid_match_the_exact_mid(monkeypatch, bid, ask):
+    b = L2Book("@223")
+    b.apply_snapshot([[{"px": bid, "sz": "10", "n": 1}], [{"px": ask, "sz": "10", "n": 1}]])
+    monkeypatch.setattr(strategy, "get_book_by_index", lambda index: b)
+    bot = strategy.MakerBot(make_cfg(), ASSET, VirtualClock(1000.0))
+    mid = (Decimal(bid) + Decimal(ask)) / 2
+    assert bot._book_mid() == b.mid_decimal() == mid
+    for is_buy in (True, False):
+        assert bot._quote_px(is_buy, bot._book_mid()) == bot._quote_px(is_buy, mid)
+
+def test_incremental_updates():
+    b = L2Book("@223")
+    b.apply_snapshot(SNAP)
+    b.apply_update(True, 0.12699, 50)      # new best bid
+    b.apply_update(False, 0.127, 0)        # best ask removed
+    b.apply_update(False, 0.12701, 10)     # inserted between
+    assert b.best_bid() == (0.12699, 50.0)
+    assert b.best_ask() == (0.12701, 10.0)
+    assert b.level(False, 1) == (0.12702, 300.0)
+    b.apply_update(True, 0.12699, 75)      # size change in place
+    assert b.best_bid() == (0.12699, 75.0)
+    assert len(b.bids) == 3
+
+def test_on_l2book_ignores_other_coins():
+    b = L2Book("@223")
+    b.on_l2book({"coin": "@1", "levels": SNAP})
+    assert b.is_empty()
+    b.on_l2book({"coin": "@223", "time": 5, "levels": SNAP})
+    assert b.exch_time == 5 and b.best_ask() is not None
+
+def test_readers_see_consistent_levels_while_feed_writes():
+    # Every level's size encodes its price: a reader that pairs one snapshot's prices with another's
+    # sizes, or indexes a column that shrank under it, fails.
+    import sys, threading
+    snaps = [[[{"px": str(p / 10**5), "sz": str(p), "n": 1} for p in range(12698 - k, 12698 - k - depth, -1)],
+              [{"px": str(p / 10**5), "sz": str(p), "n": 1} for p in range(12700 + k, 12700 + k + depth)]]
+             for k, depth in ((0, 1), (3, 6), (1, 2), (5, 4))]
+    b = L2Book("@223")
+    b.apply_snapshot(snaps[0])
+    stop, errors = threading.Event(), []
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            b.apply_snapshot(snaps[i % len(snaps)])
+            b.apply_update(True, (12699 + i % 3) / 10**5, 12699 + i % 3)
+            b.apply_update(False, 0.127, 0)
+
+    def read():
+        try:
+            while not stop.is_set():
+                for is_bid in (True, False):
+                    for n in range(6):
+                        lv = b.level(is_bid, n)
+                        if lv is not None:
+                            assert round(lv[0] * 10**5) == lv[1], lv
+                b.mid()
+        except Exception as e:  # IndexError or a mismatched level
+            errors.append(e)
+
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+    try:
+        for t in threads:
+            t.start()
+        threading.Event().wait(1.0)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(5)
+        sys.setswitchinterval(old)
+    assert not errors, errors[:3]
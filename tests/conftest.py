@@ -0,0 +1,20 @@
+# Shared by the offline tests:  from conftest import make_cfg
+import os
+from decimal import Decimal
+
+from mm_bot.config import Settings
+
+def make_cfg(**kw) -> Settings:
+    """Settings for one @223 (SIM/USDC) bot against the simulator or a recording venue; kw overrides any field."""
+    base = dict(
+        PRIVATE_KEY="0x" + os.urandom(32).hex(), IS_MAINNET=False, BASE_URL="http://x",
+        SYMBOL="@223", SIZE=Decimal(100), PRICE=None, TIF="Gtc", POST_ONLY=True, RETRIES=3,
+        INCLUDE_BUILDER=False, BUILDER_ADDR="0x0", BUILDER_FEE_TENTH_BPS=0,
+        PX_DEC=6, SZ_DEC=0, TICK_FALLBACK=Decimal("0.000001"), LOTSZ_FALLBACK=Decimal(1),
+        CLIENT_ID=None, ORDERS_PER_MINUTE=60, BUY_PER_MIN=30, SELL_PER_MIN=30, ORDER_TTL_SEC=20,
+        RANGE_LOWER=None, RANGE_UPPER=None, RANGE_PCT=Decimal("0.03"), USER_ADDR=None,
+        AUTH_API_URL=None, AUTH_API_TOKEN=None, PASSWORD=None, START_SIDE="sell",
+        IMBALANCE_SELL_BOOST=1000, WS_ENABLED=False, HTTP_KEEPALIVE_SEC=0, NONCE_FILE="", PANEL_FPS=0,
+    )
+    base.update(kw)
+    return Settings(**base)
@@ -0,0 +1,82 @@
+# AsyncMakerBot (ENGINE=async) quote slots against a recording venue.
+#   PYTHONPATH=src python -m pytest -q tests/engine_test.py
+import asyncio, time
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import exchange
+from mm_bot.clock import VirtualClock
+from mm_bot.engine import AsyncMakerBot
+from mm_bot.info import AssetInfo
+from mm_bot.sched import Cadence
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+def _venue(sent):
+    def handle(action):
+        sent.append(action)
+        n = len(action.get("orders") or action.get("modifies") or ())
+        statuses = [{"resting": {"oid": 100 * len(sent) + i}} for i in range(n)]
+        return {"status": "ok", "response": {"type": action["type"], "data": {"statuses": statuses}}}
+    return handle
+
+def _slots(bot, n):
+    async def run():
+        bot._sem = asyncio.Semaphore(4)
+        bot._start_minute()
+        bot._quote = Cadence("quote", 1.0, start=bot.clock.monotonic())
+        for _ in range(n):
+            bot.stats.last_mid, bot.mid_ts = Decimal("0.126985"), bot.clock.monotonic()
+            await bot._quote_step_async()
+            await asyncio.gather(*list(bot._orders))
+    asyncio.run(run())
+
+def test_pair_quotes_one_action_per_slot():
+    sent = []
+    exchange.attach_venue(_venue(sent))
+    try:
+        bot = AsyncMakerBot(make_cfg(PAIR_QUOTES=True), ASSET, VirtualClock(1000.0))
+        _slots(bot, 2)
+        assert [len(a["orders"]) for a in sent] == [2, 2]
+        assert [o["b"] for o in sent[0]["orders"]] == [True, False]
+        assert (bot.stats.buys_this_min, bot.stats.sells_this_min, len(bot.orders.open)) == (2, 2, 4)
+
+        sent.clear()
+        bot = AsyncMakerBot(make_cfg(), ASSET, VirtualClock(1000.0))
+        _slots(bot, 2)
+        assert [len(a["orders"]) for a in sent] == [1, 1]  # one side per slot without PAIR_QUOTES
+    finally:
+        exchange.attach_venue(None)
+
+@pytest.mark.parametrize("pair", [True, False])
+def test_minute_caps_hold_with_slow_submits_in_flight(monkeypatch, pair):
+    sent = []
+    venue = _venue(sent)
+
+    async def slow_send(cfg, action):
+        await asyncio.sleep(0.02)  # every reply takes a while: several orders are in flight at once
+        return venue(action)
+    monkeypatch.setattr(exchange, "abuild_and_send", slow_send)
+    monkeypatch.setattr(exchange, "VENUE", lambda action: time.sleep(0.02) or venue(action))
+
+    bot = AsyncMakerBot(make_cfg(PAIR_QUOTES=pair, ORDERS_PER_MINUTE=6, BUY_PER_MIN=3, SELL_PER_MIN=3, MAX_INFLIGHT=4),
+                        ASSET, VirtualClock(1000.0))
+    async def run():
+        bot._sem = asyncio.Semaphore(bot.cfg.MAX_INFLIGHT)
+        bot._start_minute()
+        bot._quote = Cadence("quote", 1.0, start=bot.clock.monotonic())
+        for _ in range(10):
+            bot.stats.last_mid, bot.mid_ts = Decimal("0.126985"), bot.clock.monotonic()
+            await bot._quote_step_async()
+            await asyncio.sleep(0)  # the slot returns while its order is still in flight
+        await asyncio.gather(*list(bot._orders))
+    asyncio.run(run())
+
+    orders = [o for a in sent for o in a["orders"]]
+    assert sum(o["b"] for o in orders) == bot.stats.buys_this_min == 3
+    assert sum(not o["b"] for o in orders) == bot.stats.sells_this_min == 3
+    assert len(bot.orders.open) == 6
+    if pair:
+        assert [len(a["orders"]) for a in sent] == [2, 2, 2]
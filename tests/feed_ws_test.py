@@ -0,0 +1,147 @@
+# Offline check of mm_bot.feed against a local stand-in for the Hyperliquid /ws and /info endpoints.
+#   PYTHONPATH=src python -m pytest -q tests/feed_ws_test.py   (or: PYTHONPATH=src python tests/feed_ws_test.py)
+import asyncio, json, threading, time
+from decimal import Decimal
+
+from aiohttp import web, WSMsgType
+
+from mm_bot import info
+from mm_bot.feed import MarketFeed
+
+class StandIn:
+    """aiohttp app on its own thread: pushes allMids/bbo to subscribers, serves allMids over REST."""
+
+    def __init__(self):
+        self.mids = {"@223": "0.126985"}
+        self.subs_seen = []
+        self.rest_calls = 0
+        self.sockets = set()
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True).start()
+        ready.wait(5)
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get("/ws", self._ws)
+        app.router.add_post("/info", self._info)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _info(self, request):
+        self.rest_calls += 1
+        return web.json_response(self.mids)
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                if req.get("method") == "ping":
+                    await ws.send_str(json.dumps({"channel": "pong"}))
+                    continue
+                sub = req.get("subscription") or {}
+                self.subs_seen.append(sub)
+                if sub.get("type") == "allMids":
+                    await ws.send_str(json.dumps({"channel": "allMids", "data": {"mids": self.mids}}))
+                elif sub.get("type") == "bbo":
+                    await ws.send_str(json.dumps({"channel": "bbo", "data": {
+                        "coin": sub["coin"], "time": 0,
+                        "bbo": [{"px": "0.12698", "sz": "500", "n": 1}, {"px": "0.12699", "sz": "700", "n": 2}]}}))
+        finally:
+            self.sockets.discard(ws)
+        return ws
+
+    def push_mids(self, mids):
+        self.mids = mids
+        async def _push():
+            for ws in list(self.sockets):
+                await ws.send_str(json.dumps({"channel": "allMids", "data": {"mids": mids}}))
+        asyncio.run_coroutine_threadsafe(_push(), self.loop).result(5)
+
+    def drop_all(self):
+        async def _drop():
+            for ws in list(self.sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(_drop(), self.loop).result(5)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+def _wait(pred, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if pred():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_feed_caches_mid_and_bbo():
+    srv = StandIn()
+    feed = MarketFeed(srv.url("/ws").replace("http", "ws"))
+    feed.subscribe_all_mids()
+    feed.subscribe_bbo("@223")
+    feed.start()
+    try:
+        assert _wait(lambda: feed.bbo("@223") is not None and feed.mid("@223") is not None)
+        assert feed.mid("@223") == Decimal("0.126985")
+        b = feed.bbo("@223")
+        assert (b.bid, b.ask, b.ask_sz) == (Decimal("0.12698"), Decimal("0.12699"), Decimal("700"))
+
+        srv.push_mids({"@223": "0.127"})
+        assert _wait(lambda: feed.mid("@223") == Decimal("0.127"))
+    finally:
+        feed.stop()
+
+def test_feed_reconnects_and_resubscribes():
+    srv = StandIn()
+    feed = MarketFeed(srv.url("/ws").replace("http", "ws"))
+    feed.subscribe_all_mids()
+    feed.start()
+    try:
+        assert _wait(lambda: feed.mid("@223") is not None)
+        srv.drop_all()
+        assert _wait(lambda: feed.connects >= 2 and feed.is_live())
+        assert len([s for s in srv.subs_seen if s.get("type") == "allMids"]) >= 2
+        # subscription added while connected is sent immediately and replayed on reconnect
+        feed.subscribe_bbo("@7")
+        assert _wait(lambda: {"type": "bbo", "coin": "@7"} in srv.subs_seen)
+    finally:
+        feed.stop()
+
+def test_get_mid_by_index_prefers_feed_and_falls_back_to_rest(monkeypatch):
+    srv = StandIn()
+    monkeypatch.setattr(info, "INFO_URL", srv.url("/info"))
+    monkeypatch.setattr(info, "REST_BOOK", False)  # the stand-in serves allMids only
+    feed = MarketFeed(srv.url("/ws").replace("http", "ws"))
+    feed.subscribe_all_mids()
+    feed.start()
+    info.attach_feed(feed)
+    try:
+        assert _wait(feed.is_live)
+        before = srv.rest_calls
+        assert info.get_mid_by_index(223) == Decimal("0.126985")
+        assert srv.rest_calls == before
+
+        feed.stop()
+        assert info.get_mid_by_index(223) == Decimal("0.126985")
+        assert srv.rest_calls == before + 1
+    finally:
+        info.attach_feed(None)
+        feed.stop()
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"ok  {name}")
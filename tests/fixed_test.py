@@ -0,0 +1,38 @@
+# Equivalence of the integer tick/lot path (mm_bot.fixed) with the Decimal helpers in mm_bot.utils.
+#   PYTHONPATH=src python -m pytest -q tests/fixed_test.py
+import random
+from decimal import Decimal
+
+from mm_bot.fixed import FixedStep, fixed_step
+from mm_bot.utils import decimals_of, fmt_decimal_str, snap_to_step
+
+STEPS = ["0.000001", "0.000005", "0.00001", "0.00005", "0.0001", "0.001", "0.01", "0.5", "1", "10", "0.0000010"]
+
+def _legacy(x: Decimal, step: Decimal, direction: str) -> str:
+    return fmt_decimal_str(snap_to_step(x, step, direction=direction), decimals_of(step))
+
+def test_snap_wire_matches_decimal_path():
+    rnd = random.Random(42)
+    for st in STEPS:
+        step = Decimal(st)
+        fs = FixedStep(step)
+        for _ in range(2000):
+            mag = rnd.choice([1, 10, 1000, 100000])
+            x = Decimal(rnd.randint(0, 10 ** 9)) / Decimal(10 ** 9) * mag
+            x = x.quantize(Decimal(1).scaleb(-rnd.randint(0, 12)))
+            for direction in ("down", "up"):
+                assert fs.snap_wire(x, direction) == _legacy(x, step, direction), (st, x, direction)
+
+def test_edge_values():
+    for st, x in [("0.000001", "0"), ("0.000001", "1E-7"), ("1", "100.9"), ("10", "123"),
+                  ("0.5", "5"), ("0.000005", "0.1269857"), ("0.000001", "0.126985")]:
+        step, x = Decimal(st), Decimal(x)
+        assert fixed_step(step).snap_wire(x) == _legacy(x, step, "down")
+
+def test_units_roundtrip_and_steps():
+    fs = fixed_step(Decimal("0.000001"))
+    u = fs.units(Decimal("0.126985"))
+    assert u == 126985
+    assert fs.to_decimal(u + fs.steps(3)) == Decimal("0.126988")
+    assert fs.units_from_float(0.126985) == 126985
+    assert fs.units("0.1269859") == 126985
@@ -0,0 +1,75 @@
+# Offline checks of the fleet's shared-memory market table and stats aggregation.
+#   PYTHONPATH=src python -m pytest -q tests/fleet_test.py
+import multiprocessing as mp
+import os, subprocess, sys, time
+from decimal import Decimal
+
+from mm_bot.fleet import SharedFeed, SharedMarket
+from mm_bot.stats import Stats, sum_stats
+
+def _child_read(name, out):
+    m = SharedMarket.attach(name, track=False)
+    out.put(SharedFeed(m).mid("@223"))
+    m.close()
+
+def test_shared_market_roundtrip():
+    m = SharedMarket.create([223, 107])
+    try:
+        feed = SharedFeed(SharedMarket.attach(m.name), stale_after=5)
+        assert feed.mid("@223") is None and feed.mid("@999") is None and feed.mid("PURR/USDC") is None
+
+        m.publish(223, mid="0.126985")
+        m.publish(223, bid="0.126984", bid_sz="500", ask="0.126986", ask_sz="1200")
+        m.publish(107, bid="1.2344", ask="1.2346")
+        assert feed.mid("@223") == Decimal("0.126985")  # allMids value kept across bbo updates
+        b = feed.bbo("@223")
+        assert (b.bid, b.bid_sz, b.ask, b.ask_sz) == (Decimal("0.126984"), Decimal(500), Decimal("0.126986"), Decimal(1200))
+        assert feed.mid("@107") == Decimal("1.2345")  # no allMids yet: mid of the bbo
+        assert feed.book("@223") is None
+
+        # the BBO keeps the time it was written: a newer allMids tick does not refresh it
+        m.publish(107, ts=time.time() - 3, bid="1.2344", ask="1.2346")
+        m.publish(107, mid="1.2345")
+        assert 2.5 < time.monotonic() - feed.bbo("@107").ts < 4
+        m.publish(107, ts=time.time() - 6, bid="1.2344", ask="1.2346")
+        m.publish(107, mid="1.2345")
+        assert feed.mid("@107") is not None and feed.bbo("@107") is None  # record alive, BBO past stale_after
+
+        m.publish(107, ts=time.time() - 60, mid="1.3")
+        assert feed.mid("@107") is None  # stale
+        assert not feed.is_live()
+        m.heartbeat()
+        assert feed.is_live()
+
+        ctx = mp.get_context("spawn")
+        q = ctx.Queue()
+        p = ctx.Process(target=_child_read, args=(m.name, q))
+        p.start()
+        assert q.get(timeout=30) == Decimal("0.126985")
+        p.join(10)
+        feed.stop()
+    finally:
+        m.close()
+
+def test_untracked_attach_outlives_the_reader():
+    m = SharedMarket.create([223])
+    try:
+        m.publish(223, mid="0.126985")
+        # its own interpreter, so its own resource tracker: a tracked attach would unlink the segment on exit
+        code = ("from mm_bot.fleet import SharedFeed, SharedMarket; "
+                f"print(SharedFeed(SharedMarket.attach({m.name!r}, track=False)).mid('@223'))")
+        env = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(__file__), "..", "src"))
+        r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60, env=env)
+        assert (r.stdout, r.stderr) == ("0.126985\n", "")
+        time.sleep(0.2)
+        SharedMarket.attach(m.name).close()  # still there
+    finally:
+        m.close()
+
+def test_sum_stats():
+    a = Stats(started_at=100.0, total_buy=3, total_sell=2, notional_buy=Decimal("1.5"), cancels=1)
+    b = Stats(started_at=50.0, total_buy=1, notional_buy=Decimal("2.25"), errors=4)
+    t = sum_stats([a.snapshot(), b])
+    assert (t.started_at, t.total_buy, t.total_sell, t.notional_buy, t.cancels, t.errors) == \
+        (50.0, 4, 2, Decimal("3.75"), 1, 4)
+    assert sum_stats([]).total_buy == 0
@@ -0,0 +1,83 @@
+# Offline checks of the Prometheus metrics (sharded counters, HDR histograms, exposition).
+#   PYTHONPATH=src python -m pytest -q tests/metrics_test.py
+import threading
+from decimal import Decimal
+
+from mm_bot import exchange, info, metrics
+from mm_bot.sim import SimExchange, SimMarket
+from conftest import make_cfg
+
+def test_sharded_counter_and_histogram():
+    c = metrics.counter("t_events_total", "test", ("kind",))
+    h = metrics.histogram("t_latency_seconds", "test", ("kind",))
+
+    def work():
+        for i in range(1000):
+            c.inc("a")
+            h.observe((i + 1) / 1e4, "a")  # 0.1 ms .. 100 ms
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert c.value("a") == 4000 and h.count("a") == 4000
+    for q, exact in ((0.5, 0.05), (0.99, 0.099)):
+        assert exact <= h.quantile(q, "a") <= exact * 1.125
+
+    text = metrics.render()
+    assert '# TYPE t_latency_seconds histogram' in text and 't_events_total{kind="a"} 4000' in text
+    buckets = [ln for ln in text.splitlines() if ln.startswith("t_latency_seconds_bucket")]
+    counts = [int(ln.rsplit(" ", 1)[1]) for ln in buckets]
+    assert counts == sorted(counts) and buckets[-1] == 't_latency_seconds_bucket{kind="a",le="+Inf"} 4000'
+    assert 't_latency_seconds_bucket{kind="a",le="0.131072"} 4000' in text  # all <= 100 ms
+
+def test_exited_threads_fold_into_the_retired_cell():
+    c = metrics.counter("t_short_total", "test", ("kind",))
+    h = metrics.histogram("t_short_seconds", "test", ("kind",))
+
+    def work():
+        c.inc("a", n=2)
+        h.observe(0.001, "a")
+
+    for _ in range(50):
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+    c.inc("a")  # this thread's cell stays live
+    assert len(c._cells) == 2 and len(h._cells) == 1  # retired + live
+    assert c.value("a") == 101 and h.count("a") == 50
+    assert 't_short_seconds_count{kind="a"} 50' in metrics.render()
+
+def test_order_outcomes_and_retries_against_sim():
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                      taker_rate=0.0, vol_ticks=0.0, balances={"SIM": Decimal(0), "USDC": Decimal(100000)})
+    cfg = make_cfg(BASE_URL=sim.start(), PANEL_FPS=4.0)
+    info.init_info(cfg)
+    exchange.init_exchange(cfg)
+    asset = info.resolve_asset_fields(cfg)
+    resting0 = metrics.ORDERS.value("buy", "resting")
+    retries0 = metrics.RETRIES.value("post_only_cross")
+    signs0 = metrics.SIGN_SECONDS.count()
+
+    exchange.smart_submit(cfg, asset, True, Decimal("0.127000"), cfg.SIZE, "Gtc", True, 3)  # crosses once
+    assert metrics.ORDERS.value("buy", "resting") == resting0 + 1
+    assert metrics.RETRIES.value("post_only_cross") == retries0 + 1
+    assert metrics.SIGN_SECONDS.count() == signs0 + 2
+    endpoint = cfg.BASE_URL.split("://", 1)[1] + "/exchange"
+    assert metrics.HTTP_SECONDS.count(endpoint) >= 2
+    assert f'mm_http_request_seconds_count{{endpoint="{endpoint}"}}' in metrics.render()
+
+def test_label_values_are_escaped():
+    c = metrics.counter("t_escaped_total", "test", ("err",))
+    c.inc('bad "px"\nC:\\tmp')
+    def samples():
+        return [("t_escaped_gauge", "gauge", "test", {"coin": 'a"b'}, 1)]
+    metrics.add_collector(samples)
+    try:
+        text = metrics.render()
+    finally:
+        metrics.remove_collector(samples)
+    assert 't_escaped_total{err="bad \\"px\\"\\nC:\\\\tmp"} 1' in text
+    assert 't_escaped_gauge{coin="a\\"b"} 1' in text
+    assert all(not ln.startswith('C:') for ln in text.splitlines())  # the newline did not split the sample
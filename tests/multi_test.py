@@ -0,0 +1,107 @@
+# Offline checks of multi-symbol mode against the local simulator: per-pair settings, one shared
+# allMids fetch, and order actions from several pairs coalesced into one signed action.
+#   PYTHONPATH=src python -m pytest -q tests/multi_test.py
+import threading
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import exchange, info
+from mm_bot.clock import VirtualClock
+from mm_bot.config import symbol_key, symbol_settings
+from mm_bot.exchange import ActionBatcher
+from mm_bot.info import AssetInfo
+from mm_bot.sim import SimExchange, SimMarket
+from mm_bot.strategy import SCHEDULE_CANCEL_MIN_SEC, MakerBot
+from conftest import make_cfg
+
+def test_symbol_settings_overrides(monkeypatch):
+    assert symbol_key("@223") == "223" and symbol_key("purr/usdc") == "PURR_USDC"
+    monkeypatch.setenv("SIZE_223", "50")
+    monkeypatch.setenv("START_SIDE_PURR_USDC", "buy")
+    cfg = make_cfg(SYMBOLS=("@223", "PURR/USDC"))
+    a, b = symbol_settings(cfg)
+    assert (a.SYMBOL, a.SIZE, a.START_SIDE) == ("@223", Decimal(50), "sell")
+    assert (b.SYMBOL, b.SIZE, b.START_SIDE) == ("PURR/USDC", Decimal(100), "buy")
+    single = make_cfg()
+    assert symbol_settings(single) == [single]
+
+def test_pairs_share_mids_and_batched_orders():
+    sim = SimExchange(
+        [SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985")),
+         SimMarket(107, "ALT/USDC", Decimal("0.0001"), Decimal(1), Decimal("1.2345"))],
+        taker_rate=0.0, vol_ticks=0.0,
+        balances={"SIM": Decimal(0), "ALT": Decimal(0), "USDC": Decimal(100000)},
+    )
+    base = sim.start()
+    cfg = make_cfg(BASE_URL=base, SYMBOLS=("@223", "@107"), MIDS_CACHE_SEC=5.0)
+    info.init_info(cfg)
+    exchange.init_exchange(cfg)
+    uni = info.get_universe()
+    assets = [info.resolve_asset_fields(c, uni) for c in symbol_settings(cfg)]
+    assert [a.name for a in assets] == ["SIM/USDC", "ALT/USDC"]
+
+    before = sim.counters["info:allMids"]
+    mids = [info.get_mid_by_index(a.index) for a in assets]
+    assert mids == [Decimal("0.126985"), Decimal("1.2345")]
+    assert sim.counters["info:allMids"] - before == 1
+
+    batcher = ActionBatcher(cfg, window_ms=50).start()
+    exchange.attach_batcher(batcher)
+    results = {}
+    try:
+        def quote(asset, px):
+            results[asset.name] = exchange.smart_submit(cfg, asset, True, px, cfg.SIZE, "Gtc", True, 1)
+        threads = [threading.Thread(target=quote, args=(a, m * Decimal("0.99"))) for a, m in zip(assets, mids)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+    finally:
+        exchange.attach_batcher(None)
+        batcher.shutdown()
+    for res in results.values():
+        assert len(res["response"]["data"]["statuses"]) == 1 and "resting" in res["response"]["data"]["statuses"][0]
+    assert len(results) == 2 and batcher.actions_in == 2 and batcher.actions_out == 1
+    assert sim.call(lambda: len(sim.orders)) >= 2
+
+def test_cancel_all_schedule_cancel_fallback():
+    sent = []
+    exchange.attach_venue(lambda action: sent.append(action["type"]) or {"status": "ok", "response": {"type": "default"}})
+    asset = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+    clock = VirtualClock(1000.0)
+    try:
+        bot = MakerBot(make_cfg(), asset, clock)
+        bot.cancel_all()  # nothing tracked: scheduleCancel covers untracked orders
+        bot.cancel_all()  # ... but not again on every quote slot
+        assert sent == ["scheduleCancel"]
+        clock.now += SCHEDULE_CANCEL_MIN_SEC + 1
+        bot.cancel_all()
+        assert sent == ["scheduleCancel"] * 2
+
+        sent.clear()  # pairs sharing the wallet: never cancel the other pairs' orders
+        for cfg in symbol_settings(make_cfg(SYMBOLS=("@223", "@107"))):
+            MakerBot(cfg, asset, clock).cancel_all()
+        assert sent == []
+    finally:
+        exchange.attach_venue(None)
+
+def test_batcher_futures_always_resolve(monkeypatch):
+    cfg = make_cfg()
+    monkeypatch.setattr(exchange, "_send", lambda cfg, action: {"status": "ok", "response": {"type": "order", "data": {"statuses": []}}})
+    monkeypatch.setattr(exchange, "slice_statuses", lambda res, start, n: 1 / 0)  # fails after the send
+    b = ActionBatcher(cfg, window_ms=1).start()
+    fut = b.submit_future({"type": "order", "orders": [{}], "grouping": "na"})
+    with pytest.raises(ZeroDivisionError):
+        fut.result(timeout=5)
+    b.shutdown()
+    with pytest.raises(RuntimeError):
+        b.submit({"type": "cancel", "cancels": [{}]})
+    with pytest.raises(RuntimeError):
+        ActionBatcher(cfg).submit({"type": "cancel", "cancels": [{}]})  # never started
+
+def test_split_statuses_of_non_object_reply():
+    for res in (None, "Internal server error"):
+        parts = exchange.split_statuses(res, 2)
+        assert parts == [{"status": "err", "response": str(res)}] * 2
+        assert not any(exchange.entry_ok(p) for p in parts)
@@ -0,0 +1,65 @@
+# Nonce allocator: one strictly increasing sequence per counter file, across threads and processes.
+#   PYTHONPATH=src python -m pytest -q tests/nonce_test.py
+import multiprocessing as mp
+import threading, time
+from decimal import Decimal
+
+from mm_bot.nonce import NONCE_RESYNC_MS, NonceAllocator
+from mm_bot.sim import NONCE_WINDOW, SimExchange, SimMarket
+
+def _draw(path, n, out):
+    a = NonceAllocator(path)
+    out.put([a.next() for _ in range(n)])
+    a.close()
+
+def _increasing(xs):
+    return all(x < y for x, y in zip(xs, xs[1:]))
+
+def test_two_allocators_share_a_file_across_threads(tmp_path):
+    path = str(tmp_path / "nonce.bin")
+    allocs, got = [NonceAllocator(path), NonceAllocator(path)], []
+    def run(a):
+        mine = [a.next() for _ in range(500)]
+        assert _increasing(mine)
+        got.extend(mine)
+    ts = [threading.Thread(target=run, args=(allocs[i % 2],)) for i in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert len(got) == len(set(got)) == 2000
+    assert sum(a.bumped for a in allocs) > 0  # 2000 nonces cannot all fit in distinct wall-clock ms
+    for a in allocs:
+        a.close()
+        a.close()  # idempotent
+    assert allocs[0].next() > max(got)  # reopens the file
+
+def test_allocators_in_separate_processes(tmp_path):
+    path = str(tmp_path / "nonce.bin")
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    ps = [ctx.Process(target=_draw, args=(path, 300, q)) for _ in range(3)]
+    for p in ps:
+        p.start()
+    runs = [q.get(timeout=60) for _ in ps]
+    for p in ps:
+        p.join(10)
+    assert all(_increasing(r) for r in runs)
+    flat = [n for r in runs for n in r]
+    assert len(set(flat)) == len(flat) == 900
+
+def test_note_response_recovers_from_too_old_nonce(tmp_path):
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))])
+    noop = {"type": "scheduleCancel"}
+    ahead = int(time.time() * 1000) + NONCE_RESYNC_MS // 2  # another sender on the wallet, running ahead
+    for i in range(NONCE_WINDOW):
+        assert sim.handle_action({"action": noop, "nonce": ahead + i}).get("status") == "ok"
+
+    a = NonceAllocator(str(tmp_path / "nonce.bin"))
+    res = sim.handle_action({"action": noop, "nonce": a.next()})
+    assert res["status"] == "err" and a.note_response(res)
+    assert sim.handle_action({"action": noop, "nonce": a.next()}).get("status") == "ok"
+    assert a.metrics()["rejected"] == a.metrics()["resynced"] == 1
+    assert not a.note_response({"status": "err", "response": "Insufficient margin"})
+    assert not a.note_response({"status": "ok", "response": {"type": "default"}})
+    a.close()
@@ -0,0 +1,145 @@
+# Order lifecycle from exchange events: submit replies, fills, cancels, REST and WS reconcile.
+#   PYTHONPATH=src python -m pytest -q tests/orders_test.py
+import time
+from decimal import Decimal
+
+from mm_bot import exchange, info
+from mm_bot.clock import VirtualClock
+from mm_bot.feed import MarketFeed, ws_url_from_base
+from mm_bot.info import AssetInfo
+from mm_bot.orders import CANCELLED, FILLED, PARTIAL, REJECTED, RESTING, OrderManager, is_close_cloid
+from mm_bot.sim import HOUSE, SimExchange, SimMarket
+from mm_bot.stats import Stats
+from mm_bot.strategy import MakerBot
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+def _ok(status) -> dict:
+    return {"status": "ok", "response": {"type": "order", "data": {"statuses": [status]}}}
+
+def _fill(oid, tid, sz, px="0.1", side="B", coin="@223", t=None) -> dict:
+    return {"coin": coin, "px": px, "sz": sz, "side": side, "oid": oid, "tid": tid,
+            "time": int(time.time() * 1000) if t is None else t}
+
+def _sim() -> SimExchange:
+    m = SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))
+    return SimExchange([m], depth=0, taker_rate=0.0, vol_ticks=0.0)
+
+def _wire(px, is_buy, cloid) -> dict:
+    return {"a": 10223, "b": is_buy, "p": px, "s": "100", "r": False, "t": {"limit": {"tif": "Alo"}}, "c": cloid}
+
+def test_lifecycle_from_fills():
+    st = Stats()
+    clock = VirtualClock(time.time())
+    om = OrderManager(st, ASSET, clock, user="0xabc", ttl=20)
+    o = om.on_submit("0x01", True, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": 7}}))
+    assert o.state == RESTING and st.total_buy == 1 and st.vol_base_buy == 0
+
+    om.on_user_fills({"fills": [_fill(7, 1, "40"), _fill(7, 1, "40"), _fill(99, 2, "5", coin="@1")]})
+    assert o.state == PARTIAL and o.filled == 40 and st.fills == 1 and st.notional_buy == Decimal("4.0")
+    om.on_user_fills({"fills": [_fill(7, 3, "60")]})
+    assert o.state == FILLED and "0x01" not in om.open and st.vol_base_buy == 100
+
+    # a fill that beats the submit reply is applied once the oid is known
+    om.on_user_fills({"fills": [_fill(8, 4, "100", side="A")]})
+    assert om.on_submit("0x02", False, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": 8}})).state == FILLED
+
+    bad = om.on_submit("0x03", True, Decimal("0.1"), Decimal(100), _ok({"error": "Post only order would have immediately matched"}))
+    assert bad.state == REJECTED and st.rejected == 1 and st.total_buy == 1
+
+    om.on_submit("0x04", True, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": 10}}))
+    om.on_submit("0x05", True, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": 11}}))
+    om.on_submit("0x06", True, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": 12}}))
+    om.on_order_updates([{"order": {"coin": "@223", "oid": 12}, "status": "filled"}])
+    assert om.take_expired() == []
+    clock.sleep(21)
+    assert om.take_expired() == ["0x04", "0x05"] and om.take_expired() == []  # filled 0x06 is skipped
+    gone = {"status": "ok", "response": {"type": "cancel", "data": {"statuses": [
+        {"error": "Order was never placed, already canceled, or filled. asset=10223"}]}}}
+    assert om.on_cancel_results(["0x04", "0x05"], [_ok("success"), gone]) == (1, 0)
+    assert not om.open and om.done["0x04"].state == CANCELLED and om.ghosts == 1
+
+def test_expiry_heap_pops_only_due_orders():
+    clock = VirtualClock(1000.0)
+    om = OrderManager(Stats(), ASSET, clock, ttl=10)
+    for i in range(5000):
+        om.on_submit(f"0x{i:04x}", i % 2 == 0, Decimal("0.1"), Decimal(100), _ok({"resting": {"oid": i}}))
+        clock.sleep(0.01)  # placed over 50 s
+    for i in range(0, 5000, 2):  # half fill before their deadline; they leave the heap lazily
+        om.on_user_fills([_fill(i, i, "100")])
+    assert om.take_expired() == [f"0x{i:04x}" for i in range(1, 4000, 2)]  # deadline < 1060
+    assert len(om._expiry) <= 2 * len(om.open) + 64 + 1000
+    err = {"status": "err", "response": "timeout"}
+    assert om.on_cancel_results(["0x0001"], [err]) == (0, 1)
+    assert om.take_expired() == ["0x0001"]  # a failed cancel comes straight back
+    clock.sleep(100)
+    assert len(om.take_expired()) == 500 and om.next_deadline() is None
+
+def test_rest_reconcile_against_sim():
+    sim = _sim()
+    sim.step(0.0)
+    info.attach_venue(sim.handle_info)
+    try:
+        st = Stats()
+        clock = VirtualClock(time.time() - 10)
+        om = OrderManager(st, ASSET, clock, user="0xabc")
+        for cloid, px, is_buy in (("0x0a", "0.126980", True), ("0x0b", "0.126990", False)):
+            om.on_submit(cloid, is_buy, Decimal(px), Decimal(100), _ok(sim.place(_wire(px, is_buy, cloid))))
+        clock.sleep(10)
+        m = sim.markets[10223]
+        sim.take(m, False, None, 100, owner=HOUSE)  # sells into our bid
+        assert om.maybe_sync(5.0) and not om.maybe_sync(5.0)  # second call is inside the interval
+        assert om.done["0x0a"].state == FILLED and list(om.open) == ["0x0b"]
+        assert st.fills == 1 and st.vol_base_buy == 100 and st.notional_buy == Decimal("12.698")
+    finally:
+        info.attach_venue(None)
+
+def test_close_ioc_fills_are_not_maker_fills():
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                      taker_rate=0.0, vol_ticks=0.0)
+    sim.step(0.0)
+    sim.balances["SIM"] = Decimal(300)
+    nonce = iter(range(1, 100))
+    info.attach_venue(sim.handle_info)
+    exchange.attach_venue(lambda action: sim.handle_action({"action": action, "nonce": next(nonce)}))
+    try:
+        cfg = make_cfg(USER_ADDR="0xabc")
+        clock = VirtualClock(time.time() - 10)
+        bot = MakerBot(cfg, ASSET, clock)
+        bot.place_one(False, Decimal("0.126985"))  # a quote that a taker then lifts
+        sim.take(sim.markets[10223], True, None, 100, owner=HOUSE)
+        bot.close_position()  # IOC sell of the remaining 200 base into the house bids
+        clock.sleep(10)
+        assert bot.orders.maybe_sync(5.0)
+
+        st = bot.stats
+        assert st.closes == 1 and st.vol_base_close == 200
+        assert st.close_fills == sum(is_close_cloid(f["cloid"]) for f in sim.fills) >= 1
+        assert st.fills == 1 and (st.vol_base_buy, st.vol_base_sell) == (0, 100)  # the quote's fill only
+    finally:
+        info.attach_venue(None)
+        exchange.attach_venue(None)
+
+def test_ws_streams_against_sim():
+    sim = _sim()
+    base = sim.start()
+    feed = MarketFeed(ws_url_from_base(base))
+    feed.start()
+    try:
+        st = Stats()
+        om = OrderManager(st, ASSET, user="0xabc")
+        assert om.attach_feed(feed) and feed.wait_live(5)
+        res = _ok(sim.call(sim.place, _wire("0.126980", True, "0x0c")))
+        o = om.on_submit("0x0c", True, Decimal("0.126980"), Decimal(100), res)
+        sim.call(sim.take, sim.markets[10223], False, None, 30, HOUSE)
+        deadline = time.time() + 5
+        while o.state != PARTIAL and time.time() < deadline:
+            time.sleep(0.02)
+        assert o.state == PARTIAL and st.vol_base_buy == 30
+        sim.call(sim.cancel, sim.orders[o.oid], 10223)
+        while o.state == PARTIAL and time.time() < deadline:
+            time.sleep(0.02)
+        assert o.state == CANCELLED and not om.open and not om.sync_due(0.1)  # WS live: no REST polling
+    finally:
+        feed.stop()
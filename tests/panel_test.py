@@ -0,0 +1,43 @@
+# Panel renderer: diffed frames from Stats snapshots, off without a TTY.
+#   PYTHONPATH=src python -m pytest -q tests/panel_test.py
+import re, sys, time
+from decimal import Decimal
+
+from mm_bot.info import AssetInfo
+from mm_bot.panel import PanelRenderer
+from mm_bot.stats import Stats
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+class _Cfg:
+    SYMBOL, SIZE, ORDERS_PER_MINUTE, BUY_PER_MIN, SELL_PER_MIN = "@223", Decimal(100), 60, 30, 30
+    ORDER_TTL_SEC, QUOTE_OFFSET_TICKS, RANGE_PCT = 20, 0, Decimal("0.03")
+
+def _rows(frame):
+    return [int(r) for r in re.findall(r"\x1b\[(\d+);1H", frame)]
+
+def test_frames_rewrite_only_changed_lines(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.0)  # uptime line stays put
+    st = Stats(started_at=1_700_000_000.0 - 65, last_mid=Decimal("0.126985"))
+    r = PanelRenderer(_Cfg, ASSET, st, fps=4)
+    first = r.frame()
+    assert first.startswith("\x1b[H\x1b[0J") and "Cancels: 0" in first
+    assert r.frame() == ""  # nothing changed
+
+    st.cancels = 7
+    diff = r.frame()
+    assert "Cancels: 7" in diff and len(_rows(diff)) == 1
+    assert diff.endswith("\x1b[K")
+
+    st.range_trips, st.last_action = 1, "PAIR 100"  # admin line and last-action line
+    assert len(_rows(r.frame())) == 2
+
+    r.add_panel(_Cfg, ASSET, Stats(started_at=st.started_at))  # layout changed: full redraw
+    assert r.frame().startswith("\x1b[H\x1b[0J")
+
+def test_disabled_without_tty_or_fps():
+    assert not sys.stdout.isatty()  # pytest captures stdout
+    r = PanelRenderer(_Cfg, ASSET, Stats(), fps=4)
+    r.start()
+    assert not r.enabled and r._thread is None
+    assert not PanelRenderer(_Cfg, ASSET, Stats(), fps=0).enabled
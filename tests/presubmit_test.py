@@ -0,0 +1,66 @@
+# Pre-submit pricing: post-only orders clamped against the cached BBO instead of retried after a reject.
+#   PYTHONPATH=src python -m pytest -q tests/presubmit_test.py
+import asyncio, itertools, time
+from decimal import Decimal
+
+from mm_bot import exchange, info
+from mm_bot.info import AssetInfo
+from mm_bot.metrics import CLAMPS, REJECTS, RETRIES
+from mm_bot.sim import SimExchange, SimMarket
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+def _attach() -> SimExchange:
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                      taker_rate=0.0, vol_ticks=0.0, balances={"SIM": Decimal(1000), "USDC": Decimal(100000)})
+    sim.step(0.0)  # house levels: bbo 0.126984@0.126986
+    nonces = itertools.count(1)
+    info.attach_venue(sim.handle_info)
+    exchange.attach_venue(lambda action: sim.handle_action({"action": action, "nonce": next(nonces)}))
+    return sim
+
+def _resting_px(sim, res) -> int:
+    st = res["response"]["data"]["statuses"][0]
+    assert "resting" in st, res
+    return sim.orders[st["resting"]["oid"]].px
+
+def _submit(cfg, is_buy, px):
+    return exchange.smart_submit(cfg, ASSET, is_buy, Decimal(px), cfg.SIZE, cfg.TIF, True, cfg.RETRIES)
+
+def test_reject_bbo_prices_the_next_order():
+    sim, cfg = _attach(), make_cfg()
+    try:
+        crosses, retries = REJECTS.value("post_only_cross"), RETRIES.value("post_only_cross")
+        assert info.get_bbo(223) is None
+        assert _resting_px(sim, _submit(cfg, True, "0.127000")) == 126983  # no BBO yet: rejected once
+        assert REJECTS.value("post_only_cross") == crosses + 1 and RETRIES.value("post_only_cross") == retries + 1
+        assert info.get_bbo(223) == (Decimal("0.126984"), Decimal("0.126986"), "reject")
+
+        clamps = CLAMPS.value("sell", "reject")
+        assert _resting_px(sim, _submit(cfg, False, "0.126980")) == 126985  # one tick over the bid, first try
+        res = asyncio.run(exchange.asmart_submit(cfg, ASSET, False, Decimal("0.1"), cfg.SIZE, cfg.TIF, True, 3))
+        assert _resting_px(sim, res) == 126985  # async path: same clamp
+        assert CLAMPS.value("sell", "reject") == clamps + 2 and REJECTS.value("post_only_cross") == crosses + 1
+    finally:
+        info.attach_venue(None)
+        exchange.attach_venue(None)
+
+def test_rest_book_refresh_and_max_age():
+    sim, cfg = _attach(), make_cfg()
+    info.REST_BOOK = True
+    try:
+        assert info.get_mid_by_index(223) == Decimal("0.126985") and sim.counters["info:allMids"] == 0
+        assert info.get_bbo(223) == (Decimal("0.126984"), Decimal("0.126986"), "rest")
+        clamps, crosses = CLAMPS.value("buy", "rest"), REJECTS.value("post_only_cross")
+        assert _resting_px(sim, _submit(cfg, True, "0.126990")) == 126985
+        assert CLAMPS.value("buy", "rest") == clamps + 1 and REJECTS.value("post_only_cross") == crosses
+
+        bid, ask, _, src = info._bbos[223]
+        info._bbos[223] = (bid, ask, time.monotonic() - info.BBO_MAX_AGE - 1, src)  # too old to trust
+        assert info.get_bbo(223) is None
+        assert exchange.clamp_post_only(ASSET, True, Decimal("0.2")) == Decimal("0.2")
+    finally:
+        info.REST_BOOK = False
+        info.attach_venue(None)
+        exchange.attach_venue(None)
@@ -0,0 +1,43 @@
+# Offline checks of span timing and the sampling profiler.
+#   PYTHONPATH=src python -m pytest -q tests/profiling_test.py
+import asyncio, threading, time
+
+from mm_bot import profiling
+from mm_bot.profiling import SPAN_SECONDS, enable_spans, sample_stacks, spanned
+
+@spanned("t_sync")
+def _work(x):
+    return x * 2
+
+@spanned("t_async")
+async def _awork(x):
+    await asyncio.sleep(0)
+    return x + 1
+
+def test_spans_toggle_at_runtime():
+    before = SPAN_SECONDS.count("t_sync")
+    assert _work(2) == 4 and SPAN_SECONDS.count("t_sync") == before  # off by default
+    enable_spans(True)
+    try:
+        assert _work(3) == 6 and asyncio.run(_awork(1)) == 2
+    finally:
+        enable_spans(False)
+    assert SPAN_SECONDS.count("t_sync") == before + 1 and SPAN_SECONDS.count("t_async") >= 1
+    assert profiling.span_summary()["t_sync"]["count"] == before + 1
+
+def _spin_here(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+def test_sampling_profiler_collapsed_stacks():
+    stop = threading.Event()
+    t = threading.Thread(target=_spin_here, args=(stop,), name="spinner")
+    t.start()
+    try:
+        text = sample_stacks(0.3, interval=0.005)
+    finally:
+        stop.set()
+        t.join()
+    lines = [ln for ln in text.splitlines() if ln.startswith("spinner;")]
+    assert lines and all(ln.rsplit(" ", 1)[1].isdigit() for ln in lines)
+    assert any("profiling_test.py:_spin_here" in ln for ln in lines)
@@ -0,0 +1,53 @@
+# Market-data recorder: columns, day rotation, time index and zero-copy range reads.
+#   PYTHONPATH=src python -m pytest -q tests/recorder_test.py
+import math, os, time
+from decimal import Decimal
+
+from mm_bot.backtest import load_ticks
+from mm_bot.recorder import DayFile, Recorder, iter_rows, read_range
+
+DAY = 1_760_054_400.0  # 2025-10-10 00:00:00 UTC
+
+def test_rotation_index_and_range_reads(tmp_path):
+    rec = Recorder(str(tmp_path), [223, 107])
+    for i in range(3000):  # 50 minutes either side of midnight, one row a second per index
+        ts = DAY + 86400 - 1500 + i
+        rec.record(223, mid="0.1270", bid="0.1269", ask="0.1271", bid_sz=500, ask_sz=700, ts=ts)
+        rec.record(107, mid=i, ts=ts + 0.5)
+    rec.record(999, mid=1, ts=DAY)  # not configured: ignored
+    rec.flush()
+    rec.stop()
+
+    assert sorted(os.listdir(tmp_path)) == ["20251010", "20251011"]
+    d0 = DayFile(str(tmp_path / "20251010"))
+    assert len(d0) == 3000 and d0.index[0] == 0 and d0.index[1416] == 120 and d0.index[1439] == 2880
+    ts = d0.column("ts")
+    assert list(ts) == sorted(ts)
+    m = 1430
+    assert ts[d0.index[m]] >= DAY + m * 60 and ts[d0.index[m] - 1] < DAY + m * 60
+
+    t0, t1 = DAY + 86400 - 10, DAY + 86400 + 10
+    parts = list(read_range(str(tmp_path), t0, t1))
+    assert [len(p["ts"]) for p in parts] == [20, 20]
+    assert isinstance(parts[0]["mid"], memoryview) and parts[0]["ts"][0] == t0
+    assert math.isnan(parts[1]["bid"][1])  # index 107 rows carry a mid only
+    assert parts[1]["bid_sz"][0] == 500.0
+
+    ticks = list(load_ticks(str(tmp_path), 223))
+    assert len(ticks) == 3000 and ticks[0].bid == Decimal("0.1269") and ticks[0].ask_sz == Decimal("700.0")
+
+def test_taps_are_cheap_and_feed_shaped(tmp_path):
+    rec = Recorder(str(tmp_path), [223], flush_sec=0.05).start()
+    rec.on_bbo({"coin": "@223", "time": 0, "bbo": [{"px": "0.12698", "sz": "500", "n": 1}, None]})
+    rec.on_all_mids({"mids": {"@223": "0.126985", "@1": "5"}})
+    n = 20000
+    t = time.perf_counter()
+    for _ in range(n):
+        rec.record(223, mid="0.1", ts=DAY)
+    per_call = (time.perf_counter() - t) / n
+    rec.stop()
+    assert per_call < 20e-6
+    rows = list(iter_rows(str(tmp_path)))
+    bbo = [r for r in rows if r["bid"] is not None]
+    assert len(bbo) == 1 and bbo[0]["idx"] == 223 and bbo[0]["bid"] == 0.12698 and bbo[0]["ask"] is None
+    assert rec.written == n + 2 and rec.dropped == 0
@@ -0,0 +1,127 @@
+# Offline checks of the persistent spotMeta registry.
+#   PYTHONPATH=src python -m pytest -q tests/registry_test.py
+import itertools, json, time
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import exchange, info
+from mm_bot.metrics import RETRIES
+from mm_bot.registry import AssetRegistry, StepRegistry
+from mm_bot.sim import SimExchange, SimMarket
+from conftest import make_cfg
+
+UNI = [{"name": "PURR/USDC", "pxDecimals": 4, "szDecimals": 0},
+       {"name": "HFUN/USDC", "pxDecimals": 2, "szDecimals": 2, "tickSz": "0.01"}]
+
+class _Fetch:
+    def __init__(self, uni):
+        self.uni, self.calls = uni, 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.uni is None:
+            raise ConnectionError("offline")
+        return json.loads(json.dumps(self.uni))
+
+def test_restart_uses_disk_and_matches_linear_resolve(tmp_path):
+    path = str(tmp_path / "spotmeta.json")
+    fetch = _Fetch(UNI)
+    AssetRegistry(path, 3600, "http://x", fetch).load()
+    assert fetch.calls == 1
+
+    reg = AssetRegistry(path, 3600, "http://x", fetch).load()  # restart: no network
+    assert fetch.calls == 1 and reg.source == "disk"
+    for sym in ("HFUN/USDC", "@1", "@0", "@7"):
+        assert reg.resolve(make_cfg(SYMBOL=sym)) == info.resolve_asset_fields(make_cfg(SYMBOL=sym), UNI)
+    assert reg.resolve(make_cfg(SYMBOL="@1")) is reg.resolve(make_cfg(SYMBOL="@1"))
+    assert reg.by_asset_id(10001)["name"] == "HFUN/USDC" and reg.index_of("purr/usdc") == 0
+    with pytest.raises(ValueError):
+        reg.resolve(make_cfg(SYMBOL="NOPE/USDC"))
+    assert fetch.calls == 2  # unknown name on a disk copy: one re-fetch before giving up
+
+    # A stale copy with the network down is still used; another API host's copy is not.
+    with open(path) as f:
+        d = json.load(f)
+    d["ts"] = time.time() - 7200
+    with open(path, "w") as f:
+        json.dump(d, f)
+    reg = AssetRegistry(path, 3600, "http://x", _Fetch(None)).load()
+    assert reg.source == "disk" and reg.universe == UNI
+    assert AssetRegistry(path, 3600, "http://y", _Fetch(UNI)).load().source == "network"
+
+def test_refresh_updates_handed_out_assets(tmp_path):
+    fetch = _Fetch(UNI)
+    reg = AssetRegistry(str(tmp_path / "m.json"), 3600, "http://x", fetch).load()
+    asset = reg.resolve(make_cfg(SYMBOL="HFUN/USDC"))
+    assert not reg.refresh()  # same hash
+    fetch.uni = [UNI[0], dict(UNI[1], tickSz="0.1")]
+    assert reg.refresh()
+    assert asset.tick_sz == Decimal("0.1") and reg.changes == ["HFUN/USDC: tick_sz 0.01 -> 0.1"]
+
+def test_learned_steps_used_from_first_attempt_and_across_restarts(tmp_path):
+    # The listing says 6 price decimals / whole lots of 0.1; the venue wants 0.00001 ticks and lots of 1.
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.00001"), Decimal(1), Decimal("0.12698"))],
+                      depth=0, taker_rate=0.0, vol_ticks=0.0)
+    nonces = itertools.count(1)
+    exchange.attach_venue(lambda action: sim.handle_action({"action": action, "nonce": next(nonces)}))
+    entry = {"name": "SIM/USDC", "pxDecimals": 6, "szDecimals": 1}
+    path = str(tmp_path / "steps.json")
+    cfg = make_cfg(SYMBOL="@223")
+    info.attach_steps(StepRegistry(path, 3600, "http://x").load())
+    try:
+        asset = info.asset_from_entry(cfg, entry, 223)
+        assert (asset.tick_sz, asset.lot_sz) == (Decimal("0.000001"), Decimal("0.1"))
+        submit = lambda px, sz: exchange.smart_submit(cfg, asset, True, Decimal(px), Decimal(sz), "Gtc", True, 5)
+
+        ticks = RETRIES.value("tick_size")
+        assert exchange.entry_ok(submit("0.126987", "100"))  # 0.000005 -> 0.126985 rejected, 0.00001 -> 0.12698
+        assert RETRIES.value("tick_size") == ticks + 2 and asset.tick_sz == Decimal("0.00001")
+        assert exchange.entry_ok(submit("0.126963", "100")) and RETRIES.value("tick_size") == ticks + 2
+        assert exchange.entry_ok(submit("0.126950", "100.5"))  # lot 0.1 -> 1: 100 is accepted
+        assert asset.lot_sz == Decimal(1) and info.STEPS.entries[10223]["conf"] == 1
+        assert exchange.entry_ok(submit("0.126940", "100"))
+        info.STEPS.close()
+        with open(path) as f:
+            saved = json.load(f)["steps"]["10223"]
+        assert (saved["tick"], saved["lot"], saved["conf"]) == ("0.00001", "1", 2)
+
+        # Restart: the resolved asset starts from the learned steps; a tick reject at them drops the tick only.
+        info.attach_steps(StepRegistry(path, 3600, "http://x").load())
+        again = info.asset_from_entry(cfg, entry, 223)
+        assert (again.tick_sz, again.lot_sz) == (Decimal("0.00001"), Decimal(1))
+        info.STEPS.on_reject(again, "tick_size", again.tick_sz, again.lot_sz)
+        assert (again.tick_sz, again.lot_sz) == (Decimal("0.000001"), Decimal(1))
+        assert StepRegistry(path, 3600, "http://x").load().entries[10223]["tick"] == "0.000001"
+        info.STEPS.on_reject(again, "size", again.tick_sz, again.lot_sz)
+        assert again.lot_sz == Decimal("0.1") and not StepRegistry(path, 3600, "http://x").load().entries
+
+        info.STEPS.on_accepted(again, Decimal("0.00001"), Decimal(1))
+        time.sleep(0.02)
+        assert not StepRegistry(path, 0.01, "http://x").load().entries  # expired
+    finally:
+        info.attach_steps(None)
+        exchange.attach_venue(None)
+
+def test_tick_inferred_from_post_only_cross_is_not_learned(tmp_path):
+    # "bbo was 0.12698@0.127" reads as a 0.00001 tick; the market's is 0.000001.
+    m = SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.12699"))
+    sim = SimExchange([m], depth=0, taker_rate=0.0, vol_ticks=0.0)
+    sim.rest(m, True, m.px.units(Decimal("0.12698")), m.sz.units(Decimal(1000)))
+    sim.rest(m, False, m.px.units(Decimal("0.127")), m.sz.units(Decimal(1000)))
+    nonces = itertools.count(1)
+    exchange.attach_venue(lambda action: sim.handle_action({"action": action, "nonce": next(nonces)}))
+    path = str(tmp_path / "steps.json")
+    cfg = make_cfg(SYMBOL="@223")
+    info.attach_steps(StepRegistry(path, 3600, "http://x").load())
+    try:
+        asset = info.asset_from_entry(cfg, {"name": "SIM/USDC", "pxDecimals": 6, "szDecimals": 0}, 223)
+        res = exchange.smart_submit(cfg, asset, True, Decimal("0.127000"), Decimal(100), "Gtc", True, 3)
+        assert exchange.entry_ok(res) and sim.counters["reject:Post only order would have immediately matched"] == 1
+        assert asset.tick_sz == Decimal("0.000001") and not info.STEPS.entries and info.STEPS.learned == 0
+        info.STEPS.close()
+        assert not StepRegistry(path, 3600, "http://x").load().entries
+    finally:
+        info.attach_steps(None)
+        info.attach_venue(None)
+        exchange.attach_venue(None)
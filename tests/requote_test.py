@@ -0,0 +1,108 @@
+# REQUOTE: expired orders moved with batchModify instead of a new order plus a TTL cancel.
+#   PYTHONPATH=src python -m pytest -q tests/requote_test.py
+import random
+from decimal import Decimal
+
+from mm_bot import strategy
+from mm_bot.backtest import Backtest, Tick
+from mm_bot.clock import VirtualClock
+from mm_bot.config import Settings
+from mm_bot.info import AssetInfo
+from mm_bot.orders import CANCELLED, OrderManager
+from mm_bot.sim import SimExchange, SimMarket
+from mm_bot.stats import Stats
+from mm_bot.strategy import MakerBot
+from conftest import make_cfg
+
+ASSET = AssetInfo(10223, 6, 0, 223, "SIM/USDC", Decimal("0.000001"), Decimal(1))
+
+def _cfg(**kw) -> Settings:
+    return make_cfg(BASE_URL="http://replay", RANGE_PCT=Decimal("0.01"), **kw)
+
+def _wire(is_buy, px, cloid):
+    return {"a": 10223, "b": is_buy, "p": px, "s": "100", "r": False, "t": {"limit": {"tif": "Alo"}}, "c": cloid}
+
+def _modify(sim, nonce, *entries):
+    return sim.handle_action({"action": {"type": "batchModify", "modifies": [{"oid": ref, "order": w} for ref, w in entries]},
+                              "nonce": nonce})
+
+def test_sim_batch_modify():
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))],
+                      taker_rate=0.0, vol_ticks=0.0)
+    sim.step(0.0)  # house levels: bbo 0.126984@0.126986
+    bid, ask = "0x" + "1" * 32, "0x" + "2" * 32
+    sim.handle_action({"action": {"type": "order", "orders": [_wire(True, "0.126980", bid), _wire(False, "0.126990", ask)],
+                                  "grouping": "na"}, "nonce": 1})
+    old_bid = sim.cloids[(10223, bid)].oid
+    res = _modify(sim, 2, (bid, _wire(True, "0.126981", bid)), (old_bid + 1, _wire(False, "0.126989", ask)))
+    moved = [st["resting"]["oid"] for st in res["response"]["data"]["statuses"]]
+    assert old_bid not in sim.orders and sim.cloids[(10223, bid)].oid == moved[0]
+    assert [sim.orders[oid].px for oid in moved] == [126981, 126989]
+
+    st = _modify(sim, 3, (bid, _wire(True, "0.126990", bid)))["response"]["data"]["statuses"][0]
+    assert "immediately matched" in st["error"] and (10223, bid) not in sim.cloids  # old order gone as well
+    st = _modify(sim, 4, (bid, _wire(True, "0.126981", bid)))["response"]["data"]["statuses"][0]
+    assert st["error"].startswith("Cannot modify canceled or filled order")
+    assert sim.counters["action:batchModify"] == 3 and sim.counters["modifies"] == 3
+
+def _resting(oid):
+    return {"status": "ok", "response": {"type": "order", "data": {"statuses": [{"resting": {"oid": oid}}]}}}
+
+def test_order_manager_on_modify():
+    clock = VirtualClock(0.0)
+    om = OrderManager(Stats(), ASSET, clock, ttl=10)
+    om.on_submit("0xa", True, Decimal("0.1"), Decimal(100), _resting(1))
+    om.on_submit("0xb", False, Decimal("0.2"), Decimal(100), _resting(2))
+    clock.now = 11.0
+    assert om.take_expired() == ["0xa", "0xb"]
+
+    o = om.on_modify("0xa", Decimal("0.11"), Decimal(100), _resting(3))
+    assert (o.oid, o.px, o.placed_at, o.cancelling) == (3, Decimal("0.11"), 11.0, False) and om.by_oid == {2: om.open["0xb"], 3: o}
+    om.on_order_updates([{"order": {"coin": "@223", "oid": 1, "cloid": "0xa"}, "status": "canceled"}])
+    assert om.open["0xa"] is o  # an update for the oid it had before the modify
+
+    gone = {"status": "ok", "response": {"type": "order", "data": {"statuses": [{"error": "Cannot modify canceled or filled order. asset=10223"}]}}}
+    assert om.on_modify("0xb", Decimal("0.19"), Decimal(100), gone) is None and om.done["0xb"].state == CANCELLED and om.ghosts == 1
+
+    clock.now = 20.0
+    assert om.take_expired() == []  # its first deadline (10) was replaced by 21
+    clock.now = 21.5
+    assert om.take_expired() == ["0xa"]
+
+def test_partially_filled_order_moves_with_its_remainder():
+    clock = VirtualClock(0.0)
+    om = OrderManager(Stats(), ASSET, clock, ttl=10)
+    om.on_submit("0xa", True, Decimal("0.1"), Decimal(100), _resting(1))
+    om.on_user_fills([{"coin": "@223", "oid": 1, "tid": 7, "side": "B", "px": "0.1", "sz": "30"}])
+    assert om.remaining("0xa") == 70 and om.remaining("0xz") == 0
+
+    o = om.on_modify("0xa", Decimal("0.11"), om.remaining("0xa"), _resting(2))
+    assert (o.sz, o.filled, o.state) == (Decimal(70), 0, "resting")
+    om.on_user_fills([{"coin": "@223", "oid": 2, "tid": 8, "side": "B", "px": "0.11", "sz": "70"}])
+    assert om.done["0xa"].state == "filled" and om.stats.vol_base_buy == 100  # the order never exceeded SIZE in total
+
+def test_requote_sends_unfilled_size(monkeypatch):
+    bot = MakerBot(_cfg(REQUOTE=True), ASSET, VirtualClock(0.0))
+    bot.orders.on_submit("0xa", False, Decimal("0.127"), Decimal(100), _resting(1))
+    bot.orders.on_user_fills([{"coin": "@223", "oid": 1, "tid": 7, "side": "A", "px": "0.127", "sz": "40"}])
+    bot._parked[False].append(("0xa", 0.0))
+    sent = []
+    monkeypatch.setattr(strategy, "modify_orders", lambda cfg, asset, specs: sent.extend(specs) or [_resting(2)])
+    bot.requote([False], Decimal("0.126985"))
+    assert [(sp.cloid, sp.sz) for sp in sent] == [("0xa", Decimal(60))]
+    assert bot.orders.open["0xa"].sz == 60
+
+def _ticks(n: int):
+    r, u, out = random.Random(3), 126985, []
+    for i in range(n):
+        u += r.choice((-1, 0, 0, 1))
+        out.append(Tick(1_700_000_000 + i, mid=Decimal(u) / 10**6))
+    return out
+
+def test_requote_halves_actions_same_volume():
+    off = Backtest(_cfg(), _ticks(1800)).run()
+    on = Backtest(_cfg(REQUOTE=True), _ticks(1800)).run()
+    assert on["modifies"] > 1000 and on["cancels"] == 0
+    assert on["actions"] < 0.65 * off["actions"]
+    assert on["fills"]["count"] >= 0.9 * off["fills"]["count"]
+    assert Decimal(on["volume"]["quote"]) >= Decimal("0.9") * Decimal(off["volume"]["quote"])
@@ -0,0 +1,55 @@
+# Deadline scheduler: missed-slot policies and a slow step on a virtual clock.
+#   PYTHONPATH=src python -m pytest -q tests/sched_test.py
+import threading
+
+import pytest
+
+from mm_bot.clock import VirtualClock
+from mm_bot.sched import CATCH_UP, COALESCE, MISSED_SLOTS, SKIP, Cadence, Scheduler
+
+def test_missed_slot_policies():
+    c = Cadence("t_catchup", 1.0, policy=CATCH_UP)
+    assert [c.take(3.5) for _ in range(5)] == [True, True, True, True, False]
+    assert c.next_at == 4.0 and c.missed == 0 and c.lag == 0.5
+
+    c = Cadence("t_coalesce", 1.0, policy=COALESCE)
+    assert c.take(3.5) and not c.take(3.5)
+    assert (c.next_at, c.missed, c.lag) == (4.0, 3, 3.5)
+    assert MISSED_SLOTS.value("t_coalesce") == 3
+
+    c = Cadence("t_skip", 1.0, policy=SKIP)
+    assert not c.take(3.5) and (c.next_at, c.missed, c.runs) == (4.0, 4, 0)
+    assert c.take(4.2) and c.lag == pytest.approx(0.2)
+    assert not c.take(4.9)  # the grid did not move: next slot at 5.0
+    c.defer(2)
+    assert c.next_at == 7.0
+
+    with pytest.raises(ValueError):
+        Cadence("t_bad", 1.0, policy="later")
+
+@pytest.mark.parametrize("policy", [CATCH_UP, COALESCE, SKIP])
+def test_slow_step_keeps_grid(policy):
+    clock = VirtualClock(0.0)
+    stop = threading.Event()
+    starts = []
+
+    def slow():  # each step takes 2.5 slots
+        starts.append(clock.monotonic())
+        clock.sleep(2.5)
+
+    def until_30():
+        if clock.monotonic() >= 30.0:
+            stop.set()
+
+    sched = Scheduler(clock)
+    q = sched.add("t_slow_" + policy, 1.0, slow, policy)
+    sched.add("t_stop", 0.5, until_30)
+    sched.run(stop)
+    gaps = {b - a for a, b in zip(starts, starts[1:])}
+    assert q.runs == len(starts) == (12 if policy != SKIP else 11)
+    if policy == CATCH_UP:  # back to back and ever further behind: the old burst
+        assert gaps == {2.5} and q.missed == 0 and q.next_at < clock.monotonic() - 15
+    elif policy == COALESCE:  # back to back, but the backlog never builds up
+        assert gaps == {2.5} and q.missed > 0 and q.next_at >= clock.monotonic() - 2.5
+    else:  # only ever on a slot boundary
+        assert gaps == {3.0} and q.missed == 20 and all(s == int(s) for s in starts)
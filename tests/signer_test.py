@@ -0,0 +1,40 @@
+# Off-thread signing: pooled signatures match inline signing, in submission order.
+#   PYTHONPATH=src python -m pytest -q tests/signer_test.py
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import exchange
+from mm_bot.signer import SigningService, sign_payload, start_signer
+from conftest import make_cfg
+
+KEY = "0x" + "11" * 32
+
+def _actions(n):
+    return [({"type": "cancelByCloid", "cancels": [{"asset": 10223, "cloid": f"0x{i:032x}"}]}, 1_700_000_000_000 + i)
+            for i in range(n)]
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_pool_signatures_match_inline(kind):
+    svc = SigningService(KEY, False, workers=2, kind=kind)
+    try:
+        svc.warm_up()
+        actions = _actions(6)
+        got = svc.sign_many(actions)
+        assert got == [sign_payload(KEY, False, a, n) for a, n in actions]
+        assert svc.submit(*actions[0]).result(timeout=30) == got[0]
+        assert got[0]["signature"] != sign_payload(KEY, True, *actions[0])["signature"]  # mainnet domain differs
+    finally:
+        svc.shutdown()
+
+def test_exchange_signs_through_the_attached_service():
+    assert start_signer(make_cfg(PRIVATE_KEY=KEY, SIGNER_WORKERS=0)) is None
+    svc = start_signer(make_cfg(PRIVATE_KEY=KEY, SIGNER_WORKERS=1, SIGNER_KIND="thread"))
+    exchange.attach_signer(svc)
+    try:
+        action = _actions(1)[0][0]
+        body = exchange.sign_action(make_cfg(PRIVATE_KEY=KEY), action)
+        assert body == sign_payload(KEY, False, action, body["nonce"])
+    finally:
+        exchange.attach_signer(None)
+        svc.shutdown()
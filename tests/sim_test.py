@@ -0,0 +1,65 @@
+# Offline checks of the local exchange simulator, driving it through the package's own client code.
+#   PYTHONPATH=src python -m pytest -q tests/sim_test.py
+import time
+from decimal import Decimal
+
+from mm_bot import exchange, info
+from mm_bot.sim import HOUSE, SimExchange, SimMarket, SimOrder
+from mm_bot.utils import find_bbo
+from conftest import make_cfg
+
+def _sim(**kw) -> SimExchange:
+    m = SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))
+    kw.setdefault("taker_rate", 0.0)
+    kw.setdefault("vol_ticks", 0.0)
+    return SimExchange([m], balances={"SIM": Decimal(0), "USDC": Decimal(100000)}, **kw)
+
+def _order(px: str, is_buy: bool, tif: str = "Gtc", sz: str = "100", cloid=None):
+    w = {"a": 10223, "b": is_buy, "p": px, "s": sz, "r": False, "t": {"limit": {"tif": tif}}}
+    if cloid:
+        w["c"] = cloid
+    return w
+
+def test_post_only_reject_and_tick_errors():
+    sim = _sim()
+    sim.step(0.0)  # house levels around 0.126985
+    st = sim.place(_order("0.126986", True, "Alo"))
+    assert "Post only order would have immediately matched" in st["error"]
+    bid, ask = find_bbo(st["error"])
+    assert (bid, ask) == (Decimal("0.126984"), Decimal("0.126986"))
+    assert "divisible by tick size" in sim.place(_order("0.1269845", True))["error"]
+    assert "invalid size" in sim.place(_order("0.126980", True, sz="1.5"))["error"]
+
+def test_price_time_priority():
+    sim = _sim(depth=0)
+    first = sim.place(_order("0.126980", False, cloid="0x01"))["resting"]["oid"]
+    second = sim.place(_order("0.126980", False, cloid="0x02"))["resting"]["oid"]
+    better = sim.place(_order("0.126979", False, sz="90"))["resting"]["oid"]
+    m = sim.markets[10223]
+    taker = SimOrder(999, HOUSE, 10223, True, None, 160)
+    fills, _ = m.book.match(taker, None)
+    assert [(f[0].oid, f[1]) for f in fills] == [(better, 90), (first, 70)]
+    sim._apply_fills(m, taker, fills, [])
+    assert sim.orders[first].sz == 30 and sim.orders[second].sz == 100
+    assert sim.balances["SIM"] == Decimal(-160)
+    assert sim.handle_action({"nonce": 1, "action": {"type": "cancelByCloid", "cancels": [
+        {"asset": 10223, "cloid": "0x02"}, {"asset": 10223, "cloid": "0x09"}]}})["response"]["data"]["statuses"][0] == "success"
+    assert sim.handle_action({"nonce": 1, "action": {"type": "scheduleCancel"}})["status"] == "err"  # duplicate nonce
+
+def test_smart_submit_retries_against_sim():
+    sim = _sim()
+    base = sim.start()
+    cfg = make_cfg(BASE_URL=base, PANEL_FPS=4.0)
+    info.init_info(cfg)
+    exchange.init_exchange(cfg)
+    asset = info.resolve_asset_fields(cfg)
+    assert asset.name == "SIM/USDC" and asset.tick_sz == Decimal("0.000001")
+
+    # A post-only buy through the ask is rejected, then re-priced one tick under the bid and rests.
+    res = exchange.smart_submit(cfg, asset, True, Decimal("0.127000"), cfg.SIZE, cfg.TIF, True, cfg.RETRIES,
+                                cloid="0x" + "ab" * 16)
+    st = res["response"]["data"]["statuses"][0]
+    assert "resting" in st, res
+    o = sim.call(lambda: sim.orders[st["resting"]["oid"]])
+    assert o.px == 126983 and o.cloid == "0x" + "ab" * 16
+    assert sim.counters["reject:Post only order would have immediately matched"] == 1
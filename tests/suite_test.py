@@ -0,0 +1,40 @@
+# Benchmark suite smoke run against the stub exchange: every scenario reports its numbers.
+#   PYTHONPATH=src python -m pytest -q tests/suite_test.py
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from mm_bot import exchange, info
+import suite
+from stub_exchange import StubExchange, percentiles
+
+@pytest.fixture
+def stub(monkeypatch):
+    for name in ("INFO_URL", "MIDS_TTL", "_mids_cache", "REST_BOOK", "BBO_MAX_AGE"):
+        monkeypatch.setattr(info, name, getattr(info, name))
+    for name in ("EXCHANGE_URL", "NONCES"):
+        monkeypatch.setattr(exchange, name, getattr(exchange, name))
+    return StubExchange(delay_ms=5, jitter_ms=0)
+
+def test_submit_and_bot_scenarios(stub):
+    r = suite.bench_submit(stub, 6)
+    assert r["orders"] == 6 and r["orders_per_min"] > 0 and r["tick_to_ack_ms"]["p50"] >= 5
+
+    r = suite.bench_bot(stub, "sync", 2.0, 240)
+    assert r["orders_acked"] >= 3 and r["loop_lag_ms"]["p50"] is not None and r["tick_to_ack_ms"]["p99"] is not None
+
+    r = suite.bench_cpu(stub, 1.0, 240)
+    assert r["orders"] >= 1 and set(r["cpu_ms_per_order"]) == {"signing", "json", "decimal", "rendering", "other"}
+    assert r["cpu_ms_per_order"]["signing"] > 0
+
+def test_compare_and_percentiles():
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None}
+    assert percentiles(list(range(101))) == {"p50": 50, "p90": 90, "p99": 99}
+    prev = {"scenarios": {"submit": {"orders_per_min": 100.0, "tick_to_ack_ms": {"p50": 10.0}}, "gone": {"x": 1}}}
+    cur = {"scenarios": {"submit": {"orders_per_min": 150.0, "tick_to_ack_ms": {"p50": 5.0}}}}
+    assert suite.compare(cur, prev) == {
+        "submit.orders_per_min": {"prev": 100.0, "cur": 150.0, "change_pct": 50.0},
+        "submit.tick_to_ack_ms.p50": {"prev": 10.0, "cur": 5.0, "change_pct": -50.0},
+    }
@@ -0,0 +1,44 @@
+# Pooled HTTP transport against the local simulator: connection reuse, pre-warming, timings.
+#   PYTHONPATH=src python -m pytest -q tests/transport_test.py
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from mm_bot import transport
+from mm_bot.sim import SimExchange, SimMarket
+
+@pytest.fixture
+def base():
+    sim = SimExchange([SimMarket(223, "SIM/USDC", Decimal("0.000001"), Decimal(1), Decimal("0.126985"))])
+    url = sim.start()
+    transport.reset_timings()
+    yield url  # the server thread is a daemon
+    transport.reset_timings()
+
+def _key(url):
+    return url.split("://", 1)[1] + "/info"
+
+def test_requests_reuse_one_pooled_connection(base):
+    url = base + "/info"
+    transport.prewarm([url])  # the handshake happens here, not on the first real request
+    for _ in range(20):
+        assert transport.post_json(url, {"type": "allMids"}) == {"@223": "0.126985"}
+    t = transport.timings()[_key(base)]
+    assert (t["count"], t["errors"], t["new_conns"]) == (20, 0, 0)
+    assert t["total_avg_ms"] >= t["ttfb_avg_ms"] > 0
+
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        transport.post_json(base + "/nope", {})
+    assert transport.timings()[_key(base).replace("/info", "/nope")]["errors"] == 1
+
+def test_async_session_reused_within_a_loop(base):
+    url = base + "/info"
+    async def run():
+        try:
+            return [await transport.apost_json(url, {"type": "allMids"}) for _ in range(10)]
+        finally:
+            await transport.close_async_session()
+    assert asyncio.run(run()) == [{"@223": "0.126985"}] * 10
+    t = transport.timings()[_key(base)]
+    assert (t["count"], t["new_conns"]) == (10, 1)